@@ -1,14 +1,305 @@
 from __future__ import annotations
 
+import gzip
 import json
+import os
+import shutil
+import threading
+import time
+from collections.abc import Iterable, Iterator
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
+from .meta_paths import safe_plan_id
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_GROUP_EVENTS = 256
+DEFAULT_GROUP_DELAY_MS = 200
+
+
+class AuditLog:
+    """Append-only, segmented audit log with a per-plan index.
+
+    The active segment is ``audit_path`` (e.g. ``_meta/audit/audit.jsonl``). When it
+    grows past max_segment_bytes it is closed as ``audit-<seq>.jsonl.gz``. For every
+    event carrying a plan_id, ``<stem>.index/<plan_id>.jsonl`` gets an appended
+    ``[event, segment_seq, offset]`` line, so "has plan X been dry-run" reads one small
+    file no matter how long the log is, and appending never rewrites it.
+    """
+
+    def __init__(self, audit_path: Path, *, max_segment_bytes: int = DEFAULT_SEGMENT_BYTES) -> None:
+        self.path = audit_path
+        self._max_segment_bytes = max_segment_bytes
+        self._index_dir = audit_path.with_name(audit_path.stem + ".index")
+        self._state_path = audit_path.with_name(audit_path.stem + ".state.json")
+        self._lock = threading.RLock()
+        self._plan_cache: dict[str, dict[str, list[list[int]]]] = {}
+        self._active_seq = self._load_state()
+
+    # -- segments -------------------------------------------------------------------
+
+    def _closed_path(self, seq: int) -> Path:
+        """A closed segment before compression (only seen mid-rotation)."""
+        return self.path.with_name(f"{self.path.stem}-{seq:06d}{self.path.suffix}")
+
+    def _segment_path(self, seq: int) -> Path:
+        if seq == self._active_seq:
+            return self.path
+        closed = self._closed_path(seq)
+        gz = closed.with_name(closed.name + ".gz")
+        return closed if closed.exists() and not gz.exists() else gz
+
+    def _load_state(self) -> int:
+        if self._state_path.exists():
+            data = json.loads(self._state_path.read_text(encoding="utf-8"))
+            self._active_seq = int(data["active_seq"])
+            self._finish_rotation()
+            return self._active_seq
+        self._active_seq = 1
+        if self.path.exists():
+            self._reindex_active()  # one-time migration of a pre-index audit.jsonl
+        self._save_state()
+        return 1
+
+    def _save_state(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._state_path.with_name(self._state_path.name + ".tmp")
+        tmp.write_text(json.dumps({"active_seq": self._active_seq}), encoding="utf-8")
+        tmp.replace(self._state_path)
+
+    def _reindex_active(self) -> None:
+        added: dict[str, list[list[Any]]] = {}
+        with self.path.open("rb") as f:
+            offset = 0
+            for raw in f:
+                try:
+                    event = json.loads(raw)
+                except ValueError:
+                    event = None
+                if isinstance(event, dict) and event.get("plan_id"):
+                    self._add_to_index(event, self._active_seq, offset, added)
+                offset += len(raw)
+        self._save_index_entries(added)
+
+    def _rotate(self) -> None:
+        # Each step leaves a state _finish_rotation() can complete after a crash.
+        self.path.replace(self._closed_path(self._active_seq))
+        self._active_seq += 1
+        self._save_state()
+        self._finish_rotation()
+
+    def _finish_rotation(self) -> None:
+        """Complete an interrupted rotation: advance the state, compress closed segments."""
+        if self._closed_path(self._active_seq).exists():
+            self._active_seq += 1  # renamed, but the new state was not saved
+            self._save_state()
+        for seq in range(1, self._active_seq):
+            closed = self._closed_path(seq)
+            if not closed.exists():
+                continue
+            gz = closed.with_name(closed.name + ".gz")
+            tmp = gz.with_name(gz.name + ".tmp")
+            with closed.open("rb") as src, gzip.open(tmp, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            tmp.replace(gz)
+            closed.unlink()
+
+    # -- per-plan index -------------------------------------------------------------
+
+    def _plan_index_path(self, plan_id: str) -> Path:
+        return self._index_dir / f"{safe_plan_id(plan_id)}.jsonl"
+
+    def _plan_index(self, plan_id: str) -> dict[str, list[list[int]]]:
+        entry = self._plan_cache.get(plan_id)
+        if entry is None:
+            entry = {}
+            p = self._plan_index_path(plan_id)
+            if p.exists():
+                with p.open(encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            name, seq, offset = json.loads(line)
+                        except ValueError:
+                            continue  # torn last line after a crash
+                        entry.setdefault(name, []).append([seq, offset])
+            self._plan_cache[plan_id] = entry
+        return entry
+
+    def _add_to_index(
+        self, event: dict[str, Any], seq: int, offset: int, added: dict[str, list[list[Any]]]
+    ) -> None:
+        plan_id, name = str(event["plan_id"]), str(event.get("event"))
+        self._plan_index(plan_id).setdefault(name, []).append([seq, offset])
+        added.setdefault(plan_id, []).append([name, seq, offset])
+
+    def _save_index_entries(self, added: dict[str, list[list[Any]]]) -> None:
+        if not added:
+            return
+        self._index_dir.mkdir(parents=True, exist_ok=True)
+        for plan_id, entries in added.items():
+            lines = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries)
+            with self._plan_index_path(plan_id).open("a", encoding="utf-8") as f:
+                f.write(lines)
+
+    # -- public API -----------------------------------------------------------------
+
+    def append_many(self, events: Iterable[dict[str, Any]], *, fsync: bool = False) -> None:
+        """Append events with one open/write; the plan index is updated afterwards."""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.path.exists() and self.path.stat().st_size >= self._max_segment_bytes:
+                self._rotate()
+            added: dict[str, list[list[Any]]] = {}
+            with self.path.open("ab") as f:
+                offset = f.tell()
+                for event in events:
+                    event = dict(event)
+                    event.setdefault("ts", datetime.now(timezone.utc).isoformat())
+                    line = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+                    f.write(line)
+                    if event.get("plan_id"):
+                        self._add_to_index(event, self._active_seq, offset, added)
+                    offset += len(line)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._save_index_entries(added)
+
+    def append(self, event: dict[str, Any]) -> None:
+        self.append_many([event])
+
+    def plan_event_counts(self, plan_id: str) -> dict[str, int]:
+        with self._lock:
+            return {name: len(locs) for name, locs in self._plan_index(plan_id).items()}
+
+    def has_event(self, plan_id: str, event: str) -> bool:
+        """O(1) check against the per-plan index (no scan of the log)."""
+        return self.plan_event_counts(plan_id).get(event, 0) > 0
+
+    def iter_plan_events(self, plan_id: str, event: str | None = None) -> Iterator[dict]:
+        """Read a plan's events by offset, in log order."""
+        with self._lock:
+            index = self._plan_index(plan_id)
+            locs = sorted(
+                loc for name, entries in index.items() if event in (None, name) for loc in entries
+            )
+        for seq, offset in locs:
+            seg = self._segment_path(seq)
+            opener = gzip.open if seg.suffix == ".gz" else open
+            with opener(seg, "rb") as f:
+                f.seek(offset)
+                yield json.loads(f.readline())
+
+    def iter_events(self) -> Iterator[dict]:
+        """Read every event from all segments, oldest first."""
+        for seq in range(1, self._active_seq + 1):
+            seg = self._segment_path(seq)
+            if not seg.exists():
+                continue
+            opener = gzip.open if seg.suffix == ".gz" else open
+            with opener(seg, "rb") as f:
+                for raw in f:
+                    if raw.strip():
+                        yield json.loads(raw)
+
+
+class AuditWriter:
+    """Long-lived, thread-safe audit writer with group commit.
+
+    Events are buffered and appended in one write when max_events are pending, when
+    the oldest pending event is max_delay_ms old (checked on write and by a background
+    flusher thread), or at a barrier. barrier() is meant for phase boundaries
+    (apply start/end, before raising): it flushes and fsyncs. commit() returns only
+    once its event is fsynced; concurrent committers share one fsync. Leaving the
+    context always flushes with fsync, including when an exception is propagating.
+    """
+
+    def __init__(
+        self,
+        log: AuditLog,
+        *,
+        max_events: int = DEFAULT_GROUP_EVENTS,
+        max_delay_ms: int = DEFAULT_GROUP_DELAY_MS,
+    ) -> None:
+        self.log = log
+        self._max_events = max(1, max_events)
+        self._max_delay = max_delay_ms / 1000
+        self._buffer: list[dict[str, Any]] = []
+        self._oldest = 0.0
+        self._queued = 0  # events ever buffered
+        self._durable = 0  # of those, how many are known fsynced
+        self._lock = threading.Lock()  # buffer and counters
+        self._flush_lock = threading.Lock()  # one append at a time, in buffer order
+        self._stop = threading.Event()
+        self._flusher: threading.Thread | None = None
+        self.flushes = 0
+
+    def __enter__(self) -> AuditWriter:
+        if self._max_delay > 0:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="audit-flush", daemon=True
+            )
+            self._flusher.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush(fsync=True)
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self._max_delay):
+            with self._lock:
+                due = self._buffer and time.monotonic() - self._oldest >= self._max_delay
+            if due:
+                self.flush()
+
+    def _enqueue(self, event: dict[str, Any]) -> tuple[int, bool]:
+        """Buffer event; returns (its ticket, whether a flush is due)."""
+        event = dict(event)
+        event.setdefault("ts", datetime.now(timezone.utc).isoformat())
+        with self._lock:
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append(event)
+            self._queued += 1
+            full = len(self._buffer) >= self._max_events
+            late = time.monotonic() - self._oldest >= self._max_delay
+            return self._queued, full or late
+
+    def write(self, event: dict[str, Any]) -> None:
+        if self._enqueue(event)[1]:
+            self.flush()
+
+    def commit(self, event: dict[str, Any]) -> None:
+        """Write event and return once it is fsynced (with whatever else is pending)."""
+        ticket = self._enqueue(event)[0]
+        with self._flush_lock:
+            if self._durable < ticket:  # not already covered by another thread's fsync
+                self._flush(fsync=True)
+
+    def barrier(self, event: dict[str, Any] | None = None) -> None:
+        """Optionally write event, then flush everything pending with fsync."""
+        if event is not None:
+            self._enqueue(event)
+        self.flush(fsync=True)
+
+    def flush(self, *, fsync: bool = False) -> None:
+        with self._flush_lock:
+            self._flush(fsync=fsync)
+
+    def _flush(self, *, fsync: bool) -> None:
+        with self._lock:
+            pending, self._buffer = self._buffer, []
+            upto = self._queued
+        if pending or fsync:
+            self.log.append_many(pending, fsync=fsync)
+            self.flushes += 1
+            if fsync:
+                self._durable = upto
+
 
 def append_audit(audit_path: Path, event: dict[str, Any]) -> None:
-    audit_path.parent.mkdir(parents=True, exist_ok=True)
-    event = dict(event)
-    event.setdefault("ts", datetime.now(timezone.utc).isoformat())
-    with audit_path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(event, ensure_ascii=False) + "\n")
+    AuditLog(audit_path).append(event)
@@ -0,0 +1,456 @@
+"""Benchmarks: reproducible synthetic trees and timed workloads.
+
+generate_tree() builds a tree from a TreeSpec (file count, depth, fan-out, log-normal
+sizes, duplicate and tmp/bak ratios) with a seeded RNG, so the same spec always yields
+the same paths, sizes and contents. run_benchmarks() times the workloads in WORKLOADS
+against it and returns JSON-ready results (seconds, files/s, MB/s, peak RSS);
+compare() flags regressions against a saved baseline.
+
+Each workload runs in a fresh spawned process by default, so peak RSS is its own and
+no warm state leaks between workloads. The Everything providers run against local
+stand-ins: an HTTP server and an es script serving a listing of the synthetic tree.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import csv
+import io
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from functools import cached_property
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from .approve import approve_plan
+from .executor import apply_plan
+from .hashing import sha256_file
+from .meta_paths import meta_root
+from .planner import generate_plan
+from .providers.everything_es import EverythingESProvider
+from .providers.everything_http import EverythingHTTPProvider
+from .providers.index_trust import WIN_FILETIME_EPOCH_OFFSET
+from .providers.local_walk import LocalWalkProvider
+from .reporting import generate_report
+from .snapshot import create_snapshot, load_snapshot
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+RESULTS_VERSION = 1
+DEFAULT_THRESHOLD = 0.10
+_EXTENSIONS = (".txt", ".jpg", ".pdf", ".docx", ".csv", ".log", ".bin")
+
+
+@dataclass(frozen=True)
+class TreeSpec:
+    files: int = 10_000
+    depth: int = 3
+    fanout: int = 8
+    size_median: int = 16 * 1024  # bytes; sizes are log-normal around the median
+    size_sigma: float = 1.5
+    size_max: int = 64 * 1024 * 1024
+    dup_ratio: float = 0.05  # fraction of files that copy an earlier file's content
+    tmp_ratio: float = 0.02  # fraction of .tmp/.bak files (what the default plan moves)
+    max_age_days: int = 3 * 365
+    seed: int = 0
+
+
+@dataclass
+class TreeStats:
+    files: int = 0
+    dirs: int = 0
+    bytes: int = 0
+    duplicates: int = 0
+
+
+def generate_tree(root: Path, spec: TreeSpec) -> TreeStats:
+    """Create spec's tree under root (which must not exist yet)."""
+    rng = random.Random(spec.seed)
+    root.mkdir(parents=True)
+    dirs = [root]
+    level = [root]
+    for _ in range(spec.depth):
+        level = [d / f"d{i:02d}" for d in level for i in range(spec.fanout)]
+        dirs.extend(level)
+    for d in dirs[1:]:
+        d.mkdir()
+    stats = TreeStats(dirs=len(dirs) - 1)
+    originals: list[tuple[int, int]] = []  # (size, content seed) to copy for duplicates
+    now = time.time()
+    mu = math.log(max(spec.size_median, 1))
+    for i in range(spec.files):
+        if originals and rng.random() < spec.dup_ratio:
+            size, content_seed = rng.choice(originals)
+            stats.duplicates += 1
+        else:
+            size = min(int(rng.lognormvariate(mu, spec.size_sigma)), spec.size_max)
+            content_seed = rng.getrandbits(64)
+            originals.append((size, content_seed))
+        if rng.random() < spec.tmp_ratio:
+            ext = rng.choice((".tmp", ".bak"))
+        else:
+            ext = rng.choice(_EXTENSIONS)
+        path = rng.choice(dirs) / f"f{i:07d}{ext}"
+        path.write_bytes(random.Random(content_seed).randbytes(size))
+        mtime = now - rng.uniform(0, spec.max_age_days * 86_400)
+        os.utime(path, (mtime, mtime))
+        stats.files += 1
+        stats.bytes += size
+    return stats
+
+
+@dataclass
+class _Context:
+    root: Path  # the synthetic tree (read-only workloads)
+    work: Path  # scratch space for outputs and tree copies
+
+    @cached_property
+    def listing(self) -> list[tuple[str, int, int]]:  # (path, size, mtime_ns)
+        records = LocalWalkProvider().iter_files(self.root)
+        return [(str(r.path), r.size_bytes, r.mtime_ns) for r in records]
+
+
+def _reset_meta(root: Path) -> None:
+    # Workloads must not see caches/indexes a previous workload left in _meta.
+    shutil.rmtree(meta_root(root), ignore_errors=True)
+
+
+def _total(records: Iterator[Any]) -> tuple[int, int]:
+    files = size = 0
+    for rec in records:
+        files += 1
+        size += rec.size_bytes
+    return files, size
+
+
+Workload = Callable[[_Context], contextlib.AbstractContextManager[Callable[[], tuple[int, int]]]]
+
+
+@contextlib.contextmanager
+def _walk_local(ctx: _Context) -> Iterator[Callable[[], tuple[int, int]]]:
+    yield lambda: _total(LocalWalkProvider().iter_files(ctx.root))
+
+
+@contextlib.contextmanager
+def _walk_local_workers(ctx: _Context) -> Iterator[Callable[[], tuple[int, int]]]:
+    yield lambda: _total(LocalWalkProvider(workers=8).iter_files(ctx.root))
+
+
+class _HTTPStandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, rows: list[dict[str, Any]]) -> None:
+        super().__init__(("127.0.0.1", 0), _HTTPHandler)
+        self.rows = rows
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: _HTTPStandIn
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        params = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+        o, c = int(params.get("o", 0)), int(params.get("c", 100))
+        body = json.dumps(
+            {"totalResults": len(self.server.rows), "results": self.server.rows[o : o + c]}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _filetime(mtime_ns: int) -> int:
+    return mtime_ns // 100 + WIN_FILETIME_EPOCH_OFFSET
+
+
+def _http(trust_index: bool) -> Workload:
+    @contextlib.contextmanager
+    def workload(ctx: _Context) -> Iterator[Callable[[], tuple[int, int]]]:
+        rows = [
+            {
+                "type": "file",
+                "name": os.path.basename(p),
+                "path": os.path.dirname(p),
+                "size": size,
+                "date_modified": _filetime(mtime_ns),
+            }
+            for p, size, mtime_ns in ctx.listing
+        ]
+        server = _HTTPStandIn(rows)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        provider = EverythingHTTPProvider(port=server.server_address[1], trust_index=trust_index)
+        try:
+            yield lambda: _total(provider.iter_files(ctx.root))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    return workload
+
+
+_ES_SCRIPT = """#!{python}
+import sys
+args = sys.argv[1:]
+opt = lambda name, default: int(args[args.index(name) + 1]) if name in args else default
+offset, count = opt("-offset", 0), opt("-n", 1 << 62)
+with open({listing!r}, encoding="utf-8") as f:
+    header = f.readline()
+    sys.stdout.write(header)
+    for i, line in enumerate(f):
+        if i >= offset + count:
+            break
+        if i >= offset:
+            sys.stdout.write(line)
+"""
+
+
+def _es(trust_index: bool) -> Workload:
+    @contextlib.contextmanager
+    def workload(ctx: _Context) -> Iterator[Callable[[], tuple[int, int]]]:
+        if sys.platform == "win32":
+            raise _Skip("the es stand-in is a POSIX script")
+        listing = ctx.work / "es_listing.csv"
+        with listing.open("w", encoding="utf-8", newline="") as f:
+            out = csv.writer(f)
+            out.writerow(["Filename", "Size", "Date Modified"])
+            out.writerows((p, size, _filetime(mtime_ns)) for p, size, mtime_ns in ctx.listing)
+        exe = ctx.work / "es"
+        exe.write_text(_ES_SCRIPT.format(python=sys.executable, listing=str(listing)))
+        exe.chmod(0o755)
+        provider = EverythingESProvider(es_exe=str(exe), trust_index=trust_index)
+        yield lambda: _total(provider.iter_files(ctx.root))
+
+    return workload
+
+
+@contextlib.contextmanager
+def _sha256(ctx: _Context) -> Iterator[Callable[[], tuple[int, int]]]:
+    listing = ctx.listing
+    size = sum(s for _, s, _ in listing)
+
+    def run() -> tuple[int, int]:
+        for p, _, _ in listing:
+            sha256_file(Path(p))
+        return len(listing), size
+
+    yield run
+
+
+def _report(warm: bool) -> Workload:
+    @contextlib.contextmanager
+    def workload(ctx: _Context) -> Iterator[Callable[[], tuple[int, int]]]:
+        _reset_meta(ctx.root)
+        if warm:
+            generate_report(ctx.root, columnar=False)  # leaves the cached listing behind
+
+        def run() -> tuple[int, int]:
+            out = generate_report(ctx.root, columnar=False)
+            data = json.loads(out.with_suffix(".json").read_text(encoding="utf-8"))
+            return data["files"], data["bytes"]
+
+        yield run
+
+    return workload
+
+
+@contextlib.contextmanager
+def _plan(ctx: _Context) -> Iterator[Callable[[], tuple[int, int]]]:
+    _reset_meta(ctx.root)
+    size = sum(s for _, s, _ in ctx.listing)
+
+    def run() -> tuple[int, int]:
+        generate_plan(ctx.root)
+        return len(ctx.listing), size  # every file is matched against the rules
+
+    try:
+        yield run
+    finally:
+        shutil.rmtree(ctx.root / "99_QUARANTINE", ignore_errors=True)
+
+
+@contextlib.contextmanager
+def _snapshot(ctx: _Context) -> Iterator[Callable[[], tuple[int, int]]]:
+    _reset_meta(ctx.root)
+    out = ctx.work / "bench_snapshot.jsonl"
+    out.unlink(missing_ok=True)
+
+    def run() -> tuple[int, int]:
+        create_snapshot(ctx.root, out, use_hash_cache=False)
+        rows = load_snapshot(out)
+        return len(rows), sum(r["size_bytes"] for r in rows)
+
+    yield run
+
+
+@contextlib.contextmanager
+def _apply(ctx: _Context) -> Iterator[Callable[[], tuple[int, int]]]:
+    tree = ctx.work / "apply_tree"
+    shutil.rmtree(tree, ignore_errors=True)
+    shutil.copytree(ctx.root, tree, ignore=shutil.ignore_patterns("_meta"))
+    plan_path = generate_plan(tree)
+    plan = json.loads(plan_path.read_text(encoding="utf-8"))
+    plan["policy"]["max_actions"] = max(len(plan["actions"]), 1)
+    plan_path.write_text(json.dumps(plan, indent=2, ensure_ascii=False), encoding="utf-8")
+    approve_plan(plan_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        apply_plan(plan_path, dry_run=True)
+    size = sum(Path(a["src"]).stat().st_size for a in plan["actions"])
+
+    def run() -> tuple[int, int]:
+        apply_plan(plan_path, dry_run=False)
+        return len(plan["actions"]), size
+
+    try:
+        yield run
+    finally:
+        shutil.rmtree(tree, ignore_errors=True)
+
+
+class _Skip(Exception):
+    """The workload cannot run on this platform."""
+
+
+WORKLOADS: dict[str, Workload] = {
+    "walk_local": _walk_local,
+    "walk_local_workers": _walk_local_workers,
+    "everything_http": _http(trust_index=False),
+    "everything_http_trust": _http(trust_index=True),
+    "everything_es": _es(trust_index=False),
+    "everything_es_trust": _es(trust_index=True),
+    "sha256": _sha256,
+    "report": _report(warm=False),
+    "report_warm": _report(warm=True),
+    "plan": _plan,
+    "snapshot": _snapshot,
+    "apply": _apply,
+}
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)  # bytes / KiB
+
+
+def run_workload(name: str, root: Path, work: Path, repeat: int = 1) -> dict[str, Any]:
+    """Time one workload (best of repeat runs); setup and teardown are not timed."""
+    ctx = _Context(root=root, work=work)  # workloads that need the listing build it in setup
+    best = math.inf
+    files = size = 0
+    try:
+        for _ in range(max(repeat, 1)):
+            with WORKLOADS[name](ctx) as run:
+                start = time.perf_counter()
+                files, size = run()
+                best = min(best, time.perf_counter() - start)
+    except _Skip as e:
+        return {"skipped": str(e)}
+    return {
+        "seconds": round(best, 6),
+        "files": files,
+        "bytes": size,
+        "files_per_s": round(files / best, 1) if best else None,
+        "mb_per_s": round(size / best / 1e6, 2) if best else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run_benchmarks(
+    root: Path,
+    work: Path,
+    *,
+    workloads: list[str] | None = None,
+    repeat: int = 1,
+    isolate: bool = True,
+    spec: TreeSpec | None = None,
+) -> dict[str, Any]:
+    """Run workloads over the tree at root; returns the results document."""
+    names = workloads or list(WORKLOADS)
+    unknown = [n for n in names if n not in WORKLOADS]
+    if unknown:
+        raise ValueError(f"Unknown workload(s): {', '.join(unknown)}")
+    work.mkdir(parents=True, exist_ok=True)
+    results: dict[str, Any] = {}
+    for name in names:
+        if isolate:
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                results[name] = pool.submit(run_workload, name, root, work, repeat).result()
+        else:
+            results[name] = run_workload(name, root, work, repeat)
+    _reset_meta(root)
+    return {
+        "version": RESULTS_VERSION,
+        "created_at": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "isolated": isolate,
+        "spec": asdict(spec) if spec is not None else None,
+        "results": results,
+    }
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], *, threshold: float = DEFAULT_THRESHOLD
+) -> list[str]:
+    """Describe each regression of current against baseline.
+
+    A workload regresses when files/s drops, or peak RSS grows, by more than threshold
+    (a fraction). Workloads missing or skipped on either side are ignored.
+    """
+    regressions = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or "skipped" in base or "skipped" in cur:
+            continue
+        if base.get("files_per_s") and cur.get("files_per_s") is not None:
+            if cur["files_per_s"] < base["files_per_s"] * (1 - threshold):
+                regressions.append(f"{name}: files/s {base['files_per_s']} -> {cur['files_per_s']}")
+        if base.get("peak_rss_mb") and cur.get("peak_rss_mb") is not None:
+            if cur["peak_rss_mb"] > base["peak_rss_mb"] * (1 + threshold):
+                regressions.append(
+                    f"{name}: peak RSS {base['peak_rss_mb']} MB -> {cur['peak_rss_mb']} MB"
+                )
+    return regressions
+
+
+def run_suite(
+    spec: TreeSpec,
+    work: Path,
+    *,
+    workloads: list[str] | None = None,
+    repeat: int = 1,
+    isolate: bool = True,
+) -> dict[str, Any]:
+    """Generate spec's tree under work/tree (replacing it) and run the workloads on it."""
+    tree = work / "tree"
+    shutil.rmtree(tree, ignore_errors=True)
+    stats = generate_tree(tree, spec)
+    doc = run_benchmarks(
+        tree, work / "scratch", workloads=workloads, repeat=repeat, isolate=isolate, spec=spec
+    )
+    doc["tree"] = asdict(stats)
+    return doc
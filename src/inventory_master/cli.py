@@ -1,12 +1,65 @@
 from __future__ import annotations
 
 import argparse
+import json
+import shutil
+import tempfile
+from datetime import datetime
 from pathlib import Path
+from typing import Any
 
 from .approve import approve_plan
+from .dupes import scan_duplicates, write_dupes_report
 from .executor import ApplyError, apply_plan
+from .meta_paths import ensure_meta_layout
 from .planner import generate_plan
-from .reporting import generate_report
+from .providers.index_trust import TrustOptions
+from .reporting import generate_report, refresh_index
+from .rules import DEFAULT_PROFILE, Rule, RuleSet, load_rules, profile_rules
+from .snapshot import create_incremental_snapshot, create_snapshot
+
+
+def _add_trust_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--trust-index",
+        action="store_true",
+        help="Everything backends: use indexed size/mtime instead of a stat per file.",
+    )
+    parser.add_argument(
+        "--verify-fraction",
+        type=float,
+        default=0.0,
+        help="With --trust-index: stat this share of files and report drift.",
+    )
+
+
+def server_request(root: Path, req: dict[str, Any]) -> dict[str, Any] | None:
+    # Imported on use, like serve/watch/bench below: keeps CLI startup light.
+    from .server import request
+
+    return request(root, req)
+
+
+def _trust(args: argparse.Namespace) -> TrustOptions | None:
+    """TrustOptions from the flags; None when left at the defaults."""
+    if not args.trust_index and not args.verify_fraction:
+        return None
+    return TrustOptions(trust_index=args.trust_index, verify_fraction=args.verify_fraction)
+
+
+def _print_drift(doc_path: Path) -> None:
+    """Summarize the "drift" section of a report sidecar or plan, if it has one."""
+    drift = json.loads(doc_path.read_text(encoding="utf-8")).get("drift")
+    if not drift:
+        return
+    drifted = drift["missing"] + drift["size_mismatch"] + drift["mtime_mismatch"]
+    print(
+        f"index drift: {drifted} of {drift['sampled']} sampled files differ from disk "
+        f"(missing={drift['missing']} size={drift['size_mismatch']} "
+        f"mtime={drift['mtime_mismatch']})"
+    )
+    for line in drift["examples"]:
+        print(f"  {line}")
 
 
 def main(argv: list[str] | None = None) -> int:
@@ -15,9 +68,49 @@ def main(argv: list[str] | None = None) -> int:
 
     p_report = sub.add_parser("report", help="Generate read-only report under _meta/reports/")
     p_report.add_argument("--root", required=True)
+    p_report.add_argument(
+        "--use-index", action="store_true", help="Query the SQLite inventory index."
+    )
+    _add_trust_args(p_report)
 
     p_plan = sub.add_parser("plan", help="Generate plan JSON under _meta/plans/")
     p_plan.add_argument("--root", required=True)
+    p_plan.add_argument(
+        "--use-index", action="store_true", help="Query the SQLite inventory index."
+    )
+    p_plan.add_argument(
+        "--rules",
+        help=f"Rules file (YAML/JSON; default: planner_rules of {DEFAULT_PROFILE} if present)",
+    )
+    _add_trust_args(p_plan)
+
+    p_dupes = sub.add_parser("dupes", help="Find duplicate files; report under _meta/reports/")
+    p_dupes.add_argument("--root", required=True)
+    p_dupes.add_argument("--jobs", type=int, default=1, help="Parallel hashing workers.")
+    p_dupes.add_argument("--hash-mode", choices=("thread", "process"), default="thread")
+    p_dupes.add_argument("--min-size", type=int, default=1, help="Ignore smaller files (bytes).")
+    p_dupes.add_argument(
+        "--plan", action="store_true", help="Also write a plan quarantining redundant copies."
+    )
+
+    p_index = sub.add_parser("index", help="Build/refresh the SQLite index under _meta/inventory/")
+    p_index.add_argument("--root", required=True)
+    _add_trust_args(p_index)
+
+    p_serve = sub.add_parser(
+        "serve", help="Keep the inventory in memory; report/plan use it (Ctrl+C to stop)"
+    )
+    p_serve.add_argument("--root", required=True)
+    _add_trust_args(p_serve)
+
+    p_watch = sub.add_parser("watch", help="Keep the SQLite index current (Ctrl+C to stop)")
+    p_watch.add_argument("--root", required=True)
+    p_watch.add_argument(
+        "--poll-interval",
+        type=float,
+        help="Seconds between rescans when inotify is unavailable.",
+    )
+    p_watch.add_argument("--no-inotify", action="store_true", help="Always poll.")
 
     p_approve = sub.add_parser("approve", help="Create approval token for a plan (human gate).")
     p_approve.add_argument("--plan", required=True)
@@ -25,19 +118,189 @@ def main(argv: list[str] | None = None) -> int:
     p_apply = sub.add_parser("apply", help="Apply an approved plan (transactional).")
     p_apply.add_argument("--plan", required=True)
     p_apply.add_argument("--dry-run", action="store_true", help="Required first: prints diff only.")
+    p_apply.add_argument("--jobs", type=int, default=1, help="Parallel apply workers.")
+    p_apply.add_argument(
+        "--resume", action="store_true", help="Continue an interrupted apply from its journal."
+    )
+
+    p_snap = sub.add_parser("snapshot", help="Write a file manifest under _meta/snapshots/")
+    p_snap.add_argument("--root", required=True)
+    p_snap.add_argument("--out", help="Snapshot path (.jsonl, .jsonl.gz, .jsonl.xz or .json)")
+    p_snap.add_argument("--no-hash", action="store_true", help="Skip SHA-256 hashing.")
+    p_snap.add_argument("--jobs", type=int, default=1, help="Parallel hashing workers.")
+    p_snap.add_argument("--hash-mode", choices=("thread", "process"), default="thread")
+    p_snap.add_argument(
+        "--scan-workers", type=int, default=1, help="Parallel directory listing threads."
+    )
+    p_snap.add_argument(
+        "--incremental", action="store_true", help="Reuse the previous snapshot; hash only churn."
+    )
+    p_snap.add_argument("--previous", help="Previous snapshot (default: latest in _meta/snapshots)")
+    p_snap.add_argument(
+        "--trust-dir-mtime",
+        action="store_true",
+        help="With --incremental: skip stat of files in directories with unchanged mtime.",
+    )
+    p_snap.add_argument(
+        "--no-hash-cache", action="store_true", help="Rehash every file (ignore hash cache)."
+    )
+
+    p_bench = sub.add_parser("bench", help="Time workloads on a synthetic tree (JSON results)")
+    p_bench.add_argument("--work", help="Scratch directory (default: a temp dir, removed after)")
+    p_bench.add_argument("--files", type=int)
+    p_bench.add_argument("--depth", type=int)
+    p_bench.add_argument("--fanout", type=int)
+    p_bench.add_argument("--dup-ratio", type=float)
+    p_bench.add_argument("--seed", type=int)
+    p_bench.add_argument("--workloads", help="Comma-separated subset (default: all).")
+    p_bench.add_argument("--repeat", type=int, default=1, help="Runs per workload (best kept).")
+    p_bench.add_argument("--no-isolate", action="store_true", help="Run workloads in-process.")
+    p_bench.add_argument("--out", help="Write results JSON here (default: stdout).")
+    p_bench.add_argument("--baseline", help="Results JSON to compare against.")
+    p_bench.add_argument(
+        "--threshold",
+        type=float,
+        help="Allowed slowdown / RSS growth as a fraction.",
+    )
 
     args = p.parse_args(argv)
+    if getattr(args, "verify_fraction", 0.0):
+        if not args.trust_index:
+            p.error("--verify-fraction requires --trust-index")
+        if not 0.0 < args.verify_fraction <= 1.0:
+            p.error("--verify-fraction must be between 0 and 1")
 
     if args.cmd == "report":
-        out = generate_report(Path(args.root))
+        trust = _trust(args)  # explicit trust flags bypass a server's own settings
+        resp = None
+        if not args.use_index and trust is None:
+            resp = server_request(Path(args.root), {"op": "report"})
+        if resp:
+            print(resp["path"])
+            return 0
+        out = generate_report(Path(args.root), use_index=args.use_index, trust=trust)
         print(str(out))
+        _print_drift(out.with_suffix(".json"))
         return 0
 
     if args.cmd == "plan":
-        out = generate_plan(Path(args.root))
+        rules_file = Path(args.rules) if args.rules else None
+        if rules_file is None and profile_rules(DEFAULT_PROFILE) is not None:
+            rules_file = DEFAULT_PROFILE
+        trust = _trust(args)
+        resp = None
+        if not args.use_index and trust is None:
+            rules_path = str(rules_file.resolve()) if rules_file else None
+            resp = server_request(Path(args.root), {"op": "plan", "rules": rules_path})
+        if resp:
+            print(resp["path"])
+            return 0
+        rules = RuleSet(load_rules(rules_file)) if rules_file else None
+        out = generate_plan(Path(args.root), use_index=args.use_index, rules=rules, trust=trust)
+        print(str(out))
+        _print_drift(out)
+        return 0
+
+    if args.cmd == "serve":
+        from .server import serve
+
+        serve(Path(args.root), trust=_trust(args))
+        return 0
+
+    if args.cmd == "dupes":
+        root = Path(args.root)
+        groups, stats = scan_duplicates(
+            root, jobs=args.jobs, hash_mode=args.hash_mode, min_size=args.min_size
+        )
+        print(str(write_dupes_report(root, groups, stats)))
+        if args.plan:
+            rules = RuleSet([Rule(name="duplicate", duplicate=True)])
+            print(str(generate_plan(root, rules=rules, duplicates=groups)))
+        return 0
+
+    if args.cmd == "index":
+        count = refresh_index(Path(args.root), trust=_trust(args))
+        print(f"indexed {count} files")
+        return 0
+
+    if args.cmd == "watch":
+        from .watch import watch
+
+        poll = {} if args.poll_interval is None else {"poll_interval": args.poll_interval}
+        stats = watch(Path(args.root), use_inotify=not args.no_inotify, **poll)
+        print(
+            f"watch stopped ({stats.mode}): events={stats.events} upserts={stats.upserts} "
+            f"deletes={stats.deletes} rescans={stats.rescans}"
+        )
+        return 0
+
+    if args.cmd == "snapshot":
+        root = Path(args.root)
+        if args.out:
+            out = Path(args.out)
+        else:
+            ts = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
+            out = ensure_meta_layout(root)["snapshots"] / f"snapshot_{ts}.jsonl"
+        if args.incremental:
+            changes = create_incremental_snapshot(
+                root,
+                out,
+                previous=Path(args.previous) if args.previous else None,
+                trust_dir_mtime=args.trust_dir_mtime,
+                jobs=args.jobs,
+                hash_mode=args.hash_mode,
+                scan_workers=args.scan_workers,
+            )
+            print(str(out))
+            print(
+                f"added={len(changes.added)} modified={len(changes.modified)} "
+                f"removed={len(changes.removed)} unchanged={changes.unchanged}"
+            )
+            return 0
+        create_snapshot(
+            root,
+            out,
+            hash_files=not args.no_hash,
+            jobs=args.jobs,
+            hash_mode=args.hash_mode,
+            use_hash_cache=not args.no_hash_cache,
+            scan_workers=args.scan_workers,
+        )
         print(str(out))
         return 0
 
+    if args.cmd == "bench":
+        from .bench import TreeSpec, compare, run_suite
+
+        given = {k: getattr(args, k) for k in ("files", "depth", "fanout", "dup_ratio", "seed")}
+        spec = TreeSpec(**{k: v for k, v in given.items() if v is not None})
+        work = Path(args.work) if args.work else Path(tempfile.mkdtemp(prefix="im_bench_"))
+        try:
+            doc = run_suite(
+                spec,
+                work,
+                workloads=args.workloads.split(",") if args.workloads else None,
+                repeat=args.repeat,
+                isolate=not args.no_isolate,
+            )
+        finally:
+            if not args.work:
+                shutil.rmtree(work, ignore_errors=True)
+        text = json.dumps(doc, indent=2)
+        if args.out:
+            Path(args.out).write_text(text, encoding="utf-8")
+            print(args.out)
+        else:
+            print(text)
+        if args.baseline:
+            baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+            limit = {} if args.threshold is None else {"threshold": args.threshold}
+            regressions = compare(baseline, doc, **limit)
+            for line in regressions:
+                print(f"REGRESSION {line}")
+            return 1 if regressions else 0
+        return 0
+
     if args.cmd == "approve":
         out = approve_plan(Path(args.plan))
         print(str(out))
@@ -45,7 +308,9 @@ def main(argv: list[str] | None = None) -> int:
 
     if args.cmd == "apply":
         try:
-            apply_plan(Path(args.plan), dry_run=bool(args.dry_run))
+            apply_plan(
+                Path(args.plan), dry_run=bool(args.dry_run), jobs=args.jobs, resume=args.resume
+            )
         except ApplyError as e:
             print(f"ERROR: {e}")
             return 2
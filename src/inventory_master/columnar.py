@@ -0,0 +1,187 @@
+"""Optional NumPy columnar inventory for vectorized report statistics.
+
+Records are stored as parallel arrays (size, mtime, extension code, directory id)
+instead of per-file objects; report numbers come from bincount/searchsorted/
+argpartition over whole columns. Install with ``pip install inventory-master[columnar]``;
+without NumPy, HAVE_NUMPY is False and reporting uses the streaming ReportStats path.
+"""
+
+from __future__ import annotations
+
+import heapq
+import importlib.util
+import os
+from array import array
+from collections import Counter
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from .models import FileRecord
+from .report_stats import AGE_EDGES_DAYS, LARGEST_N, SIZE_EDGES, ReportStats
+
+# Optional dependency, imported on first use: it costs more than the rest of the CLI.
+HAVE_NUMPY = importlib.util.find_spec("numpy") is not None
+
+if TYPE_CHECKING:
+    from .inventory_index import InventoryIndex
+
+PERCENTILES = (50, 90, 99)
+TOP_DIRS = 20
+_NS_PER_DAY = 86_400 * 1_000_000_000
+
+
+def _numpy() -> Any:
+    if not HAVE_NUMPY:
+        raise RuntimeError("NumPy is required for the columnar backend (pip install numpy)")
+    import numpy
+
+    return numpy
+
+
+class _Interner:
+    """Map strings to dense integer codes."""
+
+    def __init__(self) -> None:
+        self.codes: dict[str, int] = {}
+        self.values: list[str] = []
+
+    def __call__(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+@dataclass
+class ColumnarInventory:
+    size: Any  # np.ndarray[int64]
+    mtime_ns: Any  # np.ndarray[int64]
+    ext_code: Any  # np.ndarray[int32], index into exts
+    dir_id: Any  # np.ndarray[int32], index into dirs
+    exts: list[str]
+    dirs: list[str]
+    top_files: Callable[[int], list[tuple[int, str]]]  # k -> (size, path) of the k largest
+
+    def __len__(self) -> int:
+        return int(self.size.shape[0])
+
+    @classmethod
+    def from_records(
+        cls, records: Iterable[FileRecord], *, largest_n: int = LARGEST_N
+    ) -> ColumnarInventory:
+        """Load records; only the largest_n biggest files keep their paths."""
+        np = _numpy()
+        sizes, mtimes, ext_codes, dir_ids = array("q"), array("q"), array("i"), array("i")
+        ext_of, dir_of = _Interner(), _Interner()
+        largest: list[tuple[int, str]] = []  # min-heap, like ReportStats
+        split = os.path.split
+        for rec in records:
+            path = str(rec.path)
+            parent, name = split(path)
+            i = name.rfind(".")
+            size = rec.size_bytes
+            sizes.append(size)
+            mtimes.append(rec.mtime_ns)
+            ext_codes.append(ext_of(name[i:].lower() if 0 < i < len(name) - 1 else ""))
+            dir_ids.append(dir_of(parent))
+            if len(largest) < largest_n:
+                heapq.heappush(largest, (size, path))
+            elif size > largest[0][0]:
+                heapq.heappushpop(largest, (size, path))
+
+        def top_files(k: int) -> list[tuple[int, str]]:
+            return heapq.nlargest(k, largest)  # at most largest_n
+
+        return cls(
+            size=np.frombuffer(sizes, dtype=np.int64),
+            mtime_ns=np.frombuffer(mtimes, dtype=np.int64),
+            ext_code=np.frombuffer(ext_codes, dtype=np.int32),
+            dir_id=np.frombuffer(dir_ids, dtype=np.int32),
+            exts=ext_of.values,
+            dirs=dir_of.values,
+            top_files=top_files,
+        )
+
+    @classmethod
+    def from_index(cls, index: InventoryIndex) -> ColumnarInventory:
+        """Load the index's columns (parent and ext are already stored per row)."""
+        np = _numpy()
+        rowids, sizes, mtimes, ext_codes, dir_ids = (
+            array("q"),
+            array("q"),
+            array("q"),
+            array("i"),
+            array("i"),
+        )
+        ext_of, dir_of = _Interner(), _Interner()
+        for rows in index.iter_rows():
+            for rowid, parent, ext, size, mtime_ns in rows:
+                rowids.append(rowid)
+                sizes.append(size)
+                mtimes.append(mtime_ns)
+                ext_codes.append(ext_of(ext))
+                dir_ids.append(dir_of(parent))
+
+        size = np.frombuffer(sizes, dtype=np.int64)
+
+        def top_files(k: int) -> list[tuple[int, str]]:
+            n = len(size)
+            k = min(k, n)
+            rows = np.argpartition(size, n - k)[n - k :].tolist() if k else []
+            by_id = index.paths_for_rowids(rowids[r] for r in rows)
+            return [(int(size[r]), by_id[rowids[r]]) for r in rows]
+
+        return cls(
+            size=size,
+            mtime_ns=np.frombuffer(mtimes, dtype=np.int64),
+            ext_code=np.frombuffer(ext_codes, dtype=np.int32),
+            dir_id=np.frombuffer(dir_ids, dtype=np.int32),
+            exts=ext_of.values,
+            dirs=dir_of.values,
+            top_files=top_files,
+        )
+
+    def dir_totals(self) -> tuple[Any, Any]:
+        """(files, bytes) per directory id (group-by directory)."""
+        np = _numpy()
+        counts = np.bincount(self.dir_id, minlength=len(self.dirs))
+        totals = np.zeros(len(self.dirs), dtype=np.int64)
+        np.add.at(totals, self.dir_id, self.size)
+        return counts, totals
+
+    def stats(
+        self, *, now_ns: int | None = None, largest_n: int = LARGEST_N, top_dirs: int = TOP_DIRS
+    ) -> ReportStats:
+        np = _numpy()
+        stats = ReportStats(largest_n=largest_n)
+        if now_ns is not None:
+            stats.now_ns = now_ns
+        n = len(self)
+        size = self.size
+        stats.files = n
+        stats.bytes = int(size.sum())
+        stats.empty = int(np.count_nonzero(size == 0))
+
+        ext_counts = np.bincount(self.ext_code, minlength=len(self.exts))
+        ext_bytes = np.zeros(len(self.exts), dtype=np.int64)
+        np.add.at(ext_bytes, self.ext_code, size)  # exact int64 sums (bincount weights are float)
+        names = [e or "<noext>" for e in self.exts]
+        stats.ext_count = Counter({e: int(c) for e, c in zip(names, ext_counts) if c})
+        stats.ext_bytes = Counter({e: int(b) for e, b in zip(names, ext_bytes) if b})
+
+        buckets = np.searchsorted(np.asarray(SIZE_EDGES), size, side="right")
+        stats.size_hist = np.bincount(buckets, minlength=len(stats.size_hist)).tolist()
+        age_days = (stats.now_ns - self.mtime_ns) // _NS_PER_DAY
+        buckets = np.searchsorted(np.asarray(AGE_EDGES_DAYS), age_days, side="right")
+        stats.age_hist = np.bincount(buckets, minlength=len(stats.age_hist)).tolist()
+
+        if n:
+            stats.add_largest(self.top_files(largest_n))
+            values = np.percentile(size, PERCENTILES, method="lower")
+            stats.size_percentiles = {f"p{q}": int(v) for q, v in zip(PERCENTILES, values)}
+            counts, totals = self.dir_totals()
+            top = np.argsort(-totals, kind="stable")[:top_dirs]
+            stats.top_dirs = [(self.dirs[d], int(counts[d]), int(totals[d])) for d in top]
+        return stats
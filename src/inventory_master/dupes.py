@@ -0,0 +1,204 @@
+"""Staged duplicate detection: size -> partial (head/tail) hash -> full SHA-256.
+
+Each stage only looks at files that still collide after the previous one, so on a
+typical share most files are eliminated by size alone and few are read in full.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from .hash_cache import HashCache
+from .hashing import HashMode, hash_records, make_pool, sha256_file
+from .meta_paths import ensure_meta_layout
+from .models import FileRecord
+from .providers.local_walk import LocalWalkProvider
+from .rules import DEFAULT_DST
+
+PARTIAL_BLOCK = 64 * 1024
+
+
+def partial_hash(path: Path, size: int, *, block: int = PARTIAL_BLOCK) -> str | None:
+    """SHA-256 over the first and last block; the full hash for files <= 2 blocks.
+
+    Returns None if the file cannot be read (vanished, locked).
+    """
+    try:
+        if size <= 2 * block:
+            return sha256_file(path)
+        h = hashlib.sha256()
+        with path.open("rb") as f:
+            h.update(f.read(block))
+            f.seek(-block, os.SEEK_END)
+            h.update(f.read(block))
+        return "partial:" + h.hexdigest()
+    except OSError:
+        return None
+
+
+@dataclass(frozen=True)
+class DuplicateGroup:
+    sha256: str
+    size_bytes: int
+    paths: tuple[Path, ...]  # paths[0] is the copy that is kept, then sorted
+
+    @property
+    def redundant(self) -> tuple[Path, ...]:
+        return self.paths[1:]
+
+    @property
+    def wasted_bytes(self) -> int:
+        return self.size_bytes * (len(self.paths) - 1)
+
+
+@dataclass
+class DupeStats:
+    files: int = 0
+    size_collisions: int = 0  # files sharing their size with another file
+    partial_hashed: int = 0
+    full_hashed: int = 0
+    bytes_read: int = 0
+    skipped: list[Path] = field(default_factory=list)  # unreadable during hashing
+
+
+def _parallel_map(
+    fn: Callable[[Path, int], str | None],
+    items: list[tuple[Path, int]],
+    jobs: int,
+    mode: HashMode,
+) -> Iterator[str | None]:
+    if jobs <= 1:
+        return (fn(p, s) for p, s in items)
+    paths, sizes = [p for p, _ in items], [s for _, s in items]
+    chunksize = max(1, len(items) // (jobs * 8)) if mode == "process" else 1
+    with make_pool(jobs, mode) as pool:
+        return iter(list(pool.map(fn, paths, sizes, chunksize=chunksize)))
+
+
+def find_duplicates(
+    records: Iterable[FileRecord],
+    *,
+    jobs: int = 1,
+    hash_mode: HashMode = "thread",
+    min_size: int = 1,
+    cache: HashCache | None = None,
+    keep_outside: Iterable[Path] = (),
+) -> tuple[list[DuplicateGroup], DupeStats]:
+    """Group identical files; returns (groups sorted by wasted bytes, stats).
+
+    Files smaller than min_size are ignored (by default, empty files). The first path in
+    sorted order is kept, preferring copies outside the keep_outside directories (where
+    redundant copies are moved), so an earlier quarantined copy is never the keeper.
+    """
+    avoid = tuple(keep_outside)
+
+    def keeper_order(path: Path) -> tuple[bool, Path]:
+        return any(path.is_relative_to(d) for d in avoid), path
+
+    stats = DupeStats()
+    by_size: dict[int, list[Path]] = defaultdict(list)
+    for rec in records:
+        stats.files += 1
+        if rec.size_bytes >= min_size:
+            by_size[rec.size_bytes].append(rec.path)
+
+    # Stage 2: partial hash of every file whose size collides.
+    items = [(p, size) for size, paths in by_size.items() if len(paths) > 1 for p in paths]
+    del by_size
+    stats.size_collisions = stats.partial_hashed = len(items)
+    by_partial: dict[tuple[int, str], list[Path]] = defaultdict(list)
+    for (path, size), digest in zip(items, _parallel_map(partial_hash, items, jobs, hash_mode)):
+        stats.bytes_read += min(size, 2 * PARTIAL_BLOCK)
+        if digest is None:
+            stats.skipped.append(path)
+        else:
+            by_partial[(size, digest)].append(path)
+
+    # Stage 3: full hash only where head/tail still collide (small files are done).
+    groups: dict[tuple[int, str], list[Path]] = {}
+    pending: list[FileRecord] = []
+    for (size, digest), paths in by_partial.items():
+        if len(paths) < 2:
+            continue
+        if not digest.startswith("partial:"):
+            groups[(size, digest)] = paths
+            continue
+        pending.extend(FileRecord(path=p, size_bytes=size, mtime_ns=0) for p in paths)
+    if pending:
+        stats.full_hashed = len(pending)
+        full: dict[tuple[int, str], list[Path]] = defaultdict(list)
+        hashed = hash_records(_readable(pending, stats), jobs=jobs, mode=hash_mode, cache=cache)
+        for rec in hashed:
+            stats.bytes_read += rec.size_bytes
+            full[(rec.size_bytes, rec.sha256 or "")].append(rec.path)
+        groups.update((k, v) for k, v in full.items() if len(v) > 1)
+
+    result = [
+        DuplicateGroup(sha256=sha, size_bytes=size, paths=tuple(sorted(paths, key=keeper_order)))
+        for (size, sha), paths in groups.items()
+    ]
+    result.sort(key=lambda g: (-g.wasted_bytes, g.paths[0]))
+    return result, stats
+
+
+def scan_duplicates(
+    root: Path, *, jobs: int = 1, hash_mode: HashMode = "thread", min_size: int = 1
+) -> tuple[list[DuplicateGroup], DupeStats]:
+    """find_duplicates over a local walk of root, with the root's hash cache.
+
+    Copies under the default quarantine directory are never kept over live ones.
+    """
+    with HashCache.for_root(root) as cache:
+        records = LocalWalkProvider(hash_files=False).iter_files(root)
+        return find_duplicates(
+            records,
+            jobs=jobs,
+            hash_mode=hash_mode,
+            min_size=min_size,
+            cache=cache,
+            keep_outside=[root.resolve() / DEFAULT_DST],
+        )
+
+
+def _readable(records: list[FileRecord], stats: DupeStats) -> Iterator[FileRecord]:
+    # Drop files that vanished since stage 2 rather than failing the whole run.
+    for rec in records:
+        if rec.path.is_file():
+            yield rec
+        else:
+            stats.skipped.append(rec.path)
+
+
+def write_dupes_report(root: Path, groups: list[DuplicateGroup], stats: DupeStats) -> Path:
+    """Write a Markdown duplicate report under _meta/reports/."""
+    meta = ensure_meta_layout(root)
+    report_id = datetime.now().strftime("%Y-%m-%d")
+    out_path = meta["reports"] / f"dupes_{report_id}.md"
+    lines = [
+        f"# Duplicates {report_id}",
+        "",
+        f"- files: {stats.files}",
+        f"- duplicate groups: {len(groups)}",
+        f"- redundant copies: {sum(len(g.redundant) for g in groups)}",
+        f"- wasted bytes: {sum(g.wasted_bytes for g in groups)}",
+        f"- hashed: {stats.partial_hashed} partial, {stats.full_hashed} full "
+        f"({stats.bytes_read} bytes read)",
+        "",
+        "## Groups",
+        "",
+        "| sha256 | size | copies | keep | redundant |",
+        "|---|---:|---:|---|---|",
+    ]
+    for g in groups:
+        redundant = "<br>".join(str(p) for p in g.redundant)
+        lines.append(
+            f"| {g.sha256[:12]} | {g.size_bytes} | {len(g.paths)} | {g.paths[0]} | {redundant} |"
+        )
+    out_path.write_text("\n".join(lines), encoding="utf-8")
+    return out_path
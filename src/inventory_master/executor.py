@@ -1,19 +1,41 @@
 from __future__ import annotations
 
+import errno
 import json
 import os
 import shutil
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 
-from .audit import append_audit
-from .hashing import sha256_file
+from .audit import AuditLog, AuditWriter
+from .hash_cache import HashCache
+from .journal import ApplyJournal, JournalState
 from .meta_paths import ensure_meta_layout
+from .snapshot import latest_snapshot
+from .verify import SnapshotHashes, capture, check, is_same_device, resolve_strategy
 
 
 class ApplyError(RuntimeError):
     pass
 
 
+class _Aborted(Exception):
+    """An in-flight action was rolled back because another worker failed."""
+
+
+@dataclass(frozen=True)
+class _ApplyContext:
+    plan_id: str
+    require_hash: bool
+    strategy: str
+    hash_cache: HashCache | None
+    snapshot: SnapshotHashes | None
+    journal: ApplyJournal | None = None
+
+
 def _atomic_rename(src: Path, dst: Path) -> None:
     dst.parent.mkdir(parents=True, exist_ok=True)
     # On Windows, os.replace will overwrite; we do NOT want overwrite by default.
@@ -22,11 +44,72 @@ def _atomic_rename(src: Path, dst: Path) -> None:
     os.rename(src, dst)
 
 
-def apply_plan(plan_path: Path, *, dry_run: bool) -> None:
+def _transfer(src: Path, dst: Path, *, on_copy: Callable[[], None] | None = None) -> bool:
+    """Rename src to dst; across filesystems, copy instead. Returns True if copied.
+
+    A copied source is left in place for the caller to remove after verification; the
+    copy and its directory entry are fsynced first, and a failed copy is removed.
+    """
+    try:
+        _atomic_rename(src, dst)
+        return False
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    if on_copy is not None:
+        on_copy()
+    with src.open("rb") as fsrc, dst.open("xb") as fdst:  # "x": never clobber dst
+        try:
+            shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+            fdst.flush()
+            shutil.copystat(src, dst)
+            os.fsync(fdst.fileno())
+        except BaseException:
+            fdst.close()
+            dst.unlink(missing_ok=True)  # no partial copy left behind
+            raise
+    _fsync_dir(dst.parent)
+    return True
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # e.g. Windows: directories cannot be opened for fsync
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def apply_plan(
+    plan_path: Path,
+    *,
+    dry_run: bool,
+    snapshot_path: Path | None = None,
+    jobs: int = 1,
+    resume: bool = False,
+) -> None:
+    """Apply an approved, dry-run plan.
+
+    policy.verify_strategy selects how each move is verified (see verify.py); the
+    strategy used is recorded on every action_committed audit event. For "snapshot",
+    snapshot_path (or plan["snapshot"], or the latest snapshot) supplies the hashes.
+
+    With jobs > 1, conflict-free action groups run on a thread pool (see _partition);
+    the first failure stops dispatch and in-flight actions are rolled back.
+
+    Every real apply keeps a write-ahead journal under _meta/journal/. After a crash,
+    resume=True skips actions the journal proves committed, finishes or reverts the
+    interrupted ones, and continues with the rest.
+    """
     plan = json.loads(plan_path.read_text(encoding="utf-8"))
     root = Path(plan["root"])
     meta = ensure_meta_layout(root)
-    audit_path = meta["audit"] / "audit.jsonl"
+    audit = AuditLog(meta["audit"] / "audit.jsonl")
 
     plan_id = plan["plan_id"]
     approval_token = meta["approvals"] / f"APPROVED__{plan_id}.token"
@@ -40,65 +123,259 @@ def apply_plan(plan_path: Path, *, dry_run: bool) -> None:
 
     # Dry-run is mandatory before real apply. Record it.
     if dry_run:
-        append_audit(audit_path, {"event": "dry_run", "plan_id": plan_id, "actions": len(actions)})
+        audit.append({"event": "dry_run", "plan_id": plan_id, "actions": len(actions)})
         for a in actions:
             print(f"[DRY] {a['type']}: {a['src']} -> {a['dst']}")
         return
 
-    # Require that dry-run happened previously (simple check in audit log).
+    # Require that dry-run happened previously (per-plan audit index lookup).
     if policy.get("require_dry_run", True):
-        if audit_path.exists():
-            dry_ok = any(
-                (line.strip() and json.loads(line).get("event") == "dry_run" and json.loads(line).get("plan_id") == plan_id)
-                for line in audit_path.read_text(encoding="utf-8").splitlines()
-            )
-        else:
-            dry_ok = False
-        if not dry_ok:
+        if not audit.has_event(plan_id, "dry_run"):
             raise ApplyError("Dry-run required before apply (no matching audit event).")
 
     require_hash = bool(policy.get("require_hash_verify", True))
+    strategy = str(policy.get("verify_strategy", "auto"))
+    snapshot = None
+    if strategy == "snapshot":
+        snap_path = snapshot_path or (Path(plan["snapshot"]) if plan.get("snapshot") else None)
+        snap_path = snap_path or latest_snapshot(root)
+        if snap_path is None:
+            raise ApplyError("verify_strategy 'snapshot' needs a snapshot (none found).")
+        snapshot = SnapshotHashes(snap_path, root)
 
-    append_audit(audit_path, {"event": "apply_start", "plan_id": plan_id, "actions": len(actions)})
+    journal = ApplyJournal.for_plan(meta["journal"], plan_id)
+    state = journal.replay()
+    if state.finished:
+        if resume:
+            return
+        raise ApplyError(f"Plan already applied (journal: {journal.path})")
+    if not state.empty and not resume:
+        raise ApplyError(f"Interrupted apply found; rerun with --resume (journal: {journal.path})")
 
-    for a in actions:
-        src = Path(a["src"])
-        dst = Path(a["dst"])
-        if not src.exists():
-            raise ApplyError(f"Source missing: {src}")
+    ctx = _ApplyContext(
+        plan_id=plan_id,
+        require_hash=require_hash,
+        strategy=strategy,
+        hash_cache=HashCache.for_root(root) if require_hash else None,
+        snapshot=snapshot,
+        journal=journal,
+    )
+    try:
+        # One writer for the whole apply: action_committed events are group-committed
+        # (the journal already makes each action recoverable); phases are fsynced.
+        with AuditWriter(audit) as writer:
+            if resume and not state.empty:
+                done = _recover(actions, state, ctx, audit, writer)
+                writer.barrier({"event": "apply_resume", "plan_id": plan_id, "skipped": len(done)})
+                actions = [a for a in actions if a["id"] not in done]
+            else:
+                writer.barrier(
+                    {"event": "apply_start", "plan_id": plan_id, "actions": len(actions)}
+                )
+            if jobs > 1:
+                _apply_parallel(actions, ctx, writer, jobs)
+            else:
+                for a in actions:
+                    _audit_committed(writer, ctx, _apply_action(a, ctx))
+            writer.barrier({"event": "apply_done", "plan_id": plan_id})
+        journal.finish()
+    finally:
+        if ctx.hash_cache is not None:
+            ctx.hash_cache.save()
 
-        pre_size = src.stat().st_size
-        pre_hash = sha256_file(src) if require_hash else None
 
-        if a["type"] in {"move", "rename", "quarantine"}:
-            # Quarantine is just a move to 99_QUARANTINE.
-            _atomic_rename(src, dst)
-        else:
-            raise ApplyError(f"Unsupported action type: {a['type']}")
+def _partition(actions: list[dict]) -> list[list[dict]]:
+    """Split actions into groups that share no src/dst path, keeping plan order.
+
+    Actions touching the same path (same dst, or one action's dst is another's src)
+    land in one group and run sequentially; distinct groups are independent. Exact
+    paths are used rather than directories: quarantine plans send every file to the
+    same directory, which would otherwise serialize the whole plan.
+    """
+    parent = list(range(len(actions)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    owner: dict[str, int] = {}
+    for i, a in enumerate(actions):
+        for key in (a["src"], a["dst"]):
+            j = owner.setdefault(os.path.normcase(os.path.abspath(key)), i)
+            parent[find(i)] = find(j)
 
-        post_size = dst.stat().st_size
-        post_hash = sha256_file(dst) if require_hash else None
+    groups: dict[int, list[dict]] = {}
+    for i, a in enumerate(actions):
+        groups.setdefault(find(i), []).append(a)
+    return list(groups.values())
 
-        if pre_size != post_size or (require_hash and pre_hash != post_hash):
-            # Roll back best-effort
+
+def _apply_parallel(
+    actions: list[dict], ctx: _ApplyContext, writer: AuditWriter, jobs: int
+) -> None:
+    abort = threading.Event()
+
+    def run_group(group: list[dict]) -> None:
+        for a in group:
+            if abort.is_set():
+                return
             try:
-                _atomic_rename(dst, src)
-            except Exception:
-                pass
+                _audit_committed(writer, ctx, _apply_action(a, ctx, abort))
+            except BaseException:
+                abort.set()
+                raise
+
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="apply") as pool:
+        futures = [pool.submit(run_group, g) for g in _partition(actions)]
+    errors = [f.exception() for f in futures if f.exception() is not None]
+    failures = [e for e in errors if not isinstance(e, _Aborted)]
+    if failures:
+        raise failures[0]
+
+
+def _audit_committed(writer: AuditWriter, ctx: _ApplyContext, event: dict) -> None:
+    # With a journal, resume re-emits an action_committed event lost from the buffer
+    # (from its "done" record, or by re-checking the intent), so batching is safe.
+    if ctx.journal is not None:
+        writer.write(event)
+    else:
+        writer.commit(event)
+
+
+def _rollback(src: Path, dst: Path, copied: bool) -> None:
+    # Roll back best-effort
+    try:
+        if copied:
+            dst.unlink()
+        else:
+            _atomic_rename(dst, src)
+    except Exception:
+        pass
+
+
+def _apply_action(a: dict, ctx: _ApplyContext, abort: threading.Event | None = None) -> dict:
+    """Move one file and verify it; returns the action_committed audit event."""
+    src = Path(a["src"])
+    dst = Path(a["dst"])
+    if a["type"] not in {"move", "rename", "quarantine"}:
+        raise ApplyError(f"Unsupported action type: {a['type']}")
+    try:
+        src_st = src.stat()
+    except FileNotFoundError:
+        raise ApplyError(f"Source missing: {src}") from None
+
+    # The device check is only a hint for what to capture up front; the strategy is
+    # settled by what _transfer actually did (EXDEV can happen on one st_dev too).
+    strategy = resolve_strategy(
+        ctx.strategy, require_hash=ctx.require_hash, same_device=is_same_device(src_st, dst)
+    )
+    # Pre-hash may come from the snapshot or the cache (identity-checked); a post-hash,
+    # when the strategy needs one, is always read fresh.
+    pre = capture(src, strategy, st=src_st, hash_cache=ctx.hash_cache, snapshot=ctx.snapshot)
+
+    journal = ctx.journal
+    if journal is not None:
+        journal.intent(a, src_st)  # durable before the file is touched
+    # Quarantine is just a move to 99_QUARANTINE.
+    on_copy = (lambda: journal.copying(a["id"])) if journal is not None else None
+    try:
+        copied = _transfer(src, dst, on_copy=on_copy)
+    except Exception:
+        if journal is not None and not dst.exists():
+            journal.reverted(a["id"])  # nothing was moved
+        raise
+    strategy = resolve_strategy(ctx.strategy, require_hash=ctx.require_hash, same_device=not copied)
+    if strategy in ("hash", "snapshot") and pre.sha256 is None:
+        # Copied after all: src is still in place, so hash it now.
+        pre = capture(src, strategy, st=src_st, hash_cache=ctx.hash_cache, snapshot=ctx.snapshot)
+    ok, post_st, post_hash = check(pre, dst, strategy)
+    if not ok or (abort is not None and abort.is_set()):
+        _rollback(src, dst, copied)
+        if journal is not None:
+            journal.reverted(a["id"])
+        if not ok:
             raise ApplyError(f"Verification failed for action {a['id']}")
+        raise _Aborted(a["id"])
+    if copied:
+        src.unlink()  # cross-device move: source removed only after the copy verified
+        _fsync_dir(src.parent)
+    if ctx.hash_cache is not None and post_hash is not None:
+        ctx.hash_cache.store(dst, post_st, post_hash)
+
+    event = {
+        "event": "action_committed",
+        "plan_id": ctx.plan_id,
+        "action_id": a["id"],
+        "type": a["type"],
+        "src": str(src),
+        "dst": str(dst),
+        "pre_size": pre.st.st_size,
+        "post_size": post_st.st_size,
+        "verify": strategy,
+        "cross_device": copied,
+    }
+    if journal is not None:
+        journal.done(a["id"], event)
+    return event
 
-        append_audit(
-            audit_path,
-            {
+
+def _recover(
+    actions: list[dict],
+    state: JournalState,
+    ctx: _ApplyContext,
+    audit: AuditLog,
+    writer: AuditWriter,
+) -> set[str]:
+    """Settle a crashed apply from its journal; returns the ids that are now done.
+
+    Journal-committed actions are trusted without re-verification (their audit events
+    are re-emitted if the buffered audit write was lost). An interrupted action is
+    finished when the file is at dst with the recorded identity/size, reverted when it
+    is still at src, and otherwise reported as an error for a human to inspect.
+    """
+    audited = {e["action_id"] for e in audit.iter_plan_events(ctx.plan_id, "action_committed")}
+    done: set[str] = set()
+    for action_id, event in state.committed.items():
+        done.add(action_id)
+        if action_id not in audited:
+            writer.write({**event, "recovered": True})
+
+    by_id = {a["id"]: a for a in actions}
+    for action_id, intent in state.inflight.items():
+        src, dst = Path(intent["src"]), Path(intent["dst"])
+        dev, ino, size, mtime_ns = intent["identity"]
+        copying = action_id in state.copying
+        if src.exists() and dst.exists():
+            if not copying:
+                raise ApplyError(f"Cannot resume {action_id}: both {src} and {dst} exist")
+            dst.unlink()  # partial or unverified cross-device copy; redo it
+        elif not src.exists() and dst.exists():
+            st = dst.stat()
+            same = (st.st_dev, st.st_ino) == (dev, ino) or copying
+            if not same or st.st_size != size or (not copying and st.st_mtime_ns != mtime_ns):
+                raise ApplyError(f"Cannot resume {action_id}: {dst} does not match the journal")
+            event = {
                 "event": "action_committed",
-                "plan_id": plan_id,
-                "action_id": a["id"],
-                "type": a["type"],
+                "plan_id": ctx.plan_id,
+                "action_id": action_id,
+                "type": by_id.get(action_id, {}).get("type", "move"),
                 "src": str(src),
                 "dst": str(dst),
-                "pre_size": pre_size,
-                "post_size": post_size,
-            },
-        )
-
-    append_audit(audit_path, {"event": "apply_done", "plan_id": plan_id})
+                "pre_size": size,
+                "post_size": st.st_size,
+                "verify": "journal",
+                "cross_device": copying,
+                "recovered": True,
+            }
+            if ctx.journal is not None:
+                ctx.journal.done(action_id, event)
+            writer.write(event)
+            done.add(action_id)
+            continue
+        elif not src.exists():
+            raise ApplyError(f"Cannot resume {action_id}: neither {src} nor {dst} exists")
+        if ctx.journal is not None:
+            ctx.journal.reverted(action_id)
+    return done
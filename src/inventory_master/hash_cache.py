@@ -0,0 +1,124 @@
+"""Persistent SHA-256 cache keyed by file identity (device, inode, size, mtime_ns, path)."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from .hashing import sha256_file
+from .meta_paths import meta_root
+
+CACHE_FILENAME = "hash_cache.jsonl"
+DEFAULT_MAX_ENTRIES = 500_000
+
+# Files modified this recently may still change within the same mtime tick, so their
+# hashes are not cached (same "racily clean" guard git uses for its index).
+RACY_WINDOW_NS = 2_000_000_000
+
+_Identity = tuple[int, int, int, int]  # st_dev, st_ino, st_size, st_mtime_ns
+
+
+def _identity(st: os.stat_result) -> _Identity:
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class HashCache:
+    """LRU-bounded hash cache persisted as JSONL under _meta/inventory/.
+
+    An entry is only reused when the file's current identity matches the one recorded
+    when it was hashed; a mismatch drops the stale entry. Thread-safe.
+    """
+
+    def __init__(self, path: Path, *, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self._path = path
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[_Identity, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @classmethod
+    def for_root(cls, root: Path, *, max_entries: int = DEFAULT_MAX_ENTRIES) -> HashCache:
+        return cls(meta_root(root) / "inventory" / CACHE_FILENAME, max_entries=max_entries)
+
+    def __enter__(self) -> HashCache:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.save()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load(self) -> None:
+        if not self._path.exists():
+            return
+        with self._path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    key, dev, ino, size, mtime_ns, sha = json.loads(line)
+                except (ValueError, TypeError):
+                    continue  # tolerate a torn/corrupt line; the entry is just rehashed
+                self._entries[key] = ((dev, ino, size, mtime_ns), sha)
+                self._entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._dirty = True
+
+    def lookup(self, path: Path, st: os.stat_result) -> str | None:
+        key = str(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] != _identity(st):
+                del self._entries[key]
+                self._dirty = True
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def store(self, path: Path, st: os.stat_result, sha: str) -> None:
+        """Record sha for path; st must be the stat taken *before* the file was read."""
+        if time.time_ns() - st.st_mtime_ns < RACY_WINDOW_NS:
+            return
+        key = str(path)
+        with self._lock:
+            self._entries[key] = (_identity(st), sha)
+            self._entries.move_to_end(key)
+            self._dirty = True
+            self._evict()
+
+    def sha256(self, path: Path) -> str:
+        """Return the cached hash for path, or hash it and remember the result."""
+        st = path.stat()
+        sha = self.lookup(path, st)
+        if sha is None:
+            sha = sha256_file(path)
+            self.store(path, st, sha)
+        return sha
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._path.with_name(self._path.name + ".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                for key, ((dev, ino, size, mtime_ns), sha) in self._entries.items():
+                    f.write(json.dumps([key, dev, ino, size, mtime_ns, sha]))
+                    f.write("\n")
+            tmp.replace(self._path)
+            self._dirty = False
@@ -1,7 +1,20 @@
 from __future__ import annotations
 
 import hashlib
+import os
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace
 from pathlib import Path
+from typing import TYPE_CHECKING, Literal
+
+from .models import FileRecord
+
+if TYPE_CHECKING:
+    from .hash_cache import HashCache
+
+HashMode = Literal["thread", "process"]
 
 
 def sha256_file(path: Path, *, chunk_size: int = 1024 * 1024) -> str:
@@ -14,3 +27,72 @@ def sha256_file(path: Path, *, chunk_size: int = 1024 * 1024) -> str:
                 break
             h.update(b)
     return h.hexdigest()
+
+
+def make_pool(jobs: int, mode: HashMode) -> Executor:
+    """Executor with jobs workers for hashing: threads, or processes (mode="process")."""
+    if mode == "process":
+        return ProcessPoolExecutor(max_workers=jobs)
+    if mode == "thread":
+        return ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="sha256")
+    raise ValueError(f"Unknown hash mode: {mode!r}")
+
+
+def hash_records(
+    records: Iterable[FileRecord],
+    *,
+    jobs: int = 1,
+    mode: HashMode = "thread",
+    queue_size: int | None = None,
+    cache: HashCache | None = None,
+) -> Iterator[FileRecord]:
+    """Yield records with sha256 filled in, in the same order as the input.
+
+    With jobs > 1, hashing runs on a worker pool while the caller keeps pulling
+    records from the (possibly still traversing) input iterator. At most queue_size
+    records are in flight at once (default: 4 per worker), which bounds memory and
+    keeps output order deterministic.
+
+    If a cache is given, files whose identity is unchanged are not read at all. Cache
+    lookups and stores happen on the calling thread, so process pools work too.
+    Records that already carry a sha256 are passed through untouched.
+    """
+    if jobs <= 1:
+        for rec in records:
+            yield rec if rec.sha256 else replace(rec, sha256=_cached_sha256(rec.path, cache))
+        return
+
+    window = queue_size or jobs * 4
+    pending: deque[tuple[FileRecord, os.stat_result | None, Future[str]]] = deque()
+
+    def _finish() -> FileRecord:
+        done, st, fut = pending.popleft()
+        sha = fut.result()
+        if cache is not None and st is not None:
+            cache.store(done.path, st, sha)
+        return replace(done, sha256=sha)
+
+    with make_pool(jobs, mode) as pool:
+        try:
+            for rec in records:
+                st = rec.path.stat() if cache is not None and not rec.sha256 else None
+                sha = rec.sha256 or (cache.lookup(rec.path, st) if st is not None else None)
+                if sha is not None:
+                    hit: Future[str] = Future()
+                    hit.set_result(sha)
+                    pending.append((rec, None, hit))
+                else:
+                    pending.append((rec, st, pool.submit(sha256_file, rec.path)))
+                while len(pending) >= window:
+                    yield _finish()
+            while pending:
+                yield _finish()
+        finally:
+            for _, _, fut in pending:
+                fut.cancel()
+
+
+def _cached_sha256(path: Path, cache: HashCache | None) -> str:
+    if cache is None:
+        return sha256_file(path)
+    return cache.sha256(path)
@@ -0,0 +1,259 @@
+"""Persistent SQLite inventory index under _meta/inventory/."""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from .hash_cache import RACY_WINDOW_NS
+from .meta_paths import meta_root
+from .models import FileRecord
+from .providers.base import InventoryProvider
+
+INDEX_FILENAME = "index.sqlite3"
+DEFAULT_BATCH_SIZE = 50_000
+DEFAULT_MAX_AGE_SEC = 30 * 60
+WATCH_HEARTBEAT_SEC = 5.0  # a running watcher marks the index live this often
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path     TEXT PRIMARY KEY,
+    parent   TEXT NOT NULL,
+    ext      TEXT NOT NULL,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    gen      INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_parent ON files(parent);
+CREATE INDEX IF NOT EXISTS files_ext ON files(ext);
+CREATE INDEX IF NOT EXISTS files_size ON files(size);
+CREATE INDEX IF NOT EXISTS files_mtime ON files(mtime_ns);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+_UPSERT = """
+INSERT INTO files(path, parent, ext, size, mtime_ns, gen) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(path) DO UPDATE SET
+    size = excluded.size, mtime_ns = excluded.mtime_ns, gen = excluded.gen
+"""
+
+
+def _ext(name: str) -> str:
+    # Same rule as Path.suffix (".bashrc" has no suffix), lower-cased.
+    i = name.rfind(".")
+    return name[i:].lower() if 0 < i < len(name) - 1 else ""
+
+
+def _row(rec: FileRecord, gen: int) -> tuple[str, str, str, int, int, int]:
+    path = str(rec.path)
+    parent, name = os.path.split(path)
+    return (path, parent, _ext(name), rec.size_bytes, rec.mtime_ns, gen)
+
+
+class InventoryIndex:
+    """SQLite index of path, parent directory, extension, size and mtime.
+
+    Populated from any provider with batched upserts (one transaction per batch);
+    a full refresh deletes rows not seen in the latest scan generation.
+    """
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.RLock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @classmethod
+    def for_root(cls, root: Path) -> InventoryIndex:
+        return cls(meta_root(root) / "inventory" / INDEX_FILENAME)
+
+    def __enter__(self) -> InventoryIndex:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def get_meta(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute(
+            "INSERT INTO meta(key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    def is_populated(self) -> bool:
+        return self.get_meta("refreshed_at") is not None
+
+    def is_current(self, root: Path, *, max_age_sec: float = DEFAULT_MAX_AGE_SEC) -> bool:
+        """Whether the index can answer for root without a refresh.
+
+        True while a watcher keeps it live; otherwise the last refresh must be of root,
+        younger than max_age_sec, and no indexed directory (nor root) may have changed
+        since that scan started, or shortly before it (RACY_WINDOW_NS: the filesystem
+        clock is coarser than time.time_ns()). Files added to an unindexed (empty) directory go
+        unnoticed until max_age_sec passes.
+        """
+        root = root.resolve()
+        if not self.is_populated() or self.get_meta("root") != str(root):
+            return False
+        now = time.time()
+        if now - float(self.get_meta("watched_at") or 0) < 3 * WATCH_HEARTBEAT_SEC:
+            return True
+        if not 0 <= now - float(self.get_meta("refreshed_at") or 0) <= max_age_sec:
+            return False
+        racy_ns = int(self.get_meta("scan_started_ns") or 0) - RACY_WINDOW_NS
+        with self._lock:
+            dirs = [r[0] for r in self._conn.execute("SELECT DISTINCT parent FROM files")]
+        for d in [str(root), *dirs]:
+            try:
+                if os.stat(d).st_mtime_ns >= racy_ns:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def mark_watched(self, live: bool = True) -> None:
+        """Heartbeat from a running watcher (live=False when it stops)."""
+        with self._lock:
+            if live:
+                self._set_meta("watched_at", str(time.time()))
+            else:
+                self._conn.execute("DELETE FROM meta WHERE key = 'watched_at'")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def refresh(
+        self,
+        provider: InventoryProvider,
+        root: Path,
+        *,
+        backend: str = "local",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> int:
+        """Rescan root through provider; returns the number of records indexed.
+
+        Rows not seen in this scan are deleted only after the scan completes, so a
+        failed scan leaves the previous contents intact.
+        """
+        with self._lock:
+            started_ns = time.time_ns()
+            gen = int(self.get_meta("generation") or 0) + 1
+            count = 0
+            for batch in provider.iter_batches(root, batch_size=batch_size):
+                count += self._write(batch, gen)
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM files WHERE gen < ?", (gen,))
+            self._set_meta("generation", str(gen))
+            self._set_meta("root", str(root.resolve()))
+            self._set_meta("backend", backend)
+            self._set_meta("refreshed_at", str(time.time()))
+            self._set_meta("scan_started_ns", str(started_ns))
+            self._conn.execute("COMMIT")
+        return count
+
+    def _write(self, records: Iterable[FileRecord], gen: int) -> int:
+        rows = [_row(r, gen) for r in records]
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(_UPSERT, rows)
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        return len(rows)
+
+    def upsert(self, records: Iterable[FileRecord]) -> int:
+        """Insert or update records (incremental rescans); keeps the current generation."""
+        with self._lock:
+            return self._write(records, int(self.get_meta("generation") or 0))
+
+    def delete(self, paths: Iterable[Path]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("DELETE FROM files WHERE path = ?", ((str(p),) for p in paths))
+            self._conn.execute("COMMIT")
+
+    def delete_tree(self, directory: Path) -> None:
+        """Delete every record under directory (e.g. after the directory was removed)."""
+        prefix = str(directory).rstrip(os.sep) + os.sep
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+            )
+
+    def iter_records(
+        self,
+        *,
+        extensions: Iterable[str] | None = None,
+        parent: Path | None = None,
+    ) -> Iterator[FileRecord]:
+        """Yield records, optionally filtered by extension set and/or parent directory."""
+        where: list[str] = []
+        args: list[object] = []
+        if extensions is not None:
+            exts = sorted({e.lower() for e in extensions})
+            where.append(f"ext IN ({','.join('?' * len(exts))})")
+            args.extend(exts)
+        if parent is not None:
+            where.append("parent = ?")
+            args.append(str(parent))
+        sql = "SELECT path, size, mtime_ns FROM files"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY path"
+        with self._lock:
+            cur = self._conn.execute(sql, args)
+            while rows := cur.fetchmany(DEFAULT_BATCH_SIZE):
+                for path, size, mtime_ns in rows:
+                    yield FileRecord(path=Path(path), size_bytes=size, mtime_ns=mtime_ns)
+
+    def iter_rows(
+        self, *, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Iterator[list[tuple[int, str, str, int, int]]]:
+        """Yield raw (rowid, parent, ext, size, mtime_ns) rows in batches, for bulk analytics."""
+        with self._lock:
+            cur = self._conn.execute("SELECT rowid, parent, ext, size, mtime_ns FROM files")
+            while rows := cur.fetchmany(batch_size):
+                yield rows
+
+    def paths_for_rowids(self, rowids: Iterable[int]) -> dict[int, str]:
+        ids = list(rowids)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT rowid, path FROM files WHERE rowid IN ({','.join('?' * len(ids))})", ids
+            ).fetchall()
+        return dict(rows)
+
+    def extension_counts(self) -> tuple[int, Counter[str]]:
+        """Return (file count, Counter of extension -> count) with one GROUP BY."""
+        with self._lock:
+            rows = self._conn.execute("SELECT ext, COUNT(*) FROM files GROUP BY ext").fetchall()
+        ext: Counter[str] = Counter({(e or "<noext>"): c for e, c in rows})
+        return sum(ext.values()), ext
+
+
+class IndexProvider(InventoryProvider):
+    """Serve records from an InventoryIndex through the provider interface."""
+
+    def __init__(self, index: InventoryIndex) -> None:
+        self._index = index
+
+    def iter_files(self, root: Path) -> Iterator[FileRecord]:
+        return self._index.iter_records()
@@ -0,0 +1,107 @@
+"""Write-ahead apply journal (one per plan) used for crash-resume."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from .meta_paths import safe_plan_id
+
+
+@dataclass
+class JournalState:
+    """Replayed journal: what is proven done, what was interrupted."""
+
+    committed: dict[str, dict[str, Any]] = field(default_factory=dict)  # id -> audit event
+    inflight: dict[str, dict[str, Any]] = field(default_factory=dict)  # id -> intent record
+    copying: set[str] = field(default_factory=set)
+    finished: bool = False
+
+    @property
+    def empty(self) -> bool:
+        return not (self.committed or self.inflight or self.finished)
+
+
+class ApplyJournal:
+    """Append-only JSONL journal under _meta/journal/<plan_id>.jsonl.
+
+    ``intent`` is fsynced before a file is touched, so after a crash every action
+    whose rename may have happened has a durable record. ``done`` carries the
+    action_committed audit event so it can be re-emitted if the audit buffer was lost.
+    Thread-safe.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_plan(cls, journal_dir: Path, plan_id: str) -> ApplyJournal:
+        return cls(journal_dir / f"{safe_plan_id(plan_id)}.jsonl")
+
+    def _append(self, record: dict[str, Any], *, fsync: bool) -> None:
+        record.setdefault("ts", datetime.now(timezone.utc).isoformat())
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def intent(self, action: dict[str, Any], st: os.stat_result) -> None:
+        self._append(
+            {
+                "op": "intent",
+                "action_id": action["id"],
+                "src": action["src"],
+                "dst": action["dst"],
+                "identity": [st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns],
+            },
+            fsync=True,
+        )
+
+    def copying(self, action_id: str) -> None:
+        self._append({"op": "copy", "action_id": action_id}, fsync=True)
+
+    def done(self, action_id: str, event: dict[str, Any]) -> None:
+        # Not fsynced: a lost "done" leaves an intent that resume re-checks cheaply.
+        self._append({"op": "done", "action_id": action_id, "event": event}, fsync=False)
+
+    def reverted(self, action_id: str) -> None:
+        self._append({"op": "reverted", "action_id": action_id}, fsync=True)
+
+    def finish(self) -> None:
+        self._append({"op": "finished"}, fsync=True)
+
+    def replay(self) -> JournalState:
+        state = JournalState()
+        if not self.path.exists():
+            return state
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn final line after a crash
+                op, action_id = rec.get("op"), rec.get("action_id")
+                if op == "intent":
+                    state.inflight[action_id] = rec
+                    state.copying.discard(action_id)
+                elif op == "copy":
+                    state.copying.add(action_id)
+                elif op == "done":
+                    state.inflight.pop(action_id, None)
+                    state.committed[action_id] = rec["event"]
+                elif op == "reverted":
+                    state.inflight.pop(action_id, None)
+                    state.copying.discard(action_id)
+                elif op == "finished":
+                    state.finished = True
+        return state
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import re
 from pathlib import Path
 
 
@@ -16,7 +17,13 @@ def ensure_meta_layout(root: Path) -> dict[str, Path]:
         "audit": m / "audit",
         "snapshots": m / "snapshots",
         "approvals": m / "approvals",
+        "journal": m / "journal",
     }
     for p in paths.values():
         p.mkdir(parents=True, exist_ok=True)
     return paths
+
+
+def safe_plan_id(plan_id: str) -> str:
+    """plan_id made safe for use as a file name."""
+    return re.sub(r"[^A-Za-z0-9._+-]", "_", plan_id)
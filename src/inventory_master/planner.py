@@ -1,44 +1,152 @@
 from __future__ import annotations
 
 import json
+import os
+from collections.abc import Iterable, Iterator
 from dataclasses import asdict
 from datetime import datetime
 from pathlib import Path
 
+from .dupes import DuplicateGroup, find_duplicates
+from .inventory_index import InventoryIndex
 from .meta_paths import ensure_meta_layout
-from .models import PlanAction
+from .models import FileRecord, PlanAction
+from .providers.discovery import demote
+from .providers.index_trust import DriftReport, TrustOptions
+from .providers.local_walk import LocalWalkProvider
+from .reporting import get_report_provider, rebuild_index
+from .rules import DEFAULT_RULES, Rule, RuleSet
 
 
-def generate_plan(root: Path) -> Path:
+def _candidates(
+    root: Path,
+    use_index: bool,
+    rules: RuleSet,
+    trust: TrustOptions | None,
+    drift: list[DriftReport],
+) -> Iterator[FileRecord]:
+    query = rules.query()
+    if not use_index:
+        # Rule filters are pushed down to the provider (Everything search syntax, or an
+        # in-process filter over a local walk of the common path prefix).
+        provider, backend = get_report_provider(root, trust)
+        try:
+            yield from provider.iter_query(root, query)
+            if provider.drift is not None:
+                drift.append(provider.drift)
+        except (RuntimeError, OSError):
+            if backend == "local":
+                raise
+            demote(root, backend)
+            raise _BackendFailed from None
+        return
+    with InventoryIndex.for_root(root) as index:
+        if not index.is_current(root):
+            rebuild_index(index, root, trust)  # same backend choice as report --use-index
+        yield from query.filter(index.iter_records(extensions=query.extensions), root)
+
+
+class _BackendFailed(Exception):
+    """An Everything backend failed mid-stream; the plan is rebuilt from a local walk."""
+
+
+def _matches(
+    records: Iterable[FileRecord],
+    rules: RuleSet,
+    prefix: str,
+    *,
+    jobs: int,
+    duplicates: Iterable[DuplicateGroup] | None,
+) -> list[tuple[FileRecord, Rule]]:
+    redundant: set[Path] = set()
+    if rules.needs_duplicates:
+        if duplicates is None:
+            records = list(records)  # duplicate detection needs the whole candidate set
+            dsts = {Path(prefix) / r.dst for r in rules.rules if r.duplicate}
+            duplicates, _ = find_duplicates(records, jobs=jobs, keep_outside=dsts)
+        redundant = {p for g in duplicates for p in g.redundant}
+    out = []
+    for rec in records:
+        rule = rules.match(rec, _relative(rec.path, prefix), duplicate=rec.path in redundant)
+        if rule is not None:
+            out.append((rec, rule))
+    return out
+
+
+def _unique_dst(dst: Path, taken: set[Path]) -> Path:
+    """dst, or "name~N.ext" if another action or an existing file already uses it."""
+    candidate, n = dst, 1
+    while candidate in taken or candidate.exists():
+        n += 1
+        candidate = dst.with_name(f"{dst.stem}~{n}{dst.suffix}")
+    taken.add(candidate)
+    return candidate
+
+
+def _relative(path: Path, prefix: str) -> str:
+    s = str(path)
+    rel = s[len(prefix) :] if s.startswith(prefix) else os.path.relpath(s, prefix)
+    return rel.replace(os.sep, "/") if os.sep != "/" else rel
+
+
+def generate_plan(
+    root: Path,
+    *,
+    use_index: bool = False,
+    rules: RuleSet | None = None,
+    jobs: int = 1,
+    duplicates: Iterable[DuplicateGroup] | None = None,
+    records: Iterable[FileRecord] | None = None,
+    trust: TrustOptions | None = None,
+) -> Path:
     """Generate a conservative plan.
 
-    Current default rule:
+    Default rule (rules.DEFAULT_RULES):
     - Move *.tmp / *.bak into 99_QUARANTINE/
-    (This is only a demo rule; expand with explicit user-approved rules.)
+    Other rules (see rules.py) are evaluated together in one pass over the inventory;
+    the first matching rule decides a file's action.
+
+    Candidates come from the preferred provider (Everything when available, configured
+    by trust) with the rules' common filters pushed down. With use_index, they come from
+    an indexed query against the SQLite inventory index (refreshed unless current)
+    instead, and with records from an inventory already in memory (the serve command).
+    Drift found by trust's sampled verification is recorded in the plan under "drift".
+
+    ``duplicate`` rules need duplicate groups: pass them (e.g. from the dupes command)
+    or they are computed over the candidates with jobs hashing workers.
     """
+    rules = rules or RuleSet(DEFAULT_RULES)
     meta = ensure_meta_layout(root)
     plan_id = datetime.now().astimezone().isoformat(timespec="seconds").replace(":", "-")
     actions: list[dict] = []
 
-    quarantine = root / "99_QUARANTINE"
-    quarantine.mkdir(parents=True, exist_ok=True)
-
-    counter = 0
-    for p in root.rglob("*"):
-        if p.is_dir():
-            continue
-        if "_meta" in p.parts:
-            continue
-        if p.suffix.lower() in {".tmp", ".bak"}:
-            counter += 1
-            actions.append(
-                {
-                    "id": f"A-{counter:03d}",
-                    "type": "quarantine",
-                    "src": str(p),
-                    "dst": str(quarantine / p.name),
-                }
-            )
+    prefix = str(root.resolve()).rstrip(os.sep) + os.sep
+    drift: list[DriftReport] = []  # set by a trust-index backend's sampled verification
+    try:
+        if records is not None:
+            candidates = rules.query().filter(records, root)
+        else:
+            candidates = _candidates(root, use_index, rules, trust, drift)
+        matched = _matches(candidates, rules, prefix, jobs=jobs, duplicates=duplicates)
+    except _BackendFailed:
+        local = LocalWalkProvider(hash_files=False).iter_query(root, rules.query())
+        matched = _matches(local, rules, prefix, jobs=jobs, duplicates=duplicates)
+
+    if matched:
+        # Only now: creating it before listing would invalidate the cached inventory.
+        (root / "99_QUARANTINE").mkdir(parents=True, exist_ok=True)
+    taken: set[Path] = set()
+    for counter, (rec, rule) in enumerate(matched, start=1):
+        p = rec.path
+        actions.append(
+            {
+                "id": f"A-{counter:03d}",
+                "type": rule.action,
+                "src": str(p),
+                "dst": str(_unique_dst(root / rule.dst / p.name, taken)),
+                "rule": rule.name,
+            }
+        )
 
     plan = {
         "plan_id": plan_id,
@@ -46,11 +154,14 @@ def generate_plan(root: Path) -> Path:
         "policy": {
             "allow_delete": False,
             "require_hash_verify": True,
+            "verify_strategy": "auto",
             "require_dry_run": True,
             "max_actions": 200,
         },
         "actions": actions,
     }
+    if drift:
+        plan["drift"] = drift[0].to_dict()
 
     out_path = meta["plans"] / f"plan_{plan_id}.json"
     out_path.write_text(json.dumps(plan, indent=2, ensure_ascii=False), encoding="utf-8")
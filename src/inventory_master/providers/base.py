@@ -1,12 +1,40 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 from pathlib import Path
 
 from ..models import FileRecord
+from .query import Query
+
+DEFAULT_BATCH_SIZE = 10_000
 
 
 class InventoryProvider(ABC):
     @abstractmethod
-    def iter_files(self, root: Path) -> list[FileRecord]:
+    def iter_files(self, root: Path) -> Iterator[FileRecord]:
+        """Yield file records under root one at a time (streaming, bounded memory)."""
         raise NotImplementedError
+
+    def iter_query(self, root: Path, query: Query) -> Iterator[FileRecord]:
+        """Yield only records matching query.
+
+        The default filters iter_files in-process; backends with a native query
+        language override this to filter at the source.
+        """
+        return query.filter(self.iter_files(root), root)
+
+    def iter_batches(
+        self, root: Path, *, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Iterator[list[FileRecord]]:
+        """Yield file records in lists of at most batch_size records."""
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        batch: list[FileRecord] = []
+        for rec in self.iter_files(root):
+            batch.append(rec)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
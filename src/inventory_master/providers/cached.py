@@ -0,0 +1,213 @@
+"""Inventory result cache shared by report, plan and snapshot.
+
+A complete listing from a backend is saved under _meta/inventory/ as
+listing_<backend>.jsonl.gz (a header line, then compact ``[rel, size, mtime_ns]`` rows)
+plus a listing_<backend>.dirs.json sidecar with the mtime of every directory seen.
+The listing is reused while it is younger than max_age_sec and no directory mtime has
+changed (files were not added, removed or renamed). Only backends that record every
+directory they list (the local walk with record_dirs) are cached: an index backend's
+results say nothing about empty directories, so a file created in one would go unseen.
+In-place edits do not touch the directory mtime: consumers that need exact sizes pass
+stat_files to re-stat each file.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from ..meta_paths import ensure_meta_layout
+from ..models import FileRecord
+from ..snapshot_format import path_key
+from .base import InventoryProvider
+from .index_trust import DriftReport
+from .query import Query
+
+FORMAT_NAME = "inventory_master.listing"
+FORMAT_VERSION = 1
+DEFAULT_MAX_AGE_SEC = 30 * 60
+
+
+def listing_paths(root: Path, backend: str) -> tuple[Path, Path]:
+    """(listing, dirs sidecar) for root and backend."""
+    inv = ensure_meta_layout(root)["inventory"]
+    return inv / f"listing_{backend}.jsonl.gz", inv / f"listing_{backend}.dirs.json"
+
+
+def fresh_backends(
+    root: Path, *, max_age_sec: float = DEFAULT_MAX_AGE_SEC, ordered: bool = False
+) -> list[str]:
+    """Backends with a fresh cached listing of root, newest first.
+
+    With ordered, only listings already in snapshot (path_key) order are returned.
+    """
+    inv = ensure_meta_layout(root)["inventory"]
+    found = []
+    for p in inv.glob("listing_*.dirs.json"):
+        backend = p.name[len("listing_") : -len(".dirs.json")]
+        meta = _fresh_meta(root.resolve(), p, max_age_sec)
+        if meta is not None and (meta["ordered"] or not ordered):
+            found.append((meta["created_at"], backend))
+    return [b for _, b in sorted(found, reverse=True)]
+
+
+def _fresh_meta(root: Path, dirs_path: Path, max_age_sec: float) -> dict[str, Any] | None:
+    try:
+        meta = json.loads(dirs_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != FORMAT_VERSION or meta.get("root") != str(root):
+        return None
+    if not 0 <= time.time() - meta.get("created_at", 0) <= max_age_sec:
+        return None
+    root_str = str(root)
+    for rel, mtime_ns in meta["dirs"].items():
+        try:
+            if os.stat(os.path.join(root_str, rel)).st_mtime_ns != mtime_ns:
+                return None
+        except OSError:
+            return None
+    return meta
+
+
+class CachedProvider(InventoryProvider):
+    """Serve a backend's listing from the cache when fresh; otherwise scan and save it.
+
+    After iter_files, dirs holds the directory mtimes ({relative dir: mtime_ns}),
+    from_cache tells whether the records came from the cache and created_at (epoch
+    seconds) when they were listed. Partial scans (iter_query with a path prefix on a
+    miss, abandoned iteration) are never saved.
+    """
+
+    def __init__(
+        self,
+        inner: InventoryProvider,
+        *,
+        backend: str = "local",
+        max_age_sec: float = DEFAULT_MAX_AGE_SEC,
+        stat_files: bool = False,
+    ) -> None:
+        self.inner = inner
+        self.backend = backend
+        self._max_age_sec = max_age_sec
+        self._stat_files = stat_files
+        self.dirs: dict[str, int] = {}
+        self.from_cache = False
+        self.created_at = 0.0
+
+    @property
+    def drift(self) -> DriftReport | None:
+        """The backend's sampled drift for the last scan (trust-index mode), if any."""
+        return None if self.from_cache else getattr(self.inner, "drift", None)
+
+    def is_fresh(self, root: Path) -> bool:
+        return self._fresh(root.resolve()) is not None
+
+    def _fresh(self, root: Path) -> dict[str, Any] | None:
+        return _fresh_meta(root, listing_paths(root, self.backend)[1], self._max_age_sec)
+
+    def iter_files(self, root: Path) -> Iterator[FileRecord]:
+        root = root.resolve()
+        meta = self._fresh(root)
+        self.from_cache = meta is not None
+        if meta is not None:
+            self._set_dirs(meta["dirs"])
+            self.created_at = meta["created_at"]
+            return self._read(root, meta["token"])
+        self.created_at = time.time()
+        return self._scan(root)
+
+    def iter_query(self, root: Path, query: Query) -> Iterator[FileRecord]:
+        # A walk of the whole tree costs the same as the query's walk, and is saved.
+        whole_walk = query.path_prefix is None and self._cacheable
+        if whole_walk or self.is_fresh(root):
+            return query.filter(self.iter_files(root), root)
+        return self.inner.iter_query(root, query)
+
+    @property
+    def _cacheable(self) -> bool:
+        return getattr(self.inner, "dir_mtimes", None) is not None
+
+    def _set_dirs(self, dirs: dict[str, int]) -> None:
+        self.dirs.clear()  # in place: callers may hold the dict before iterating
+        self.dirs.update(dirs)
+
+    def invalidate(self, root: Path) -> None:
+        for p in listing_paths(root.resolve(), self.backend):
+            p.unlink(missing_ok=True)
+
+    def _read(self, root: Path, token: int) -> Iterator[FileRecord]:
+        listing = listing_paths(root, self.backend)[0]
+        root_str = str(root)
+        with gzip.open(listing, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("format") != FORMAT_NAME or header.get("token") != token:
+                raise RuntimeError(f"Inventory cache does not match its sidecar: {listing}")
+            for line in f:
+                rel, size, mtime_ns = json.loads(line)
+                path = os.path.join(root_str, rel)
+                if self._stat_files:
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue  # removed in place since the listing was cached
+                    size, mtime_ns = st.st_size, st.st_mtime_ns
+                yield FileRecord(path=Path(path), size_bytes=size, mtime_ns=mtime_ns)
+
+    def _scan(self, root: Path) -> Iterator[FileRecord]:
+        listing, dirs_path = listing_paths(root, self.backend)  # _meta exists before the scan
+        tmp = listing.with_name(listing.name + ".tmp")
+        root_str = str(root)
+        token = start_ns = time.time_ns()
+        cacheable = self._cacheable
+        ordered, last_key = True, None
+        try:
+            with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=1) as f:
+                header = {"format": FORMAT_NAME, "version": FORMAT_VERSION, "token": token}
+                f.write(json.dumps(header) + "\n")
+                for rec in self.inner.iter_files(root):
+                    rel = os.path.relpath(rec.path, root_str)
+                    if rel == os.pardir or rel.startswith(os.pardir + os.sep):
+                        cacheable = False  # backend reported a path outside root
+                    elif cacheable:
+                        f.write(json.dumps([rel, rec.size_bytes, rec.mtime_ns]) + "\n")
+                        key = path_key(rel)
+                        ordered = ordered and (last_key is None or key > last_key)
+                        last_key = key
+                    yield rec
+            dirs = self._dir_mtimes(root_str, start_ns)
+            if cacheable and dirs is not None:
+                tmp.replace(listing)
+                self._set_dirs(dirs)
+                meta = {
+                    "version": FORMAT_VERSION,
+                    "root": root_str,
+                    "backend": self.backend,
+                    "token": token,
+                    "created_at": time.time(),
+                    "ordered": ordered,  # path_key order, as snapshots need
+                    "dirs": dirs,
+                }
+                dirs_tmp = dirs_path.with_name(dirs_path.name + ".tmp")
+                dirs_tmp.write_text(json.dumps(meta), encoding="utf-8")
+                dirs_tmp.replace(dirs_path)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def _dir_mtimes(self, root_str: str, start_ns: int) -> dict[str, int] | None:
+        """{relative dir: mtime_ns}, or None if the scan cannot be validated later.
+
+        A directory changed at or after the scan start may have changed after it was
+        listed, with the same mtime; such a scan is not cached.
+        """
+        recorded = getattr(self.inner, "dir_mtimes", None)
+        if not recorded:  # no directory list (index backend) or nothing was listed
+            return None
+        if any(m >= start_ns for m in recorded.values()):
+            return None
+        return {os.path.relpath(p, root_str): m for p, m in recorded.items()}
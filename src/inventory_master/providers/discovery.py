@@ -0,0 +1,181 @@
+"""Backend discovery: probe Everything backends concurrently and cache the winner.
+
+All probes start at once and share one deadline, so a host without Everything pays at
+most the deadline (not the sum of every probe's timeout). The winner and each probe's
+health are kept in _meta/inventory/backend.json for a TTL; later runs construct the
+cached backend without probing. A backend that fails is demoted in the cache
+immediately, so the next run does not try it again until the TTL expires. A winner
+chosen while a preferred probe was still undecided is only kept for
+UNDECIDED_TTL_SEC, so a slow-starting Everything is picked up again soon.
+
+TrustOptions (index_trust.py) are handed to every Everything backend's constructor.
+"""
+
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from ..meta_paths import ensure_meta_layout
+from .base import InventoryProvider
+from .everything_es import EverythingESProvider
+from .everything_es import is_available as es_available
+from .everything_http import EverythingHTTPProvider
+from .everything_http import is_available as http_available
+from .everything_sdk import EverythingSDKProvider
+from .everything_sdk import is_available as sdk_available
+from .index_trust import TrustOptions
+from .local_walk import LocalWalkProvider
+
+# Preference order; the first available backend wins.
+BACKENDS: tuple[str, ...] = ("everything_es", "everything_http", "everything_sdk")
+PROBES: dict[str, Callable[[], bool]] = {
+    "everything_es": es_available,
+    "everything_http": http_available,
+    "everything_sdk": sdk_available,
+}
+FACTORIES: dict[str, Callable[[TrustOptions], InventoryProvider]] = {
+    "everything_es": lambda t: EverythingESProvider(
+        hash_files=False, trust_index=t.trust_index, verify_fraction=t.verify_fraction
+    ),
+    "everything_http": lambda t: EverythingHTTPProvider(
+        hash_files=False, trust_index=t.trust_index, verify_fraction=t.verify_fraction
+    ),
+    "everything_sdk": lambda t: EverythingSDKProvider(
+        hash_files=False, trust_index=t.trust_index, verify_fraction=t.verify_fraction
+    ),
+    "local": lambda t: LocalWalkProvider(hash_files=False, record_dirs=True),
+}
+DEFAULT_DEADLINE_SEC = 2.0
+DEFAULT_TTL_SEC = 15 * 60
+UNDECIDED_TTL_SEC = 60
+
+
+def cache_path(root: Path) -> Path:
+    return ensure_meta_layout(root)["inventory"] / "backend.json"
+
+
+def _load(root: Path, ttl_sec: float) -> dict[str, Any] | None:
+    try:
+        data = json.loads(cache_path(root).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("backend") not in FACTORIES:
+        return None
+    age = time.time() - float(data.get("checked_at", 0))
+    if not 0 <= age < min(ttl_sec, float(data.get("ttl_sec", ttl_sec))):
+        return None
+    return data
+
+
+def _save(root: Path, backend: str, health: dict[str, Any]) -> None:
+    path = cache_path(root)
+    tmp = path.with_name(path.name + ".tmp")
+    data: dict[str, Any] = {"backend": backend, "checked_at": time.time(), "health": health}
+    preferred = BACKENDS[: BACKENDS.index(backend)] if backend in BACKENDS else BACKENDS
+    if any(health.get(n, {}).get("ok") is None for n in preferred):
+        data["ttl_sec"] = UNDECIDED_TTL_SEC
+    try:
+        tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        tmp.replace(path)
+    except OSError:
+        pass  # the cache is an optimization; a read-only _meta just means probing again
+
+
+def probe_all(deadline_sec: float = DEFAULT_DEADLINE_SEC) -> dict[str, dict[str, Any]]:
+    """Run every probe concurrently; returns {backend: {"ok": bool|None, "ms": int|None}}.
+
+    Returns as soon as the preferred backend's answer is decided: every higher-priority
+    probe has failed and this one succeeded, or all probes finished, or the deadline
+    passed. Probes still running then are reported as unknown ({"ok": None, "ms": None})
+    and treated as unavailable.
+    """
+    results: queue.Queue[tuple[str, bool, int]] = queue.Queue()
+    start = time.monotonic()
+
+    def run(name: str) -> None:
+        try:
+            ok = bool(PROBES[name]())
+        except Exception:  # a probe must never take discovery down
+            ok = False
+        results.put((name, ok, int((time.monotonic() - start) * 1000)))
+
+    for name in BACKENDS:
+        # Daemon threads: a probe stuck in its own timeout must not delay exit.
+        threading.Thread(target=run, args=(name,), daemon=True, name=f"probe-{name}").start()
+
+    health: dict[str, dict[str, Any]] = {}
+    while len(health) < len(BACKENDS):
+        if _decided(health):
+            break
+        remaining = deadline_sec - (time.monotonic() - start)
+        if remaining <= 0:
+            break
+        try:
+            name, ok, ms = results.get(timeout=remaining)
+        except queue.Empty:
+            break
+        health[name] = {"ok": ok, "ms": ms}
+    for name in BACKENDS:
+        health.setdefault(name, {"ok": None, "ms": None})
+    return health
+
+
+def _decided(health: dict[str, dict[str, Any]]) -> bool:
+    for name in BACKENDS:
+        if name not in health:
+            return False
+        if health[name]["ok"]:
+            return True
+    return True
+
+
+def _winner(health: dict[str, dict[str, Any]]) -> str:
+    return next((n for n in BACKENDS if health.get(n, {}).get("ok")), "local")
+
+
+def discover(
+    root: Path,
+    *,
+    deadline_sec: float = DEFAULT_DEADLINE_SEC,
+    ttl_sec: float = DEFAULT_TTL_SEC,
+    trust: TrustOptions | None = None,
+) -> tuple[InventoryProvider, str]:
+    """Return (provider, backend_name), from the cache when fresh, else by probing."""
+    trust = trust or TrustOptions()
+    for _ in range(len(BACKENDS) + 1):  # each demotion moves the cached winner down
+        cached = _load(root, ttl_sec)
+        if cached is None:
+            break
+        backend = cached["backend"]
+        try:
+            return FACTORIES[backend](trust), backend
+        except (FileNotFoundError, RuntimeError, OSError):
+            demote(root, backend)
+    health = probe_all(deadline_sec)
+    # Constructing can still fail (e.g. es.exe moved); fall through the preference order.
+    while True:
+        backend = _winner(health)
+        try:
+            provider = FACTORIES[backend](trust)
+        except (FileNotFoundError, RuntimeError, OSError):
+            health[backend]["ok"] = False
+            continue
+        _save(root, backend, health)
+        return provider, backend
+
+
+def demote(root: Path, backend: str) -> None:
+    """Mark backend unhealthy; the cached winner becomes the next healthy backend."""
+    if backend == "local":
+        return
+    cached = _load(root, DEFAULT_TTL_SEC)
+    health = cached.get("health") if cached else None
+    health = health if isinstance(health, dict) else {}
+    health[backend] = {"ok": False, "ms": None}
+    _save(root, _winner(health), health)
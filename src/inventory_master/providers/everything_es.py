@@ -2,13 +2,26 @@
 
 from __future__ import annotations
 
+import csv
+import queue
 import shutil
 import subprocess
+import threading
+from collections.abc import Iterator
 from pathlib import Path
 
-from ..hashing import sha256_file
+from ..hash_cache import HashCache
+from ..hashing import HashMode, hash_records
 from ..models import FileRecord
 from .base import InventoryProvider
+from .index_trust import (
+    DriftReport,
+    DriftSampler,
+    parse_date_modified,
+    parse_size,
+    stat_record,
+)
+from .query import Query, everything_terms
 
 # Common install locations for es.exe (Windows)
 _ES_COMMON_PATHS = (
@@ -19,6 +32,8 @@ _ES_COMMON_PATHS = (
 
 # Default timeout for ES CLI (ms); ES doc uses -timeout <ms>
 _DEFAULT_TIMEOUT_MS = 30_000
+# Results per es invocation (-offset/-n window)
+_DEFAULT_WINDOW = 100_000
 
 
 def find_es_exe() -> str | None:
@@ -63,7 +78,15 @@ class EverythingESProvider(InventoryProvider):
     - -path <path>: search under path
     - /a-d: files only (no folders)
     - -s: sort by full path
-    - -n <num>: max results (optional)
+    - -csv -size -dm: CSV rows with size (bytes) and date modified (FILETIME)
+    - -offset <n> -n <num>: result windows of window_size (and the max_results cap)
+
+    stdout is drained by a reader thread, so records are yielded while es is still
+    writing and the timeout covers es itself, not the consumer's pace.
+
+    With trust_index, records use the size/date-modified columns instead of a stat()
+    per result; verify_fraction stats that share of them and leaves a DriftReport in
+    self.drift.
     """
 
     def __init__(
@@ -71,8 +94,14 @@ class EverythingESProvider(InventoryProvider):
         *,
         es_exe: str | None = None,
         hash_files: bool = False,
+        jobs: int = 1,
+        hash_mode: HashMode = "thread",
+        hash_cache: HashCache | None = None,
         max_results: int = 0,
         timeout_ms: int = _DEFAULT_TIMEOUT_MS,
+        window_size: int = _DEFAULT_WINDOW,
+        trust_index: bool = False,
+        verify_fraction: float = 0.0,
     ) -> None:
         self._es_exe = es_exe or find_es_exe()
         if not self._es_exe:
@@ -82,54 +111,157 @@ class EverythingESProvider(InventoryProvider):
         if not Path(self._es_exe).exists():
             raise FileNotFoundError(f"es.exe not found at: {self._es_exe}")
         self._hash_files = hash_files
+        self._jobs = jobs
+        self._hash_mode = hash_mode
+        self._hash_cache = hash_cache
         self._max_results = max_results  # 0 = no limit
-        self._timeout_sec = max(1, timeout_ms // 1000)
+        self._timeout_sec = max(1, timeout_ms // 1000)  # per window
+        self._window = max(1, window_size)
+        self._trust_index = trust_index
+        self._verify_fraction = verify_fraction
+        self.drift: DriftReport | None = None
 
-    def iter_files(self, root: Path) -> list[FileRecord]:
-        root = root.resolve()
-        root_str = str(root)
-        # ES: -path <path> = search under path; /a-d = files only; -s = sort by path
-        cmd = [self._es_exe, "-path", root_str, "/a-d", "-s"]
-        if self._max_results > 0:
-            cmd.extend(["-n", str(self._max_results)])
-        try:
-            out = subprocess.check_output(
-                cmd,
-                text=True,
-                timeout=self._timeout_sec,
-                errors="replace",
+    def iter_files(self, root: Path) -> Iterator[FileRecord]:
+        return self._hashed(self._query(root))
+
+    def iter_query(self, root: Path, query: Query) -> Iterator[FileRecord]:
+        # Native filtering; re-checked in-process (e.g. dm: has day granularity).
+        return self._hashed(query.filter(self._query(root, query), root))
+
+    def _hashed(self, records: Iterator[FileRecord]) -> Iterator[FileRecord]:
+        if self._hash_files:
+            return hash_records(
+                records, jobs=self._jobs, mode=self._hash_mode, cache=self._hash_cache
             )
-        except subprocess.CalledProcessError as e:
-            if e.returncode == 8:
-                raise RuntimeError(
-                    "Everything is not running. Start Everything and try again."
-                ) from e
-            raise RuntimeError(f"ES provider failed (exit {e.returncode}): {e}") from e
-        except subprocess.TimeoutExpired as e:
-            raise RuntimeError(f"ES provider timed out after {self._timeout_sec}s") from e
-
-        records: list[FileRecord] = []
-        for line in out.splitlines():
-            line = line.strip()
-            if not line:
-                continue
-            p = Path(line)
-            # Skip _meta (same as LocalWalkProvider)
-            if "_meta" in p.parts:
-                continue
+        return records
+
+    def _query(self, root: Path, query: Query | None = None) -> Iterator[FileRecord]:
+        root = root.resolve()
+        base = query.base_dir(root) if query is not None else root
+        # ES: -path <path> = search under path; /a-d = files only; -s = sort by path.
+        # Size and date-modified come as CSV columns (bytes, FILETIME); trusted, no stat().
+        cmd = [self._es_exe, "-path", str(base), "/a-d", "-s", "-csv", "-size", "-dm"]
+        cmd += ["-size-format", "1", "-date-format", "2", "-cp", "65001"]
+        terms = everything_terms(query) if query is not None else []  # e.g. ext:tmp;bak
+        sampler = None
+        if self._trust_index and self._verify_fraction > 0:
+            sampler = DriftSampler(self._verify_fraction)
+        self.drift = sampler.report if sampler is not None else None
+
+        # Offset/count windows keep each es invocation well inside the timeout.
+        offset = 0
+        while not self._max_results or offset < self._max_results:
+            count = self._window
+            if self._max_results:
+                count = min(count, self._max_results - offset)
+            rows = 0
+            for rec in self._run([*cmd, "-offset", str(offset), "-n", str(count), *terms]):
+                rows += 1
+                if rec is not None and sampler is not None:
+                    rec = sampler.check(rec)
+                if rec is not None:
+                    yield rec
+            offset += rows
+            if rows < count:
+                return
+
+    def _run(self, cmd: list[str]) -> Iterator[FileRecord | None]:
+        """Run one es window, yielding a record (None if skipped) per CSV row as it arrives."""
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+        rows: queue.Queue[list[str] | None] = queue.Queue()  # at most one window of rows
+        timed_out = threading.Event()
+
+        def kill() -> None:
+            timed_out.set()
+            proc.kill()
+
+        def drain() -> None:
             try:
-                if not p.is_file():
+                assert proc.stdout is not None
+                for row in csv.reader(proc.stdout):
+                    rows.put(row)
+                proc.wait()
+            except (OSError, ValueError):
+                pass  # stdout closed under us: the consumer stopped early
+            finally:
+                timer.cancel()  # es has exited; the consumer's pace does not count
+                rows.put(None)
+
+        timer = threading.Timer(self._timeout_sec, kill)
+        timer.start()
+        reader = threading.Thread(target=drain, daemon=True, name="es-reader")
+        reader.start()
+        try:
+            columns = _DEFAULT_COLUMNS
+            first = True
+            while (row := rows.get()) is not None:
+                if not row:
                     continue
-                st = p.stat()
-            except OSError:
-                continue
-            sha = sha256_file(p) if self._hash_files else None
-            records.append(
-                FileRecord(
-                    path=p,
-                    size_bytes=st.st_size,
-                    mtime_ns=st.st_mtime_ns,
-                    sha256=sha,
-                )
-            )
-        return records
+                if first:
+                    first = False
+                    if _is_header(row):
+                        columns = _column_map(row)
+                        continue
+                yield _csv_record(row, columns, trust=self._trust_index)
+            returncode = proc.wait()
+        finally:
+            timer.cancel()
+            if proc.poll() is None:
+                proc.kill()  # consumer stopped early
+                proc.wait()
+            reader.join()
+            if proc.stdout is not None:
+                proc.stdout.close()
+        if returncode == 0:
+            return  # es finished, even if the timer fired as it exited
+        if timed_out.is_set():
+            raise RuntimeError(f"ES provider timed out after {self._timeout_sec}s")
+        if returncode == 8:
+            raise RuntimeError("Everything is not running. Start Everything and try again.")
+        raise RuntimeError(f"ES provider failed (exit {returncode})")
+
+
+# Column positions (path, size, date modified) when es prints no header.
+_DEFAULT_COLUMNS = (0, 1, 2)
+
+
+def _is_header(row: list[str]) -> bool:
+    return any(c.strip().lower() == "size" for c in row)
+
+
+def _column_map(header: list[str]) -> tuple[int, int, int]:
+    names = [c.strip().lower() for c in header]
+
+    def find(*candidates: str, default: int) -> int:
+        return next((names.index(c) for c in candidates if c in names), default)
+
+    return (
+        find("filename", "full path", "path", "name", default=0),
+        find("size", default=1),
+        find("date modified", "dm", default=2),
+    )
+
+
+def _csv_record(row: list[str], columns: tuple[int, int, int], *, trust: bool) -> FileRecord | None:
+    i_path, i_size, i_dm = columns
+    try:
+        path_str, size_str, dm_str = row[i_path], row[i_size], row[i_dm]
+    except IndexError:
+        return None
+    p = Path(path_str)
+    # Skip _meta (same as LocalWalkProvider)
+    if not path_str or "_meta" in p.parts:
+        return None
+    if not trust:
+        return stat_record(p)  # one stat per result
+    size, mtime_ns = parse_size(size_str), parse_date_modified(dm_str)
+    if size is None or mtime_ns is None:
+        return stat_record(p)  # column missing or unparsable: fall back to the disk
+    return FileRecord(path=p, size_bytes=size, mtime_ns=mtime_ns)
@@ -6,19 +6,42 @@ Security: use localhost only; disable file download in Everything options.
 
 from __future__ import annotations
 
+import codecs
+import http.client
 import json
+import os
+import queue
+import time
 import urllib.error
 import urllib.parse
 import urllib.request
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from typing import IO, Any
 
-from ..hashing import sha256_file
+from ..hash_cache import HashCache
+from ..hashing import HashMode, hash_records
 from ..models import FileRecord
 from .base import InventoryProvider
+from .index_trust import (
+    DriftReport,
+    DriftSampler,
+    parse_date_modified,
+    parse_size,
+    stat_record,
+)
+from .query import Query, everything_path, everything_terms
 
 _DEFAULT_HOST = "127.0.0.1"
 _DEFAULT_PORT = 8080
 _DEFAULT_TIMEOUT = 30
+_DEFAULT_PAGE_SIZE = 10_000
+_DEFAULT_IN_FLIGHT = 4
+_DEFAULT_RETRIES = 3
+_DEFAULT_BACKOFF = 0.2  # seconds; doubled per retry
+_READ_CHUNK = 64 * 1024
 
 
 def is_available(
@@ -36,11 +59,109 @@ def is_available(
         return False
 
 
+class _RetryableStatus(Exception):
+    """5xx response: worth retrying."""
+
+
+class _ConnectionPool:
+    """Idle keep-alive HTTPConnections shared by the page-fetching threads."""
+
+    def __init__(self, host: str, port: int, timeout: float) -> None:
+        self._host, self._port, self._timeout = host, port, timeout
+        self._idle: queue.LifoQueue[http.client.HTTPConnection] = queue.LifoQueue()
+
+    def get(self) -> http.client.HTTPConnection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return http.client.HTTPConnection(self._host, self._port, timeout=self._timeout)
+
+    def put(self, conn: http.client.HTTPConnection) -> None:
+        self._idle.put(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def iter_json_rows(stream: IO[bytes], *, chunk_size: int = _READ_CHUNK) -> Iterator[Any]:
+    """Incrementally decode the rows of a JSON response as chunks arrive.
+
+    Rows are the elements of a top-level array, or of the "results" array of a
+    top-level object (Everything's {"totalResults": n, "results": [...]}). Only the
+    undecoded tail of the body is buffered.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buf, pos, eof = "", 0, False
+
+    def fill() -> None:
+        nonlocal buf, pos, eof
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buf = buf[pos:] + text.decode(chunk, final=eof)
+        pos = 0
+
+    def skip(chars: str) -> None:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in chars:
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    skip(" \t\r\n")
+    if pos >= len(buf):
+        raise ValueError("empty response")
+    if buf[pos] == "{":
+        while (i := buf.find('"results"', pos)) < 0:
+            if eof:
+                return  # object without results: no rows
+            pos = max(pos, len(buf) - len('"results"'))
+            fill()
+        pos = i + len('"results"')
+        skip(" \t\r\n:")
+    if pos >= len(buf) or buf[pos] != "[":
+        raise ValueError("expected a JSON array of results")
+    pos += 1
+    while True:
+        skip(" \t\r\n,")
+        if pos >= len(buf):
+            raise ValueError("truncated JSON array")
+        if buf[pos] == "]":
+            return
+        try:
+            row, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        if end == len(buf) and not eof:
+            fill()  # the value may continue in the next chunk
+            continue
+        pos = end
+        yield row
+
+
 class EverythingHTTPProvider(InventoryProvider):
     """Everything HTTP Server provider (read-only).
 
     Requires Everything running with HTTP Server enabled (default port 8080).
     Use localhost/127.0.0.1 only; disable file download in Everything options.
+
+    Results are fetched in pages of page_size (o=/c= parameters) with up to
+    in_flight pages outstanding over pooled keep-alive connections; each page is
+    decoded incrementally and retried with exponential backoff on connection errors
+    and 5xx responses.
+
+    With trust_index, records use Everything's size/date_modified columns and the disk
+    is not touched; verify_fraction stats that share of them and leaves a DriftReport
+    in self.drift after each scan (see index_trust.py).
     """
 
     def __init__(
@@ -49,25 +170,59 @@ class EverythingHTTPProvider(InventoryProvider):
         host: str = _DEFAULT_HOST,
         port: int = _DEFAULT_PORT,
         hash_files: bool = False,
+        jobs: int = 1,
+        hash_mode: HashMode = "thread",
+        hash_cache: HashCache | None = None,
         max_results: int = 0,
         timeout: float = _DEFAULT_TIMEOUT,
+        page_size: int = _DEFAULT_PAGE_SIZE,
+        in_flight: int = _DEFAULT_IN_FLIGHT,
+        retries: int = _DEFAULT_RETRIES,
+        backoff: float = _DEFAULT_BACKOFF,
+        trust_index: bool = False,
+        verify_fraction: float = 0.0,
     ) -> None:
         self._host = host
         self._port = port
         self._base_url = f"http://{host}:{port}"
         self._hash_files = hash_files
+        self._jobs = jobs
+        self._hash_mode = hash_mode
+        self._hash_cache = hash_cache
         self._max_results = max_results or 4294967295
         self._timeout = timeout
+        self._page_size = max(1, page_size)
+        self._in_flight = max(1, in_flight)
+        self._retries = max(0, retries)
+        self._backoff = backoff
+        self._trust_index = trust_index
+        self._verify_fraction = verify_fraction
+        self._sampler: DriftSampler | None = None
+        self.drift: DriftReport | None = None
+
+    def iter_files(self, root: Path) -> Iterator[FileRecord]:
+        return self._hashed(self._query(root))
 
-    def iter_files(self, root: Path) -> list[FileRecord]:
+    def iter_query(self, root: Path, query: Query) -> Iterator[FileRecord]:
+        # Native filtering; re-checked in-process (e.g. dm: has day granularity).
+        return self._hashed(query.filter(self._query(root, query), root))
+
+    def _hashed(self, records: Iterator[FileRecord]) -> Iterator[FileRecord]:
+        if self._hash_files:
+            return hash_records(
+                records, jobs=self._jobs, mode=self._hash_mode, cache=self._hash_cache
+            )
+        return records
+
+    def _query(self, root: Path, query: Query | None = None) -> Iterator[FileRecord]:
         root = root.resolve()
-        root_str = str(root)
-        # Search under path: use path match (p=1) and search = root path
         # Search: path match (p=1), limit to results under root (path: prefix in Everything syntax)
+        search = str(root) + "\\"
+        if query is not None:
+            search = " ".join([everything_path(query.base_dir(root)), *everything_terms(query)])
         params = {
-            "s": root_str + "\\",
+            "s": search,
             "p": 1,
-            "c": min(self._max_results, 100_000),
             "j": 1,
             "path_column": 1,
             "size_column": 1,
@@ -75,31 +230,89 @@ class EverythingHTTPProvider(InventoryProvider):
             "sort": "path",
             "ascending": 1,
         }
-        query = urllib.parse.urlencode(params)
-        url = f"{self._base_url}/?{query}"
-        try:
-            req = urllib.request.Request(url, method="GET")
-            with urllib.request.urlopen(req, timeout=self._timeout) as resp:
-                raw = resp.read().decode("utf-8", errors="replace")
-        except urllib.error.HTTPError as e:
-            raise RuntimeError(f"Everything HTTP error {e.code}: {e.reason}") from e
-        except (OSError, urllib.error.URLError, TimeoutError) as e:
-            raise RuntimeError(f"Everything HTTP failed: {e}") from e
+        if self._trust_index and self._verify_fraction > 0:
+            self._sampler = DriftSampler(self._verify_fraction)
+            self.drift = self._sampler.report
+        for rows in self._pages(params):
+            yield from self._records(rows)
+
+    def _pages(self, params: dict[str, object]) -> Iterator[list[Any]]:
+        """Yield result pages in order, keeping up to in_flight requests outstanding.
 
+        Pages are requested speculatively (o=0, o=page_size, ...); the first short page
+        marks the end and later pages are discarded.
+        """
+        pool = _ConnectionPool(self._host, self._port, self._timeout)
+        pending: deque[Future[list[Any]]] = deque()
+        offset = 0
+        done = False
         try:
-            data = json.loads(raw)
-        except json.JSONDecodeError as e:
-            raise RuntimeError(f"Everything HTTP returned invalid JSON: {e}") from e
+            with ThreadPoolExecutor(self._in_flight, thread_name_prefix="everything-http") as ex:
+                try:
+                    while True:
+                        more = not done and offset < self._max_results
+                        while more and len(pending) < self._in_flight:
+                            count = min(self._page_size, self._max_results - offset)
+                            page = {**params, "o": offset, "c": count}
+                            pending.append(ex.submit(self._fetch_page, pool, page))
+                            offset += count
+                            more = offset < self._max_results
+                        if not pending:
+                            return
+                        rows = pending.popleft().result()
+                        yield rows
+                        if len(rows) < self._page_size:
+                            done = True
+                            for fut in pending:
+                                fut.cancel()
+                            pending.clear()
+                finally:
+                    for fut in pending:
+                        fut.cancel()
+        finally:
+            pool.close()  # after the executor has joined its threads
 
-        # Accept list of rows or {"results": [...]}; columns may be named path, size, date_modified
-        rows = data if isinstance(data, list) else data.get("results", data.get("items", []))
-        if not isinstance(rows, list):
-            rows = []
+    def _fetch_page(self, pool: _ConnectionPool, params: dict[str, object]) -> list[Any]:
+        """GET one page over a pooled keep-alive connection, with retry and backoff."""
+        target = "/?" + urllib.parse.urlencode(params)
+        last: Exception | None = None
+        for attempt in range(self._retries + 1):
+            if attempt:
+                time.sleep(self._backoff * 2 ** (attempt - 1))
+            conn = pool.get()
+            try:
+                conn.request("GET", target)
+                resp = conn.getresponse()
+                if resp.status >= 500:
+                    resp.read()
+                    raise _RetryableStatus(f"HTTP {resp.status} {resp.reason}")
+                if resp.status != 200:
+                    resp.read()
+                    pool.put(conn)
+                    raise RuntimeError(f"Everything HTTP error {resp.status}: {resp.reason}")
+                try:
+                    rows = list(iter_json_rows(resp))
+                except ValueError as e:
+                    conn.close()
+                    raise RuntimeError(f"Everything HTTP returned invalid JSON: {e}") from e
+                pool.put(conn)
+                return rows
+            except (OSError, http.client.HTTPException, _RetryableStatus) as e:
+                conn.close()
+                last = e
+        raise RuntimeError(f"Everything HTTP failed after {self._retries + 1} attempts: {last}")
 
-        records: list[FileRecord] = []
+    def _records(self, rows: list[Any]) -> Iterator[FileRecord]:
+        sampler = self._sampler
         for row in rows:
             if isinstance(row, dict):
-                path_val = row.get("path") or row.get("full_path_and_name") or row.get("path_and_name")
+                if row.get("type") == "folder":
+                    continue
+                path_val = (
+                    row.get("path") or row.get("full_path_and_name") or row.get("path_and_name")
+                )
+                if path_val and row.get("name"):
+                    path_val = os.path.join(path_val, row["name"])  # path column = folder
             else:
                 path_val = row
             if not path_val:
@@ -107,27 +320,19 @@ class EverythingHTTPProvider(InventoryProvider):
             p = Path(path_val)
             if "_meta" in p.parts:
                 continue
-            try:
-                if not p.is_file():
+            rec = None
+            if self._trust_index and isinstance(row, dict):
+                size = parse_size(row.get("size"))
+                mtime_ns = parse_date_modified(row.get("date_modified"))
+                if size is not None and mtime_ns is not None:
+                    rec = FileRecord(path=p, size_bytes=size, mtime_ns=mtime_ns)
+                    if sampler is not None:
+                        rec = sampler.check(rec)
+                        if rec is None:
+                            continue
+            if rec is None:
+                # Not trusted (or the row lacks a column): one stat per result.
+                rec = stat_record(p)
+                if rec is None:
                     continue
-                st = p.stat()
-            except OSError:
-                continue
-            size = st.st_size if hasattr(st, "st_size") else (row.get("size") if isinstance(row, dict) else 0)
-            mtime_ns = st.st_mtime_ns if hasattr(st, "st_mtime_ns") else 0
-            if isinstance(row, dict) and "date_modified" in row and not mtime_ns:
-                try:
-                    from datetime import datetime
-                    dm = row["date_modified"]
-                    if isinstance(dm, (int, float)):
-                        mtime_ns = int(dm * 1e9)
-                    elif isinstance(dm, str):
-                        dt = datetime.fromisoformat(dm.replace("Z", "+00:00"))
-                        mtime_ns = int(dt.timestamp() * 1e9)
-                except Exception:
-                    pass
-            sha = sha256_file(p) if self._hash_files else None
-            records.append(
-                FileRecord(path=p, size_bytes=size or 0, mtime_ns=mtime_ns, sha256=sha)
-            )
-        return records
+            yield rec
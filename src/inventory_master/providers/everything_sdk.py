@@ -8,11 +8,16 @@ from __future__ import annotations
 
 import ctypes
 import sys
+from collections.abc import Iterator
+from dataclasses import replace
 from pathlib import Path
 
-from ..hashing import sha256_file
+from ..hash_cache import HashCache
+from ..hashing import HashMode, hash_records
 from ..models import FileRecord
 from .base import InventoryProvider
+from .index_trust import DriftReport, DriftSampler, filetime_to_ns, stat_record
+from .query import Query, everything_path, everything_terms
 
 # Request flags (from Everything SDK)
 EVERYTHING_REQUEST_FULL_PATH_AND_FILE_NAME = 0x00000004
@@ -27,10 +32,6 @@ _SDK_COMMON_PATHS = (
     r"C:\Tools\Everything\Everything32.dll",
 )
 
-# Windows FILETIME: 100-nanosecond intervals since 1601-01-01
-# Epoch 1970 is 11644473600 seconds after 1601 -> 11644473600 * 10^7 ticks
-_WIN_FILETIME_EPOCH_OFFSET = 116444736000000000  # ticks
-
 
 def _find_dll() -> str | None:
     if sys.platform != "win32":
@@ -61,6 +62,9 @@ class EverythingSDKProvider(InventoryProvider):
     """Everything SDK provider (read-only, Windows only).
 
     Uses Everything SDK DLL for fast indexed search.
+
+    With trust_index, records use the size/date-modified the SDK returns instead of a
+    per-result stat(); verify_fraction samples them against the disk (self.drift).
     """
 
     def __init__(
@@ -68,7 +72,12 @@ class EverythingSDKProvider(InventoryProvider):
         *,
         dll_path: str | None = None,
         hash_files: bool = False,
+        jobs: int = 1,
+        hash_mode: HashMode = "thread",
+        hash_cache: HashCache | None = None,
         max_results: int = 0,
+        trust_index: bool = False,
+        verify_fraction: float = 0.0,
     ) -> None:
         if sys.platform != "win32":
             raise RuntimeError("Everything SDK provider is Windows-only")
@@ -79,7 +88,13 @@ class EverythingSDKProvider(InventoryProvider):
             )
         self._dll = ctypes.WinDLL(self._dll_path)
         self._hash_files = hash_files
+        self._jobs = jobs
+        self._hash_mode = hash_mode
+        self._hash_cache = hash_cache
         self._max_results = max_results or 0
+        self._trust_index = trust_index
+        self._verify_fraction = verify_fraction
+        self.drift: DriftReport | None = None
 
         # Set up function signatures (W = wide/Unicode)
         self._dll.Everything_SetSearchW.argtypes = [ctypes.c_wchar_p]
@@ -117,11 +132,27 @@ class EverythingSDKProvider(InventoryProvider):
         ]
         self._dll.Everything_GetResultDateModified.restype = ctypes.c_int
 
-    def iter_files(self, root: Path) -> list[FileRecord]:
+    def iter_files(self, root: Path) -> Iterator[FileRecord]:
+        return self._hashed(self._query(root))
+
+    def iter_query(self, root: Path, query: Query) -> Iterator[FileRecord]:
+        # Native filtering; re-checked in-process (e.g. dm: has day granularity).
+        return self._hashed(query.filter(self._query(root, query), root))
+
+    def _hashed(self, records: Iterator[FileRecord]) -> Iterator[FileRecord]:
+        if self._hash_files:
+            return hash_records(
+                records, jobs=self._jobs, mode=self._hash_mode, cache=self._hash_cache
+            )
+        return records
+
+    def _query(self, root: Path, query: Query | None = None) -> Iterator[FileRecord]:
         root = root.resolve()
-        root_str = str(root)
         # Search under path: use path match and search = root (Everything syntax: path under root)
-        self._dll.Everything_SetSearchW(root_str)
+        search = str(root)
+        if query is not None:
+            search = " ".join([everything_path(query.base_dir(root)), *everything_terms(query)])
+        self._dll.Everything_SetSearchW(search)
         self._dll.Everything_SetMatchPath(1)
         self._dll.Everything_SetRequestFlags(
             EVERYTHING_REQUEST_FULL_PATH_AND_FILE_NAME
@@ -133,11 +164,14 @@ class EverythingSDKProvider(InventoryProvider):
         if not self._dll.Everything_QueryW(1):
             raise RuntimeError("Everything SDK query failed (is Everything running?).")
         n = self._dll.Everything_GetNumResults()
+        sampler = None
+        if self._trust_index and self._verify_fraction > 0:
+            sampler = DriftSampler(self._verify_fraction)
+            self.drift = sampler.report
         max_path = 32767
         buf = ctypes.create_unicode_buffer(max_path)
         size_val = ctypes.c_ulonglong()
         date_val = ctypes.c_ulonglong()
-        records: list[FileRecord] = []
         for i in range(n):
             if not self._dll.Everything_IsFileResult(i):
                 continue
@@ -147,22 +181,19 @@ class EverythingSDKProvider(InventoryProvider):
             if not path_str or "_meta" in path_str.replace("\\", "/").split("/"):
                 continue
             p = Path(path_str)
-            try:
-                if not p.is_file():
-                    continue
-                st = p.stat()
-            except OSError:
-                continue
-            size_bytes = st.st_size
-            mtime_ns = st.st_mtime_ns
-            if self._dll.Everything_GetResultSize(i, ctypes.byref(size_val)):
-                size_bytes = size_val.value
-            if self._dll.Everything_GetResultDateModified(i, ctypes.byref(date_val)) and date_val.value:
-                # Windows FILETIME (100-ns since 1601) -> ns since Unix epoch
-                ticks = date_val.value
-                mtime_ns = (ticks - _WIN_FILETIME_EPOCH_OFFSET) * 100
-            sha = sha256_file(p) if self._hash_files else None
-            records.append(
-                FileRecord(path=p, size_bytes=size_bytes, mtime_ns=mtime_ns, sha256=sha)
-            )
-        return records
+            has_size = self._dll.Everything_GetResultSize(i, ctypes.byref(size_val))
+            has_date = self._dll.Everything_GetResultDateModified(i, ctypes.byref(date_val))
+            if self._trust_index and has_size and has_date and date_val.value:
+                rec: FileRecord | None = FileRecord(
+                    path=p, size_bytes=size_val.value, mtime_ns=filetime_to_ns(date_val.value)
+                )
+                if sampler is not None:
+                    rec = sampler.check(rec)
+            else:
+                rec = stat_record(p)
+                if rec is not None and has_size:
+                    rec = replace(rec, size_bytes=size_val.value)
+                if rec is not None and has_date and date_val.value:
+                    rec = replace(rec, mtime_ns=filetime_to_ns(date_val.value))
+            if rec is not None:
+                yield rec
@@ -0,0 +1,155 @@
+"""Trust-index mode helpers: index-supplied metadata and sampled drift checks.
+
+In trust-index mode the Everything providers build FileRecords straight from the
+size/date-modified columns Everything already returns, instead of calling is_file()
+and stat() per result. A DriftSampler optionally stats a fraction of those records and
+reports how often the index disagrees with the disk.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import stat
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from ..models import FileRecord
+
+# Windows FILETIME: 100-nanosecond intervals since 1601-01-01
+# Epoch 1970 is 11644473600 seconds after 1601 -> 11644473600 * 10^7 ticks
+WIN_FILETIME_EPOCH_OFFSET = 116444736000000000  # ticks
+_FILETIME_MIN = 10**15  # values this large are FILETIME ticks, not Unix seconds
+MAX_DRIFT_EXAMPLES = 20
+
+
+@dataclass(frozen=True)
+class TrustOptions:
+    """How Everything backends build records; passed through backend discovery."""
+
+    trust_index: bool = False
+    verify_fraction: float = 0.0
+
+
+def filetime_to_ns(ticks: int) -> int:
+    """Windows FILETIME (100-ns ticks since 1601) -> ns since the Unix epoch."""
+    return (ticks - WIN_FILETIME_EPOCH_OFFSET) * 100
+
+
+def parse_date_modified(value: object) -> int | None:
+    """Everything date_modified (FILETIME ticks, number or string; or ISO 8601) -> ns."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        try:
+            value = int(value)
+        except ValueError:
+            try:
+                dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                return None
+            return int(dt.timestamp() * 1_000_000_000)
+    if isinstance(value, (int, float)):
+        if value >= _FILETIME_MIN:
+            return filetime_to_ns(int(value))
+        return int(value * 1_000_000_000)  # Unix seconds
+    return None
+
+
+def parse_size(value: object) -> int | None:
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)  # type: ignore[call-overload]
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class DriftReport:
+    """Outcome of sampled verification of index-supplied records."""
+
+    seen: int = 0
+    sampled: int = 0
+    missing: int = 0
+    size_mismatch: int = 0
+    mtime_mismatch: int = 0
+    examples: list[str] = field(default_factory=list)
+
+    @property
+    def drifted(self) -> int:
+        return self.missing + self.size_mismatch + self.mtime_mismatch
+
+    @property
+    def drift_rate(self) -> float:
+        return self.drifted / self.sampled if self.sampled else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "seen": self.seen,
+            "sampled": self.sampled,
+            "missing": self.missing,
+            "size_mismatch": self.size_mismatch,
+            "mtime_mismatch": self.mtime_mismatch,
+            "drift_rate": round(self.drift_rate, 6),
+            "examples": list(self.examples),
+        }
+
+
+class DriftSampler:
+    """Stat a fraction of trusted records and count disagreements.
+
+    check() returns the record to emit: unchanged when not sampled or in agreement,
+    corrected from the stat when it drifted, or None when the file is gone.
+    """
+
+    def __init__(self, fraction: float, *, seed: int | None = None) -> None:
+        if not 0.0 <= fraction <= 1.0:
+            raise ValueError("verify_fraction must be between 0 and 1")
+        self.fraction = fraction
+        self.report = DriftReport()
+        self._random = random.Random(seed)
+
+    def check(self, rec: FileRecord) -> FileRecord | None:
+        report = self.report
+        report.seen += 1
+        if self.fraction <= 0 or self._random.random() >= self.fraction:
+            return rec
+        report.sampled += 1
+        try:
+            st = os.stat(rec.path)
+        except OSError:
+            report.missing += 1
+            self._example(f"missing: {rec.path}")
+            return None
+        drift = False
+        if st.st_size != rec.size_bytes:
+            report.size_mismatch += 1
+            drift = True
+        if st.st_mtime_ns // 100 != rec.mtime_ns // 100:  # FILETIME has 100-ns resolution
+            report.mtime_mismatch += 1
+            drift = True
+        if not drift:
+            return rec
+        self._example(
+            f"drift: {rec.path} index=({rec.size_bytes}, {rec.mtime_ns}) "
+            f"disk=({st.st_size}, {st.st_mtime_ns})"
+        )
+        return FileRecord(path=rec.path, size_bytes=st.st_size, mtime_ns=st.st_mtime_ns)
+
+    def _example(self, line: str) -> None:
+        if len(self.report.examples) < MAX_DRIFT_EXAMPLES:
+            self.report.examples.append(line)
+
+
+def stat_record(path: Path) -> FileRecord | None:
+    """Record from the disk (non-trust mode); None if path is not a readable file."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return FileRecord(path=path, size_bytes=st.st_size, mtime_ns=st.st_mtime_ns)
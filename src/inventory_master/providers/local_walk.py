@@ -1,46 +1,147 @@
 from __future__ import annotations
 
 import os
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from typing import Protocol
 
-from ..hashing import sha256_file
+from ..hash_cache import HashCache
+from ..hashing import HashMode, hash_records
 from ..models import FileRecord
 from .base import InventoryProvider
+from .query import Query
 
+META_DIRNAME = "_meta"
 
-class LocalWalkProvider(InventoryProvider):
-    """Fallback provider (slow): walk the filesystem.
 
-    NOTE: This is read-only and does not watch; batch scan only.
-    """
+class StatLike(Protocol):
+    st_size: int
+    st_mtime_ns: int
 
-    def __init__(self, *, hash_files: bool = False) -> None:
-        self._hash_files = hash_files
 
-    def iter_files(self, root: Path) -> list[FileRecord]:
-        records: list[FileRecord] = []
-        root = root.resolve()
-        for dirpath, _, filenames in os.walk(root):
-            # skip _meta and any path under it
-            try:
-                rel = Path(dirpath).resolve().relative_to(root)
-            except ValueError:
-                continue
-            if "_meta" in rel.parts:
-                continue
-            for fn in filenames:
-                p = Path(dirpath) / fn
+# (path, stat) for a file, or (path, None) for a subdirectory to descend into.
+ListingEntry = tuple[str, StatLike | None]
+
+
+def scan_dir(path: str) -> list[ListingEntry]:
+    """List one directory with os.scandir, sorted by name.
+
+    Reuses the DirEntry type/stat data, prunes _meta by name, skips unreadable entries
+    and does not follow directory symlinks (same as os.walk's default).
+    """
+    entries: list[tuple[str, str, StatLike | None]] = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
                 try:
-                    st = p.stat()
+                    if entry.is_dir():
+                        if entry.name == META_DIRNAME or entry.is_symlink():
+                            continue
+                        entries.append((entry.name, entry.path, None))
+                    else:
+                        entries.append((entry.name, entry.path, entry.stat()))
                 except OSError:
                     continue
-                sha = sha256_file(p) if self._hash_files else None
-                records.append(
-                    FileRecord(
-                        path=p,
-                        size_bytes=st.st_size,
-                        mtime_ns=st.st_mtime_ns,
-                        sha256=sha,
-                    )
-                )
+    except OSError:
+        return []
+    entries.sort(key=lambda e: e[0])
+    return [(p, st) for _, p, st in entries]
+
+
+class LocalWalkProvider(InventoryProvider):
+    """Fallback provider (slow): walk the filesystem with os.scandir.
+
+    Records are yielded depth-first with each directory's entries sorted by name, so the
+    order is deterministic. With workers > 1, directory listings are prefetched on a
+    thread pool (useful on network mounts where listing latency dominates); the output
+    order is unchanged. With record_dirs, dir_mtimes maps every listed directory to its
+    mtime_ns (taken before listing), for callers that validate cached results later.
+
+    NOTE: This is read-only and batch scan only; see watch.py for live index updates.
+    """
+
+    def __init__(
+        self,
+        *,
+        hash_files: bool = False,
+        jobs: int = 1,
+        hash_mode: HashMode = "thread",
+        hash_cache: HashCache | None = None,
+        workers: int = 1,
+        prefetch_limit: int = 256,
+        record_dirs: bool = False,
+    ) -> None:
+        self._hash_files = hash_files
+        self._jobs = jobs
+        self._hash_mode = hash_mode
+        self._hash_cache = hash_cache
+        self._workers = workers
+        self._prefetch_limit = prefetch_limit
+        self.dir_mtimes: dict[str, int] | None = {} if record_dirs else None
+
+    def iter_files(self, root: Path) -> Iterator[FileRecord]:
+        return self._hashed(self._walk(root))
+
+    def iter_query(self, root: Path, query: Query) -> Iterator[FileRecord]:
+        # Walk only the prefix subtree; filter before hashing.
+        base = query.base_dir(root)
+        if query.path_prefix and not base.is_dir():
+            return iter(())
+        return self._hashed(query.filter(self._walk(base), root))
+
+    def _hashed(self, records: Iterator[FileRecord]) -> Iterator[FileRecord]:
+        if self._hash_files:
+            return hash_records(
+                records, jobs=self._jobs, mode=self._hash_mode, cache=self._hash_cache
+            )
         return records
+
+    def _list_dir(self, path: str) -> list[ListingEntry]:
+        """List one directory (may run on pool threads); subclasses can serve cached listings."""
+        if self.dir_mtimes is not None:
+            try:
+                self.dir_mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                return []
+        return scan_dir(path)
+
+    def _walk(self, root: Path) -> Iterator[FileRecord]:
+        root_str = str(root.resolve())
+        if self.dir_mtimes is not None:
+            self.dir_mtimes = {}
+        if self._workers <= 1:
+            yield from _depth_first(root_str, lambda path: iter(self._list_dir(path)))
+            return
+
+        with ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="scandir") as pool:
+            prefetched: dict[str, Future[list[ListingEntry]]] = {}
+
+            def listing(path: str) -> Iterator[ListingEntry]:
+                fut = prefetched.pop(path, None)
+                entries = fut.result() if fut is not None else self._list_dir(path)
+                # Queue subdirectory listings ahead of the depth-first consumer.
+                for sub, st in entries:
+                    if st is None and len(prefetched) < self._prefetch_limit:
+                        prefetched[sub] = pool.submit(self._list_dir, sub)
+                return iter(entries)
+
+            try:
+                yield from _depth_first(root_str, listing)
+            finally:
+                for fut in prefetched.values():
+                    fut.cancel()
+
+
+def _depth_first(
+    root: str, listing: Callable[[str], Iterator[ListingEntry]]
+) -> Iterator[FileRecord]:
+    stack = [listing(root)]
+    while stack:
+        for path, st in stack[-1]:
+            if st is None:
+                stack.append(listing(path))
+                break
+            yield FileRecord(path=Path(path), size_bytes=st.st_size, mtime_ns=st.st_mtime_ns)
+        else:
+            stack.pop()
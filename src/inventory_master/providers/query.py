@@ -0,0 +1,85 @@
+"""Provider-level inventory queries (filters pushed down to the backend)."""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from ..models import FileRecord
+
+
+@dataclass(frozen=True)
+class Query:
+    """Conjunctive file filter; None means "no condition".
+
+    extensions are lower-case suffixes with the dot (".tmp"); sizes are inclusive byte
+    bounds; modified_* are inclusive mtime bounds in ns; path_prefix is a directory
+    relative to the queried root, "/"-separated.
+    """
+
+    extensions: frozenset[str] | None = None
+    min_size: int | None = None
+    max_size: int | None = None
+    modified_after_ns: int | None = None
+    modified_before_ns: int | None = None
+    path_prefix: str | None = None
+
+    @property
+    def is_empty(self) -> bool:
+        return self == Query()
+
+    def base_dir(self, root: Path) -> Path:
+        """Directory the query is limited to (root itself without a path_prefix)."""
+        return root.joinpath(*self.path_prefix.split("/")) if self.path_prefix else root
+
+    def filter(self, records: Iterable[FileRecord], root: Path) -> Iterator[FileRecord]:
+        """In-process equivalent of the query, for providers without native filtering."""
+        prefix = None
+        if self.path_prefix:
+            prefix = os.path.normcase(str(self.base_dir(root.resolve()))).rstrip(os.sep) + os.sep
+        exts = self.extensions
+        lo_size = self.min_size if self.min_size is not None else -1
+        hi_size = self.max_size if self.max_size is not None else 1 << 63
+        lo_mtime = self.modified_after_ns if self.modified_after_ns is not None else -(1 << 63)
+        hi_mtime = self.modified_before_ns if self.modified_before_ns is not None else 1 << 63
+        for rec in records:
+            if exts is not None:
+                name = rec.path.name
+                i = name.rfind(".")
+                if (name[i:].lower() if 0 < i < len(name) - 1 else "") not in exts:
+                    continue
+            if not (lo_size <= rec.size_bytes <= hi_size and lo_mtime <= rec.mtime_ns <= hi_mtime):
+                continue
+            if prefix is not None and not os.path.normcase(str(rec.path)).startswith(prefix):
+                continue
+            yield rec
+
+
+def everything_terms(query: Query) -> list[str]:
+    """Translate query into Everything search terms (without the path part).
+
+    Everything compares dm: by local date, so date bounds are widened by a day; the
+    exact bounds are re-checked in-process on the returned records.
+    """
+    terms: list[str] = []
+    if query.extensions is not None:
+        terms.append("ext:" + ";".join(sorted(e.lstrip(".") for e in query.extensions)))
+    if query.min_size is not None:
+        terms.append(f"size:>={query.min_size}")
+    if query.max_size is not None:
+        terms.append(f"size:<={query.max_size}")
+    if query.modified_after_ns is not None:
+        day = datetime.fromtimestamp(query.modified_after_ns / 1e9) - timedelta(days=1)
+        terms.append(f"dm:>={day:%Y-%m-%d}")
+    if query.modified_before_ns is not None:
+        day = datetime.fromtimestamp(query.modified_before_ns / 1e9) + timedelta(days=1)
+        terms.append(f"dm:<={day:%Y-%m-%d}")
+    return terms
+
+
+def everything_path(path: Path) -> str:
+    """Quoted Everything path term matching everything under path."""
+    return '"' + str(path).rstrip("\\/") + '\\"'
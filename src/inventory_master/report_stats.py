@@ -0,0 +1,147 @@
+"""Single-pass inventory statistics for reports (bounded memory)."""
+
+from __future__ import annotations
+
+import heapq
+import time
+from bisect import bisect_right
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from .models import FileRecord
+
+TOP_EXTENSIONS = 30
+LARGEST_N = 20
+
+# Bucket i holds values < EDGES[i] (and >= EDGES[i-1]); the last bucket is open-ended.
+SIZE_EDGES: tuple[int, ...] = (1, 1 << 10, 64 << 10, 1 << 20, 16 << 20, 256 << 20, 1 << 30)
+SIZE_LABELS: tuple[str, ...] = (
+    "0 B",
+    "< 1 KiB",
+    "< 64 KiB",
+    "< 1 MiB",
+    "< 16 MiB",
+    "< 256 MiB",
+    "< 1 GiB",
+    ">= 1 GiB",
+)
+AGE_EDGES_DAYS: tuple[int, ...] = (1, 7, 30, 90, 365, 3 * 365)
+AGE_LABELS: tuple[str, ...] = (
+    "< 1 day",
+    "< 1 week",
+    "< 30 days",
+    "< 90 days",
+    "< 1 year",
+    "< 3 years",
+    ">= 3 years",
+)
+_NS_PER_DAY = 86_400 * 1_000_000_000
+
+
+@dataclass
+class ReportStats:
+    """Counters filled by add() (one record at a time) or by a bulk backend."""
+
+    now_ns: int = field(default_factory=time.time_ns)
+    largest_n: int = LARGEST_N
+    files: int = 0
+    bytes: int = 0
+    empty: int = 0
+    ext_count: Counter[str] = field(default_factory=Counter)
+    ext_bytes: Counter[str] = field(default_factory=Counter)
+    size_hist: list[int] = field(default_factory=lambda: [0] * len(SIZE_LABELS))
+    age_hist: list[int] = field(default_factory=lambda: [0] * len(AGE_LABELS))
+    # Extras only the columnar backend can afford (need every size / a group-by):
+    size_percentiles: dict[str, int] | None = None  # {"p50": bytes, ...}
+    top_dirs: list[tuple[str, int, int]] | None = None  # (directory, files, bytes)
+    _largest: list[tuple[int, str]] = field(default_factory=list, repr=False)
+
+    def update(self, records: Iterable[FileRecord]) -> ReportStats:
+        add = self.add
+        for rec in records:
+            add(rec)
+        return self
+
+    def add(self, rec: FileRecord) -> None:
+        size = rec.size_bytes
+        ext = rec.path.suffix.lower() or "<noext>"
+        self.files += 1
+        self.bytes += size
+        self.ext_count[ext] += 1
+        self.ext_bytes[ext] += size
+        if size == 0:
+            self.empty += 1
+        self.size_hist[bisect_right(SIZE_EDGES, size)] += 1
+        age_days = (self.now_ns - rec.mtime_ns) // _NS_PER_DAY
+        self.age_hist[bisect_right(AGE_EDGES_DAYS, age_days)] += 1
+        heap = self._largest
+        if len(heap) < self.largest_n:
+            heapq.heappush(heap, (size, str(rec.path)))
+        elif size > heap[0][0]:
+            heapq.heappushpop(heap, (size, str(rec.path)))
+
+    def add_largest(self, candidates: Iterable[tuple[int, str]]) -> None:
+        """Merge (size, path) candidates into the largest-N list (bulk backends)."""
+        for item in candidates:
+            if len(self._largest) < self.largest_n:
+                heapq.heappush(self._largest, item)
+            elif item[0] > self._largest[0][0]:
+                heapq.heappushpop(self._largest, item)
+
+    @property
+    def largest(self) -> list[tuple[int, str]]:
+        return sorted(self._largest, key=lambda t: (-t[0], t[1]))
+
+    def to_dict(self) -> dict[str, Any]:
+        top = self.ext_count.most_common()
+        extras: dict[str, Any] = {}
+        if self.size_percentiles is not None:
+            extras["size_percentiles"] = self.size_percentiles
+        if self.top_dirs is not None:
+            extras["top_dirs"] = [{"dir": d, "count": c, "bytes": b} for d, c, b in self.top_dirs]
+        return {
+            "files": self.files,
+            "bytes": self.bytes,
+            "empty": self.empty,
+            "extensions": [{"ext": e, "count": c, "bytes": self.ext_bytes[e]} for e, c in top],
+            "size_histogram": [
+                {"bucket": label, "count": c} for label, c in zip(SIZE_LABELS, self.size_hist)
+            ],
+            "age_histogram": [
+                {"bucket": label, "count": c} for label, c in zip(AGE_LABELS, self.age_hist)
+            ],
+            "largest": [{"path": p, "bytes": s} for s, p in self.largest],
+            **extras,
+        }
+
+    def to_markdown(self, title: str) -> str:
+        lines = [
+            f"# {title}",
+            "",
+            f"- files: {self.files}",
+            f"- bytes: {self.bytes}",
+            f"- empty files: {self.empty}",
+            "",
+            "## Top extensions",
+            "",
+            "| ext | count | bytes |",
+            "|---|---:|---:|",
+        ]
+        for e, c in self.ext_count.most_common(TOP_EXTENSIONS):
+            lines.append(f"| {e} | {c} | {self.ext_bytes[e]} |")
+        lines += ["", "## Size distribution", "", "| size | count |", "|---|---:|"]
+        lines += [f"| {label} | {c} |" for label, c in zip(SIZE_LABELS, self.size_hist)]
+        lines += ["", "## Age (last modified)", "", "| age | count |", "|---|---:|"]
+        lines += [f"| {label} | {c} |" for label, c in zip(AGE_LABELS, self.age_hist)]
+        lines += ["", f"## Largest {self.largest_n} files", "", "| bytes | path |", "|---:|---|"]
+        lines += [f"| {s} | {p} |" for s, p in self.largest]
+        if self.size_percentiles is not None:
+            lines += ["", "## Size percentiles", "", "| percentile | bytes |", "|---|---:|"]
+            lines += [f"| {k} | {v} |" for k, v in self.size_percentiles.items()]
+        if self.top_dirs is not None:
+            lines += ["", "## Largest directories", "", "| bytes | files | dir |"]
+            lines.append("|---:|---:|---|")
+            lines += [f"| {b} | {c} | {d} |" for d, c, b in self.top_dirs]
+        return "\n".join(lines)
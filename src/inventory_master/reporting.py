@@ -1,69 +1,110 @@
 from __future__ import annotations
 
 import json
-from collections import Counter
+from collections.abc import Iterable
 from datetime import datetime
 from pathlib import Path
 
+from .columnar import HAVE_NUMPY, ColumnarInventory
+from .inventory_index import InventoryIndex
 from .meta_paths import ensure_meta_layout
-from .providers.everything_es import EverythingESProvider, is_available as es_available
-from .providers.everything_http import EverythingHTTPProvider, is_available as http_available
-from .providers.everything_sdk import EverythingSDKProvider, is_available as sdk_available
+from .models import FileRecord
+from .providers.base import InventoryProvider
+from .providers.cached import DEFAULT_MAX_AGE_SEC, CachedProvider
+from .providers.discovery import demote, discover
+from .providers.index_trust import DriftReport, TrustOptions
 from .providers.local_walk import LocalWalkProvider
+from .report_stats import ReportStats
 
-# Type: any provider + backend name for fallback
-_ReportProvider = LocalWalkProvider | EverythingESProvider | EverythingHTTPProvider | EverythingSDKProvider
 
+def get_report_provider(
+    root: Path, trust: TrustOptions | None = None, *, max_age_sec: float = DEFAULT_MAX_AGE_SEC
+) -> tuple[InventoryProvider, str]:
+    """Return (provider, backend_name). Prefer ES > HTTP > SDK > Local.
 
-def _get_report_provider(root: Path) -> tuple[_ReportProvider, str]:
-    """Return (provider, backend_name). Prefer ES > HTTP > SDK > Local."""
-    if es_available():
-        try:
-            return EverythingESProvider(hash_files=False), "everything_es"
-        except (FileNotFoundError, RuntimeError):
-            pass
-    if http_available():
-        try:
-            return EverythingHTTPProvider(hash_files=False), "everything_http"
-        except (FileNotFoundError, RuntimeError):
-            pass
-    if sdk_available():
-        try:
-            return EverythingSDKProvider(hash_files=False), "everything_sdk"
-        except (FileNotFoundError, RuntimeError):
-            pass
-    return LocalWalkProvider(hash_files=False), "local"
+    Backends are probed concurrently and the winner is cached under _meta/inventory;
+    the provider serves the backend's cached listing while it is fresh (max_age_sec).
+    """
+    provider, backend = discover(root, trust=trust)
+    return CachedProvider(provider, backend=backend, max_age_sec=max_age_sec), backend
 
 
-def generate_report(root: Path) -> Path:
-    meta = ensure_meta_layout(root)
-    provider, backend = _get_report_provider(root)
+def rebuild_index(index: InventoryIndex, root: Path, trust: TrustOptions | None = None) -> int:
+    """Refresh an open index from the preferred backend, falling back to a local walk."""
+    provider, backend = discover(root, trust=trust)  # an explicit rebuild always rescans
     try:
-        records = provider.iter_files(root)
-    except (RuntimeError, OSError) as e:
-        if backend != "local":
-            provider = LocalWalkProvider(hash_files=False)
-            records = provider.iter_files(root)
-        else:
-            raise e
+        return index.refresh(provider, root, backend=backend)
+    except (RuntimeError, OSError):
+        if backend == "local":
+            raise
+        demote(root, backend)
+        return index.refresh(LocalWalkProvider(hash_files=False), root, backend="local")
+
+
+def refresh_index(root: Path, *, trust: TrustOptions | None = None) -> int:
+    """(Re)build the SQLite inventory index for root with the preferred backend."""
+    with InventoryIndex.for_root(root) as index:
+        return rebuild_index(index, root, trust)
+
 
-    ext = Counter([r.path.suffix.lower() or "<noext>" for r in records])
-    top_ext = ext.most_common(30)
+def _stats(records: Iterable[FileRecord], columnar: bool) -> ReportStats:
+    """Consume records into the report counters (one pass, or columns with NumPy)."""
+    if columnar:
+        return ColumnarInventory.from_records(records).stats()
+    return ReportStats().update(records)
+
+
+def generate_report(
+    root: Path,
+    *,
+    use_index: bool = False,
+    columnar: bool | None = None,
+    records: Iterable[FileRecord] | None = None,
+    trust: TrustOptions | None = None,
+) -> Path:
+    """Write a Markdown report plus a JSON sidecar (same name, .json) in one pass.
+
+    With use_index, records come from the SQLite index instead of a provider scan; the
+    index is refreshed first unless it is current (InventoryIndex.is_current).
+    columnar=None uses the NumPy columnar backend when NumPy is installed (it adds size
+    percentiles and per-directory totals); False forces the pure-Python path.
+    records supplies an inventory already in memory (the serve command) instead.
+    trust configures how Everything backends build records (TrustOptions); drift found
+    by its sampled verification is added to the JSON sidecar under "drift".
+    """
+    columnar = HAVE_NUMPY if columnar is None else columnar
+    meta = ensure_meta_layout(root)
+    drift: DriftReport | None = None
+    if records is not None:
+        stats = _stats(records, columnar)
+    elif use_index:
+        with InventoryIndex.for_root(root) as index:
+            if not index.is_current(root):
+                rebuild_index(index, root, trust)
+            if columnar:
+                stats = ColumnarInventory.from_index(index).stats()
+            else:
+                stats = _stats(index.iter_records(), False)
+    else:
+        provider, backend = get_report_provider(root, trust)
+        try:
+            stats = _stats(provider.iter_files(root), columnar)
+            drift = provider.drift
+        except (RuntimeError, OSError) as e:
+            if backend != "local":
+                # Backend failed mid-stream: discard partial counts and rescan locally.
+                demote(root, backend)
+                provider = CachedProvider(LocalWalkProvider(hash_files=False, record_dirs=True))
+                stats = _stats(provider.iter_files(root), columnar)
+            else:
+                raise e
 
     report_id = datetime.now().strftime("%Y-%m-%d")
     out_path = meta["reports"] / f"report_{report_id}.md"
-    lines = [
-        f"# Report {report_id}",
-        "",
-        f"- files: {len(records)}",
-        "",
-        "## Top extensions",
-        "",
-        "| ext | count |",
-        "|---|---:|",
-    ]
-    for e, c in top_ext:
-        lines.append(f"| {e} | {c} |")
-
-    out_path.write_text("\n".join(lines), encoding="utf-8")
+    markdown = stats.to_markdown(f"Report {report_id}")  # non-UTF-8 names shown escaped
+    out_path.write_text(markdown, encoding="utf-8", errors="backslashreplace")
+    payload = {"report_id": report_id, "root": str(root), **stats.to_dict()}
+    if drift is not None:
+        payload["drift"] = drift.to_dict()
+    out_path.with_suffix(".json").write_text(json.dumps(payload, indent=2), encoding="utf-8")
     return out_path
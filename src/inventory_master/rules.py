@@ -0,0 +1,306 @@
+"""Planner rules, compiled into combined matchers for one streaming pass.
+
+A rule matches a file when every condition it sets holds; the first matching rule (in
+declaration order) wins. Files already under a rule's own ``dst`` never match that rule.
+Conditions:
+
+- ``extensions``: list of suffixes (".tmp"), compared lower-cased
+- ``glob``: fnmatch pattern; matched against the file name, or against the relative
+  path ("/"-separated) when the pattern contains "/"
+- ``regex``: re.search against the relative path ("/"-separated)
+- ``path_prefix``: relative directory prefix ("build/cache")
+- ``min_size`` / ``max_size``: bytes, inclusive
+- ``older_than_days`` / ``newer_than_days``: by mtime
+- ``duplicate: true``: the file is a redundant copy of another candidate (see dupes.py;
+  the planner runs duplicate detection first when a rule needs it)
+
+Compilation builds one extension -> rule-bitmask table, a prefix trie over path
+components and one merged regex over every glob/regex, so the per-file cost is a few
+lookups regardless of how many rules are configured.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import json
+import re
+import time
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .models import ActionType, FileRecord
+from .providers.query import Query
+
+DEFAULT_DST = "99_QUARANTINE"
+DEFAULT_PROFILE = Path("config") / "project_profile.yaml"  # relative to the working directory
+_ACTIONS: frozenset[str] = frozenset({"move", "rename", "quarantine"})
+_NS_PER_DAY = 86_400 * 1_000_000_000
+_BACKREF = re.compile(r"\\[1-9]|\(\?P=")  # numbered or named backreference
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    action: ActionType = "quarantine"
+    dst: str = DEFAULT_DST  # destination directory, relative to root
+    extensions: frozenset[str] | None = None
+    glob: str | None = None
+    regex: str | None = None
+    path_prefix: str | None = None
+    min_size: int | None = None
+    max_size: int | None = None
+    older_than_days: float | None = None
+    newer_than_days: float | None = None
+    duplicate: bool = False
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> Rule:
+        known = set(cls.__dataclass_fields__)
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown rule keys: {sorted(unknown)}")
+        if "name" not in data:
+            raise ValueError("Rule needs a name")
+        fields = dict(data)
+        if fields.get("action", "quarantine") not in _ACTIONS:
+            raise ValueError(f"Unsupported rule action: {fields['action']!r}")
+        if fields.get("extensions") is not None:
+            fields["extensions"] = frozenset(_norm_ext(e) for e in fields["extensions"])
+        if fields.get("path_prefix") is not None:
+            fields["path_prefix"] = fields["path_prefix"].replace("\\", "/").strip("/")
+        return cls(**fields)
+
+
+DEFAULT_RULES: tuple[Rule, ...] = (Rule(name="tmp-bak", extensions=frozenset({".tmp", ".bak"})),)
+
+
+def _norm_ext(ext: str) -> str:
+    ext = ext.lower()
+    return ext if ext.startswith(".") else "." + ext
+
+
+def load_rules(path: Path) -> list[Rule]:
+    """Read rules from YAML (needs PyYAML) or JSON.
+
+    The document is either a list of rules or a mapping with a ``planner_rules`` list
+    (so config/project_profile.yaml can be passed as-is).
+    """
+    data = _rule_dicts(path)
+    if not isinstance(data, list) or not data:
+        raise ValueError(f"No planner rules found in {path}")
+    return [Rule.from_dict(d) for d in data]
+
+
+def profile_rules(path: Path = DEFAULT_PROFILE) -> list[Rule] | None:
+    """planner_rules from the project profile; None if it is absent, has none, or is
+    YAML and PyYAML is not installed (callers then use DEFAULT_RULES)."""
+    if not path.is_file():
+        return None
+    try:
+        data = _rule_dicts(path)
+    except RuntimeError:
+        return None
+    if not isinstance(data, list) or not data:
+        return None
+    return [Rule.from_dict(d) for d in data]
+
+
+def _rule_dicts(path: Path) -> Any:
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError("PyYAML is required for YAML rules (pip install PyYAML)") from None
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    if isinstance(data, Mapping):
+        data = data.get("planner_rules")
+    return data
+
+
+class _Trie:
+    __slots__ = ("children", "mask")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Trie] = {}
+        self.mask = 0
+
+
+class RuleSet:
+    """Rules compiled into combined matchers; see the module docstring."""
+
+    def __init__(self, rules: Iterable[Rule], *, now_ns: int | None = None) -> None:
+        self.rules = tuple(rules)
+        if not self.rules:
+            raise ValueError("RuleSet needs at least one rule")
+        now_ns = time.time_ns() if now_ns is None else now_ns
+        everything = (1 << len(self.rules)) - 1
+
+        # Extension table: rules without an extension condition match any extension.
+        self._ext_any = 0
+        self._ext: dict[str, int] = {}
+        # Prefix trie: rules without a prefix condition sit on the root node.
+        self._trie = _Trie()
+        # Destination trie: a rule never matches files already under its own dst.
+        self._dst_trie = _Trie()
+        # Glob/regex: one merged pattern as a pre-filter, then per-rule patterns.
+        self._pattern_mask = 0
+        self._patterns: dict[int, re.Pattern[str]] = {}
+        self._on_path: dict[int, bool] = {}  # False: glob matched against the file name
+        self._name_only = True
+        alternatives: list[str] = []
+        mergeable = True
+        # Size/age bounds as (lo, hi) on size_bytes and mtime_ns.
+        self._bounds: dict[int, tuple[int, int, int, int]] = {}
+
+        for i, rule in enumerate(self.rules):
+            bit = 1 << i
+            if rule.extensions is None:
+                self._ext_any |= bit
+            else:
+                for ext in rule.extensions:
+                    self._ext[ext] = self._ext.get(ext, 0) | bit
+
+            node = self._trie
+            if rule.path_prefix:
+                for part in rule.path_prefix.split("/"):
+                    node = node.children.setdefault(part, _Trie())
+            node.mask |= bit
+
+            node = self._dst_trie
+            for part in rule.dst.replace("\\", "/").strip("/").split("/"):
+                if part not in ("", "."):
+                    node = node.children.setdefault(part, _Trie())
+            if node is not self._dst_trie:
+                node.mask |= bit
+
+            if rule.glob is not None and rule.regex is not None:
+                raise ValueError(f"Rule {rule.name!r}: use either glob or regex, not both")
+            if rule.glob is not None:
+                source = "^" + fnmatch.translate(rule.glob)
+                self._on_path[i] = "/" in rule.glob
+            elif rule.regex is not None:
+                source = rule.regex
+                self._on_path[i] = True
+            else:
+                source = None
+            if source is not None:
+                self._pattern_mask |= bit
+                self._patterns[i] = re.compile(source)
+                self._name_only &= not self._on_path[i]
+                alternatives.append(f"(?:{source})")
+                if self._patterns[i].groups and _BACKREF.search(source):
+                    mergeable = False  # joined with "|", its group numbers would shift
+
+            lo_size = rule.min_size if rule.min_size is not None else -1
+            hi_size = rule.max_size if rule.max_size is not None else 1 << 63
+            lo_mtime, hi_mtime = -(1 << 63), 1 << 63
+            if rule.older_than_days is not None:
+                hi_mtime = now_ns - int(rule.older_than_days * _NS_PER_DAY)
+            if rule.newer_than_days is not None:
+                lo_mtime = now_ns - int(rule.newer_than_days * _NS_PER_DAY)
+            self._bounds[i] = (lo_size, hi_size, lo_mtime, hi_mtime)
+
+        # Names and relative paths are searched with one regex; a miss rules out every
+        # pattern rule at once. Globs are anchored, regexes are not.
+        self._merged: re.Pattern[str] | None = None
+        if alternatives and mergeable:
+            try:
+                self._merged = re.compile("|".join(alternatives))
+            except re.error:
+                pass  # e.g. inline global flags; fall back to per-rule patterns only
+        self._no_pattern = everything & ~self._pattern_mask
+        self._dup_mask = sum(1 << i for i, r in enumerate(self.rules) if r.duplicate)
+
+    @property
+    def needs_duplicates(self) -> bool:
+        return bool(self._dup_mask)
+
+    @property
+    def extensions(self) -> frozenset[str] | None:
+        """Union of extensions if every rule has an extension condition, else None."""
+        if self._ext_any:
+            return None
+        return frozenset(self._ext)
+
+    def query(self) -> Query:
+        """A provider Query matching a superset of what any rule matches.
+
+        Each condition is pushed down only when every rule sets it (taking the loosest
+        bound), so the backend returns at least all candidates; match() decides.
+        """
+        rules, bounds = self.rules, list(self._bounds.values())
+
+        def loosest(attr: str, pick: Callable[[Iterable[int]], int], i: int) -> int | None:
+            if any(getattr(r, attr) is None for r in rules):
+                return None
+            return pick(b[i] for b in bounds)
+
+        prefixes = [r.path_prefix.split("/") if r.path_prefix else [] for r in rules]
+        common: list[str] = []
+        for parts in zip(*prefixes):
+            if len(set(parts)) != 1:
+                break
+            common.append(parts[0])
+        return Query(
+            extensions=self.extensions,
+            min_size=loosest("min_size", min, 0),
+            max_size=loosest("max_size", max, 1),
+            modified_after_ns=loosest("newer_than_days", min, 2),
+            modified_before_ns=loosest("older_than_days", max, 3),
+            path_prefix="/".join(common) or None,
+        )
+
+    def match(self, rec: FileRecord, rel: str, *, duplicate: bool = False) -> Rule | None:
+        """First rule matching rec; rel is its root-relative path with "/" separators.
+
+        duplicate tells whether rec is a redundant copy (for ``duplicate`` rules).
+        """
+        name = rel.rpartition("/")[2]
+        i = name.rfind(".")
+        ext = name[i:].lower() if 0 < i < len(name) - 1 else ""
+        mask = self._ext_any | self._ext.get(ext, 0)
+        if not mask:
+            return None
+
+        parts = rel.split("/")[:-1]
+        node, prefix_mask = self._trie, self._trie.mask
+        for part in parts:
+            node = node.children.get(part)  # type: ignore[assignment]
+            if node is None:
+                break
+            prefix_mask |= node.mask
+        mask &= prefix_mask
+        node = self._dst_trie
+        for part in parts:
+            node = node.children.get(part)  # type: ignore[assignment]
+            if node is None:
+                break
+            mask &= ~node.mask
+        if not duplicate:
+            mask &= ~self._dup_mask
+        if not mask:
+            return None
+
+        if mask & self._pattern_mask and self._merged is not None:
+            hit = self._merged.search(name) or (not self._name_only and self._merged.search(rel))
+            if not hit:
+                mask &= self._no_pattern
+
+        size, mtime = rec.size_bytes, rec.mtime_ns
+        while mask:
+            low = mask & -mask
+            i = low.bit_length() - 1
+            mask ^= low
+            lo_size, hi_size, lo_mtime, hi_mtime = self._bounds[i]
+            if not (lo_size <= size <= hi_size and lo_mtime <= mtime <= hi_mtime):
+                continue
+            pattern = self._patterns.get(i)
+            if pattern is not None and not pattern.search(rel if self._on_path[i] else name):
+                continue
+            return self.rules[i]
+        return None
@@ -0,0 +1,257 @@
+"""Resident inventory server: answer report/plan/query requests from memory.
+
+``serve`` scans root once, keeps the records in memory and listens on a UNIX domain
+socket (_meta/inventory/serve.sock). The protocol is one JSON object per line each way:
+
+    {"op": "ping"}                          -> {"ok": true, "files": N, "backend": ...}
+    {"op": "report"}                        -> {"ok": true, "path": "<report .md>"}
+    {"op": "plan", "rules": "<file>"}       -> {"ok": true, "path": "<plan .json>"}
+    {"op": "query", "extensions": [".tmp"], "min_size": 1, "max_size": 2,
+     "path_prefix": "a/b", "newest": N | "largest": N | "limit": N}
+                                            -> {"ok": true, "records": [...]}
+    {"op": "refresh"}                       -> {"ok": true, "files": N}
+    {"op": "shutdown"}                      -> {"ok": true}
+
+Errors come back as {"ok": false, "error": "..."}. At most every check_interval seconds,
+a request first re-stats the directories recorded when the inventory was loaded and
+reloads it if any mtime changed. Like the in-process listing cache, the inventory is
+also reloaded once it is max_age_sec old, which picks up in-place edits. The report and
+plan commands use a running server automatically and fall back to running in-process
+when none answers.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from .meta_paths import ensure_meta_layout, meta_root
+from .models import FileRecord
+from .planner import generate_plan
+from .providers.cached import DEFAULT_MAX_AGE_SEC, CachedProvider
+from .providers.discovery import demote
+from .providers.index_trust import TrustOptions
+from .providers.local_walk import LocalWalkProvider
+from .providers.query import Query
+from .reporting import generate_report, get_report_provider
+from .rules import RuleSet, load_rules
+
+SOCKET_NAME = "serve.sock"
+HAVE_UNIX_SOCKETS = hasattr(socket, "AF_UNIX")
+CONNECT_TIMEOUT_SEC = 0.5
+REQUEST_TIMEOUT_SEC = 300.0
+DEFAULT_CHECK_INTERVAL_SEC = 2.0
+_QUERY_FIELDS = ("min_size", "max_size", "modified_after_ns", "modified_before_ns", "path_prefix")
+
+
+def socket_path(root: Path) -> Path:
+    return meta_root(root) / "inventory" / SOCKET_NAME
+
+
+def query_records(
+    records: Iterable[FileRecord],
+    root: Path,
+    query: Query,
+    *,
+    newest: int | None = None,
+    largest: int | None = None,
+    limit: int | None = None,
+) -> list[FileRecord]:
+    """Records matching query; the newest/largest N of them, or the first limit."""
+    matches = query.filter(records, root)
+    if newest is not None:
+        return heapq.nlargest(newest, matches, key=lambda r: r.mtime_ns)
+    if largest is not None:
+        return heapq.nlargest(largest, matches, key=lambda r: r.size_bytes)
+    if limit is not None:
+        return [r for _, r in zip(range(limit), matches)]
+    return list(matches)
+
+
+def _query_from(req: dict[str, Any]) -> Query:
+    fields = {k: req[k] for k in _QUERY_FIELDS if req.get(k) is not None}
+    if req.get("extensions") is not None:
+        fields["extensions"] = frozenset(e.lower() for e in req["extensions"])
+    return Query(**fields)
+
+
+class InventoryService:
+    """In-memory inventory of one root plus the request dispatcher."""
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        check_interval: float = DEFAULT_CHECK_INTERVAL_SEC,
+        max_age_sec: float = DEFAULT_MAX_AGE_SEC,
+        trust: TrustOptions | None = None,
+    ) -> None:
+        self.root = root.resolve()
+        self.trust = trust
+        self.backend = "local"
+        self.check_interval = check_interval
+        self.max_age_sec = max_age_sec
+        self._records: list[FileRecord] | None = None
+        self._dirs: dict[str, int] = {}  # directory mtimes as of our own load
+        self._listed_at = 0.0  # epoch seconds the loaded records were listed
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def records(self) -> list[FileRecord]:
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._records is None
+                or time.time() - self._listed_at >= self.max_age_sec  # in-place edits
+                or (now - self._checked_at >= self.check_interval and self._changed())
+            ):
+                self._load()
+            self._checked_at = now
+            assert self._records is not None
+            return self._records
+
+    def _changed(self) -> bool:
+        if not self._dirs:
+            return True  # the scan recorded no directories: nothing to compare against
+        root_str = str(self.root)
+        for rel, mtime_ns in self._dirs.items():
+            try:
+                if os.stat(os.path.join(root_str, rel)).st_mtime_ns != mtime_ns:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _load(self) -> None:
+        provider, backend = get_report_provider(self.root, self.trust, max_age_sec=self.max_age_sec)
+        assert isinstance(provider, CachedProvider)
+        try:
+            records = list(provider.iter_files(self.root))
+        except (RuntimeError, OSError):
+            if backend == "local":
+                raise
+            demote(self.root, backend)
+            provider = CachedProvider(
+                LocalWalkProvider(record_dirs=True), max_age_sec=self.max_age_sec
+            )
+            backend, records = "local", list(provider.iter_files(self.root))
+        self.backend, self._records, self._dirs = backend, records, dict(provider.dirs)
+        self._listed_at = provider.created_at
+
+    def handle(self, req: dict[str, Any]) -> dict[str, Any]:
+        op = req.get("op")
+        if op == "ping":
+            return {"files": len(self.records()), "backend": self.backend}
+        if op == "refresh":
+            with self._lock:
+                self._records = None
+            return {"files": len(self.records())}
+        if op == "report":
+            return {"path": str(generate_report(self.root, records=self.records()))}
+        if op == "plan":
+            rules = RuleSet(load_rules(Path(req["rules"]))) if req.get("rules") else None
+            return {"path": str(generate_plan(self.root, rules=rules, records=self.records()))}
+        if op == "query":
+            found = query_records(
+                self.records(),
+                self.root,
+                _query_from(req),
+                newest=req.get("newest"),
+                largest=req.get("largest"),
+                limit=req.get("limit"),
+            )
+            return {
+                "records": [
+                    {"path": str(r.path), "size_bytes": r.size_bytes, "mtime_ns": r.mtime_ns}
+                    for r in found
+                ]
+            }
+        raise ValueError(f"Unknown op: {op!r}")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: _Server
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                req = json.loads(line)
+                if req.get("op") == "shutdown":
+                    resp: dict[str, Any] = {"ok": True}
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                else:
+                    resp = {"ok": True, **self.server.service.handle(req)}
+            except Exception as e:  # reported to the client; the server keeps running
+                resp = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(resp, ensure_ascii=False).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+if HAVE_UNIX_SOCKETS:
+
+    class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def __init__(self, path: str, service: InventoryService) -> None:
+            self.service = service
+            super().__init__(path, _Handler)
+
+
+def serve(
+    root: Path,
+    *,
+    ready: threading.Event | None = None,
+    check_interval: float = DEFAULT_CHECK_INTERVAL_SEC,
+    trust: TrustOptions | None = None,
+) -> None:
+    """Load root's inventory and answer requests until a shutdown request or Ctrl+C."""
+    if not HAVE_UNIX_SOCKETS:
+        raise RuntimeError("serve needs UNIX domain sockets (not available on this platform)")
+    path = ensure_meta_layout(root)["inventory"] / SOCKET_NAME
+    if request(root, {"op": "ping"}) is not None:
+        raise RuntimeError(f"A server is already running on {path}")
+    path.unlink(missing_ok=True)  # stale socket from a server that did not exit cleanly
+    service = InventoryService(root, check_interval=check_interval, trust=trust)
+    service.records()
+    server = _Server(str(path), service)
+    try:
+        if ready is not None:
+            ready.set()
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        path.unlink(missing_ok=True)
+
+
+def request(root: Path, req: dict[str, Any]) -> dict[str, Any] | None:
+    """Send one request to root's server; None if no server answered or it failed."""
+    path = socket_path(root)
+    if not HAVE_UNIX_SOCKETS or not path.exists():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT_SEC)
+            sock.connect(str(path))
+            sock.settimeout(REQUEST_TIMEOUT_SEC)
+            sock.sendall(json.dumps(req).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+    except OSError:
+        return None
+    try:
+        resp = json.loads(line)
+    except ValueError:
+        return None
+    return resp if resp.get("ok") else None
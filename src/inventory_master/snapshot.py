@@ -1,30 +1,255 @@
 from __future__ import annotations
 
 import json
-from dataclasses import asdict
+import os
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field, replace
 from pathlib import Path
+from typing import NamedTuple
 
-from .hashing import sha256_file
+from .hash_cache import RACY_WINDOW_NS, HashCache
+from .hashing import HashMode, hash_records
+from .meta_paths import meta_root
 from .models import FileRecord
-from .providers.local_walk import LocalWalkProvider
-
-
-def create_snapshot(root: Path, snapshot_path: Path, *, hash_files: bool = True) -> list[FileRecord]:
-    provider = LocalWalkProvider(hash_files=hash_files)
-    records = provider.iter_files(root)
-    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
-    payload = [
-        {
-            "path": str(r.path.relative_to(root)),
-            "size_bytes": r.size_bytes,
-            "mtime_ns": r.mtime_ns,
-            "sha256": r.sha256,
-        }
-        for r in records
+from .providers.cached import CachedProvider, fresh_backends
+from .providers.local_walk import ListingEntry, LocalWalkProvider, scan_dir
+from .snapshot_format import SnapshotWriter, is_snapshot_name, iter_snapshot
+
+DIRS_SUFFIX = ".dirs.json"
+CHANGES_SUFFIX = ".changes.json"
+_UNTRUSTED_MTIME = -1  # recorded for dirs whose mtime must not be trusted; never matches
+
+
+class _Stat(NamedTuple):
+    st_size: int
+    st_mtime_ns: int
+
+
+@dataclass
+class SnapshotChanges:
+    """Summary of an incremental snapshot relative to the previous one."""
+
+    previous: Path | None
+    added: list[str] = field(default_factory=list)
+    modified: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: int = 0
+    rehashed: int = 0
+    dirs_reused: int = 0
+
+
+class _SnapshotWalk(LocalWalkProvider):
+    """LocalWalkProvider that records directory mtimes and reuses unchanged listings.
+
+    A directory whose mtime matches the previous snapshot has the same set of entries,
+    so its listing is rebuilt from the previous snapshot instead of calling scandir.
+    Files in it are still stat'ed (in-place edits do not touch the directory mtime)
+    unless trust_dir_mtime is set, in which case the previous size/mtime are reused.
+
+    A directory modified within RACY_WINDOW_NS of the walk's start may change again
+    within the same mtime tick, so its mtime is not trusted: it is recorded as
+    _UNTRUSTED_MTIME, which keeps it in its parent's reusable listing but forces a rescan.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        prev_dirs: dict[str, int],
+        prev_children: dict[str, list[tuple[str, _Stat | None]]],
+        trust_dir_mtime: bool,
+        workers: int,
+    ) -> None:
+        super().__init__(workers=workers)
+        self._root_str = str(root)
+        self._prev_dirs = prev_dirs
+        self._prev_children = prev_children
+        self._trust_dir_mtime = trust_dir_mtime
+        self.dirs: dict[str, int] = {}
+        self.dirs_reused = 0
+        self._racy_after_ns = time.time_ns() - RACY_WINDOW_NS
+
+    def _list_dir(self, path: str) -> list[ListingEntry]:
+        rel = os.path.relpath(path, self._root_str)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns  # stat before listing: later changes rescan
+        except OSError:
+            self.dirs[rel] = _UNTRUSTED_MTIME
+            return []
+        if mtime_ns >= self._racy_after_ns:
+            self.dirs[rel] = _UNTRUSTED_MTIME
+            return scan_dir(path)
+        self.dirs[rel] = mtime_ns
+        children = self._prev_children.get(rel)
+        if children is None or self._prev_dirs.get(rel) != mtime_ns:
+            return scan_dir(path)
+
+        self.dirs_reused += 1
+        entries: list[ListingEntry] = []
+        for name, prev in children:
+            child = os.path.join(path, name)
+            if prev is None or self._trust_dir_mtime:
+                entries.append((child, prev))
+                continue
+            try:
+                entries.append((child, os.stat(child)))
+            except OSError:
+                continue
+        return entries
+
+
+def _dirs_path(snapshot_path: Path) -> Path:
+    return snapshot_path.with_name(snapshot_path.name + DIRS_SUFFIX)
+
+
+def latest_snapshot(root: Path, *, exclude: Path | None = None) -> Path | None:
+    """Return the most recently written snapshot under _meta/snapshots/, if any."""
+    snap_dir = meta_root(root) / "snapshots"
+    if not snap_dir.is_dir():
+        return None
+    candidates = [
+        p for p in snap_dir.iterdir() if is_snapshot_name(p.name) and p != exclude and p.is_file()
     ]
-    snapshot_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
-    return records
+    return max(candidates, key=lambda p: p.stat().st_mtime_ns, default=None)
+
+
+def _write_snapshot(
+    root: Path, snapshot_path: Path, records: Iterator[FileRecord], dirs: dict[str, int] | None
+) -> int:
+    with SnapshotWriter(snapshot_path, root=root) as w:
+        for r in records:
+            w.write(str(r.path.relative_to(root)), r.size_bytes, r.mtime_ns, r.sha256)
+    if dirs is not None:
+        _dirs_path(snapshot_path).write_text(
+            json.dumps({"root": str(root), "dirs": dirs}), encoding="utf-8"
+        )
+    return w.count
+
+
+def create_snapshot(
+    root: Path,
+    snapshot_path: Path,
+    *,
+    hash_files: bool = True,
+    jobs: int = 1,
+    hash_mode: HashMode = "thread",
+    use_hash_cache: bool = True,
+    scan_workers: int = 1,
+) -> int:
+    """Stream a snapshot of root to snapshot_path; returns the number of records written.
+
+    Records are written as they are produced by the provider, so memory stays bounded
+    regardless of tree size. The format follows the suffix of snapshot_path: compact
+    .jsonl / .jsonl.gz / .jsonl.xz, or a .json array (see snapshot_format).
+    With jobs > 1, hashing overlaps the directory walk on a worker pool; record order
+    in the output is the same as with jobs=1. With use_hash_cache, unchanged files are
+    served from the persistent hash cache under _meta/inventory/ instead of being reread.
+    Directory mtimes are written to a <snapshot>.dirs.json sidecar for incremental runs.
+    A fresh cached inventory listing (see providers.cached) replaces the directory walk;
+    its files are still stat'ed.
+    """
+    root = root.resolve()
+    cache = HashCache.for_root(root) if hash_files and use_hash_cache else None
+    walk = CachedProvider(
+        LocalWalkProvider(workers=scan_workers, record_dirs=True),
+        backend=next(iter(fresh_backends(root, ordered=True)), "local"),
+        stat_files=True,
+    )
+    records = walk.iter_files(root)
+    if hash_files:
+        records = hash_records(records, jobs=jobs, mode=hash_mode, cache=cache)
+    count = _write_snapshot(root, snapshot_path, records, walk.dirs)
+    if cache is not None:
+        cache.save()
+    return count
+
+
+def create_incremental_snapshot(
+    root: Path,
+    snapshot_path: Path,
+    *,
+    previous: Path | None = None,
+    trust_dir_mtime: bool = False,
+    jobs: int = 1,
+    hash_mode: HashMode = "thread",
+    scan_workers: int = 1,
+) -> SnapshotChanges:
+    """Write a hashed snapshot, reusing work from the previous one.
+
+    previous defaults to the latest snapshot in _meta/snapshots/. Directories whose
+    mtime is unchanged are not re-listed, and files whose size and mtime_ns are unchanged
+    keep their previous sha256; only new or modified files are hashed. A change summary
+    is written next to the snapshot as <snapshot>.changes.json.
+    """
+    root = root.resolve()
+    if previous is None:
+        previous = latest_snapshot(root, exclude=snapshot_path)
+    changes = SnapshotChanges(previous=previous)
+
+    prev_files: dict[str, tuple[int, int, str | None]] = {}
+    prev_dirs: dict[str, int] = {}
+    prev_children: dict[str, list[tuple[str, _Stat | None]]] = {}
+    if previous is not None:
+        for item in iter_snapshot(previous):
+            prev_files[item["path"]] = (item["size_bytes"], item["mtime_ns"], item["sha256"])
+        dirs_file = _dirs_path(previous)
+        if dirs_file.exists():
+            prev_dirs = json.loads(dirs_file.read_text(encoding="utf-8"))["dirs"]
+            for rel, (size, mtime_ns, _) in prev_files.items():
+                parent, name = os.path.split(rel)
+                prev_children.setdefault(parent or ".", []).append((name, _Stat(size, mtime_ns)))
+            for rel in prev_dirs:
+                if rel != ".":
+                    parent, name = os.path.split(rel)
+                    prev_children.setdefault(parent or ".", []).append((name, None))
+            for entries in prev_children.values():
+                entries.sort(key=lambda e: e[0])
+
+    walk = _SnapshotWalk(
+        root,
+        prev_dirs=prev_dirs,
+        prev_children=prev_children,
+        trust_dir_mtime=trust_dir_mtime,
+        workers=scan_workers,
+    )
+
+    def _reuse(records: Iterator[FileRecord]) -> Iterator[FileRecord]:
+        for r in records:
+            rel = str(r.path.relative_to(root))
+            prev = prev_files.pop(rel, None)
+            if prev is None:
+                changes.added.append(rel)
+            elif prev[0] == r.size_bytes and prev[1] == r.mtime_ns:
+                changes.unchanged += 1
+                if prev[2]:
+                    r = replace(r, sha256=prev[2])
+            else:
+                changes.modified.append(rel)
+            if r.sha256 is None:
+                changes.rehashed += 1
+            yield r
+
+    records = hash_records(_reuse(walk.iter_files(root)), jobs=jobs, mode=hash_mode)
+    _write_snapshot(root, snapshot_path, records, walk.dirs)
+    changes.removed = sorted(prev_files)
+    changes.dirs_reused = walk.dirs_reused
+
+    summary = {
+        "previous": str(previous) if previous else None,
+        "added": changes.added,
+        "modified": changes.modified,
+        "removed": changes.removed,
+        "unchanged": changes.unchanged,
+        "rehashed": changes.rehashed,
+        "dirs_reused": changes.dirs_reused,
+    }
+    snapshot_path.with_name(snapshot_path.name + CHANGES_SUFFIX).write_text(
+        json.dumps(summary, indent=2), encoding="utf-8"
+    )
+    return changes
 
 
 def load_snapshot(snapshot_path: Path) -> list[dict]:
-    return json.loads(snapshot_path.read_text(encoding="utf-8"))
+    """Load a whole snapshot; prefer snapshot_format.iter_snapshot for large trees."""
+    return list(iter_snapshot(snapshot_path))
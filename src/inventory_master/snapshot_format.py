@@ -0,0 +1,195 @@
+"""On-disk snapshot formats: compact line-delimited records and the legacy JSON array.
+
+The format is chosen by file suffix:
+
+- ``.jsonl`` / ``.jsonl.gz`` / ``.jsonl.xz``: one header line, then one compact
+  ``[path, size_bytes, mtime_ns, sha256]`` array per line, sorted by path components.
+  Uncompressed files support O(log n) point lookup by binary search over byte offsets.
+- ``.json``: a JSON array of record objects (export / backwards compatibility).
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import lzma
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from typing import IO, Any
+
+FORMAT_NAME = "inventory_master.snapshot"
+FORMAT_VERSION = 1
+SNAPSHOT_SUFFIXES = (".json", ".jsonl", ".jsonl.gz", ".jsonl.xz")
+
+
+def is_snapshot_name(name: str) -> bool:
+    return name.endswith(SNAPSHOT_SUFFIXES) and not name.endswith((".dirs.json", ".changes.json"))
+
+
+def _is_json_array(path: Path) -> bool:
+    return path.name.endswith(".json")
+
+
+def _open_text(path: Path, mode: str) -> IO[str]:
+    name = path.name.removesuffix(".tmp")
+    if name.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if name.endswith(".xz"):
+        return lzma.open(path, mode + "t", encoding="utf-8")
+    return path.open(mode, encoding="utf-8")
+
+
+def path_key(rel: str) -> list[str]:
+    """Sort key matching the walker's order (depth-first, entries sorted by name)."""
+    return rel.split(os.sep)
+
+
+class SnapshotWriter:
+    """Streaming snapshot writer; the file appears atomically when the context exits.
+
+    Compact (.jsonl*) snapshots must receive records in path_key order, which is the
+    order LocalWalkProvider produces; out-of-order input raises ValueError.
+    """
+
+    def __init__(self, path: Path, *, root: Path) -> None:
+        self._path = path
+        self._root = root
+        self._tmp = path.with_name(path.name + ".tmp")
+        self._json_array = _is_json_array(path)
+        self._f: IO[str] | None = None
+        self._last_key: list[str] | None = None
+        self.count = 0
+
+    def __enter__(self) -> SnapshotWriter:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = _open_text(self._tmp, "w")
+        if self._json_array:
+            self._f.write("[")
+        else:
+            header = {
+                "format": FORMAT_NAME,
+                "version": FORMAT_VERSION,
+                "root": str(self._root),
+                "order": "path_parts",
+            }
+            self._f.write(json.dumps(header) + "\n")
+        return self
+
+    def write(self, rel: str, size_bytes: int, mtime_ns: int, sha256: str | None) -> None:
+        assert self._f is not None
+        if self._json_array:
+            item = {"path": rel, "size_bytes": size_bytes, "mtime_ns": mtime_ns, "sha256": sha256}
+            self._f.write(",\n" if self.count else "\n")
+            self._f.write(json.dumps(item))
+        else:
+            key = path_key(rel)
+            if self._last_key is not None and key <= self._last_key:
+                raise ValueError(f"Snapshot records out of order at: {rel}")
+            self._last_key = key
+            self._f.write(json.dumps([rel, size_bytes, mtime_ns, sha256]))
+            self._f.write("\n")
+        self.count += 1
+
+    def __exit__(self, exc_type: object, *exc: object) -> None:
+        assert self._f is not None
+        if self._json_array:
+            self._f.write("\n]\n")
+        self._f.close()
+        if exc_type is None:
+            self._tmp.replace(self._path)
+        else:
+            self._tmp.unlink(missing_ok=True)
+
+
+def _record(row: list[Any]) -> dict:
+    return {"path": row[0], "size_bytes": row[1], "mtime_ns": row[2], "sha256": row[3]}
+
+
+def read_header(path: Path) -> dict | None:
+    """Return the header of a compact snapshot (None for the JSON array format)."""
+    if _is_json_array(path):
+        return None
+    with _open_text(path, "r") as f:
+        return json.loads(f.readline())
+
+
+def iter_snapshot(path: Path) -> Iterator[dict]:
+    """Stream snapshot records as dicts (path, size_bytes, mtime_ns, sha256)."""
+    if not _is_json_array(path):
+        with _open_text(path, "r") as f:
+            header = json.loads(f.readline())
+            if header.get("format") != FORMAT_NAME:
+                raise ValueError(f"Not an inventory_master snapshot: {path}")
+            for line in f:
+                if line.strip():
+                    yield _record(json.loads(line))
+        return
+
+    # JSON arrays written by SnapshotWriter hold one record per line and can be
+    # streamed; anything else (e.g. pretty-printed) is parsed in one go.
+    with path.open("r", encoding="utf-8") as f:
+        if f.readline().strip() == "[":
+            yielded = False
+            for line in f:
+                line = line.strip().rstrip(",")
+                if not line or line == "]":
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    if yielded:
+                        raise
+                    break
+                yielded = True
+                yield item
+            else:
+                return
+    yield from json.loads(path.read_text(encoding="utf-8"))
+
+
+def lookup_snapshot(path: Path, rel: str) -> dict | None:
+    """Find one record by relative path.
+
+    Uncompressed .jsonl snapshots are binary-searched over byte offsets (O(log n) reads);
+    compressed and JSON array snapshots fall back to a streaming scan.
+    """
+    if not path.name.endswith(".jsonl"):
+        return next((r for r in iter_snapshot(path) if r["path"] == rel), None)
+
+    target = path_key(rel)
+    with path.open("rb") as f:
+        header = f.readline()
+        if json.loads(header).get("order") != "path_parts":
+            return next((r for r in iter_snapshot(path) if r["path"] == rel), None)
+        data_start = len(header)
+        lo, hi = data_start, f.seek(0, os.SEEK_END)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            # First line starting at or after mid.
+            f.seek(max(mid - 1, data_start - 1))
+            f.readline()
+            line = f.readline()
+            end = f.tell()
+            if not line.strip():
+                hi = mid
+                continue
+            row = json.loads(line)
+            key = path_key(row[0])
+            if key == target:
+                return _record(row)
+            if key < target:
+                lo = end
+            else:
+                hi = mid
+    return None
+
+
+def export_snapshot_json(src: Path, dst: Path) -> int:
+    """Re-write any snapshot as the JSON array format; returns the record count."""
+    header = read_header(src)
+    root = Path(header["root"]) if header else Path(".")
+    with SnapshotWriter(dst, root=root) as w:
+        for r in iter_snapshot(src):
+            w.write(r["path"], r["size_bytes"], r["mtime_ns"], r["sha256"])
+    return w.count
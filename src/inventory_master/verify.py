@@ -0,0 +1,111 @@
+"""Verification strategies for executor moves.
+
+- ``identity``: same st_dev/st_ino/size/mtime after the rename (same filesystem only;
+  a rename never touches file data, so no bytes are read).
+- ``hash``: SHA-256 before and after (used for cross-device transfers).
+- ``snapshot``: the "before" hash is taken from a snapshot written by create_snapshot
+  (when size and mtime still match), only the destination is read.
+- ``size``: size check only (policy.require_hash_verify = false).
+
+``auto`` picks ``identity`` for same-device moves and ``hash`` otherwise.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal
+
+from .hash_cache import HashCache
+from .hashing import sha256_file
+from .snapshot_format import lookup_snapshot
+
+VerifyStrategy = Literal["auto", "identity", "hash", "snapshot", "size"]
+STRATEGIES: tuple[str, ...] = ("auto", "identity", "hash", "snapshot", "size")
+
+
+def resolve_strategy(requested: str, *, require_hash: bool, same_device: bool) -> str:
+    """Return the concrete strategy for one action."""
+    if requested not in STRATEGIES:
+        raise ValueError(f"Unknown verify strategy: {requested!r}")
+    if not require_hash or requested == "size":
+        return "size"
+    if requested == "auto":
+        return "identity" if same_device else "hash"
+    if requested == "identity" and not same_device:
+        return "hash"  # inode identity cannot survive a cross-device copy
+    return requested
+
+
+def is_same_device(src_st: os.stat_result, dst: Path) -> bool:
+    """Whether dst's nearest existing ancestor is on src's device (a hint; creates nothing)."""
+    for parent in dst.parents:
+        try:
+            return parent.stat().st_dev == src_st.st_dev
+        except OSError:
+            continue
+    return False
+
+
+class SnapshotHashes:
+    """Point lookups of recorded hashes in a snapshot (O(log n) for .jsonl)."""
+
+    def __init__(self, snapshot_path: Path, root: Path) -> None:
+        self._path = snapshot_path
+        self._root = root.resolve()
+
+    def lookup(self, src: Path, st: os.stat_result) -> str | None:
+        try:
+            rel = str(src.resolve().relative_to(self._root))
+        except ValueError:
+            return None
+        rec = lookup_snapshot(self._path, rel)
+        if rec is None or rec["size_bytes"] != st.st_size or rec["mtime_ns"] != st.st_mtime_ns:
+            return None
+        return rec["sha256"]
+
+
+@dataclass(frozen=True)
+class PreState:
+    st: os.stat_result
+    sha256: str | None
+    hash_source: str | None = None  # "snapshot" | "cache" | "read"
+
+
+def capture(
+    src: Path,
+    strategy: str,
+    *,
+    st: os.stat_result | None = None,
+    hash_cache: HashCache | None = None,
+    snapshot: SnapshotHashes | None = None,
+) -> PreState:
+    st = st or src.stat()
+    if strategy not in ("hash", "snapshot"):
+        return PreState(st=st, sha256=None)
+    if strategy == "snapshot" and snapshot is not None:
+        sha = snapshot.lookup(src, st)
+        if sha:
+            return PreState(st=st, sha256=sha, hash_source="snapshot")
+    if hash_cache is not None:
+        return PreState(st=st, sha256=hash_cache.sha256(src), hash_source="cache")
+    return PreState(st=st, sha256=sha256_file(src), hash_source="read")
+
+
+def check(pre: PreState, dst: Path, strategy: str) -> tuple[bool, os.stat_result, str | None]:
+    """Verify dst against pre; returns (ok, dst stat, dst hash if one was read)."""
+    post = dst.stat()
+    if post.st_size != pre.st.st_size:
+        return False, post, None
+    if strategy == "identity":
+        same = (post.st_dev, post.st_ino, post.st_mtime_ns) == (
+            pre.st.st_dev,
+            pre.st.st_ino,
+            pre.st.st_mtime_ns,
+        )
+        return same, post, None
+    if strategy in ("hash", "snapshot"):
+        post_hash = sha256_file(dst)
+        return post_hash == pre.sha256, post, post_hash
+    return True, post, None
@@ -0,0 +1,333 @@
+"""Keep the SQLite inventory index current: initial scan, then live deltas.
+
+On Linux, every directory under root gets an inotify watch (via ctypes; no extra
+dependency) and create/modify/move/delete events are applied to the index in small
+debounced batches. Where inotify is unavailable, or the per-user watch limit
+(fs.inotify.max_user_watches) is hit, the index is refreshed by periodic scandir
+polling instead. Reports and plans read the result with --use-index; while inotify
+keeps the index live, the watcher's heartbeat lets them skip revalidating it.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import stat
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from .inventory_index import WATCH_HEARTBEAT_SEC, InventoryIndex
+from .models import FileRecord
+from .providers.local_walk import META_DIRNAME, LocalWalkProvider
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+    | IN_DONT_FOLLOW
+)
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len; then len bytes of NUL-padded name
+_LIMIT_ERRNOS = (errno.ENOSPC, errno.ENOMEM, errno.EMFILE)
+
+DEFAULT_POLL_INTERVAL = 60.0
+DEFAULT_DEBOUNCE = 0.2
+
+
+class WatchLimitError(OSError):
+    """inotify cannot watch the whole tree (watch or instance limit reached)."""
+
+
+class _Inotify:
+    """Minimal inotify binding over libc."""
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path: str) -> int:
+        wd = self._add(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            cls = WatchLimitError if err in _LIMIT_ERRNOS else OSError
+            raise cls(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._rm(self.fd, wd)  # EINVAL if the kernel already dropped it; nothing to do
+
+    def read(self, timeout: float) -> list[tuple[int, int, str]]:
+        """(wd, mask, name) events, waiting up to timeout seconds for the first one."""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        pos = 0
+        while pos < len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, pos)
+            pos += _EVENT.size
+            name = os.fsdecode(data[pos : pos + length].rstrip(b"\0"))
+            pos += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def inotify_available() -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        _Inotify().close()
+    except (OSError, AttributeError):  # AttributeError: libc without inotify symbols
+        return False
+    return True
+
+
+@dataclass
+class WatchStats:
+    mode: str = "inotify"  # or "poll"
+    events: int = 0
+    upserts: int = 0
+    deletes: int = 0
+    rescans: int = 0  # full refreshes (initial scan, queue overflow, polling)
+
+
+class Watcher:
+    """Apply filesystem changes under root to an InventoryIndex until stopped."""
+
+    def __init__(
+        self,
+        root: Path,
+        index: InventoryIndex,
+        *,
+        use_inotify: bool = True,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        debounce: float = DEFAULT_DEBOUNCE,
+    ) -> None:
+        self.root = root.resolve()
+        self.index = index
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.stats = WatchStats(mode="inotify" if use_inotify else "poll")
+        self._ino: _Inotify | None = None
+        self._wds: dict[int, str] = {}
+        self._paths: dict[str, int] = {}
+        self.ready = threading.Event()  # set after the initial scan
+        self._beat = 0.0
+
+    def run(self, stop: threading.Event) -> WatchStats:
+        if self.stats.mode == "inotify":
+            try:
+                self._ino = _Inotify()
+                self._watch_tree(str(self.root))  # watch first, then scan: no gap
+            except (OSError, AttributeError):
+                self._close()
+                self.stats.mode = "poll"
+        self._rescan()
+        self.ready.set()
+        try:
+            if self._ino is not None:
+                self._run_inotify(stop)
+            if self._ino is None:  # never had inotify, or fell back mid-run
+                while not stop.wait(self.poll_interval):
+                    self._rescan()
+        finally:
+            self._close()
+        return self.stats
+
+    def _heartbeat(self) -> None:
+        now = time.monotonic()
+        if now - self._beat >= WATCH_HEARTBEAT_SEC:
+            self.index.mark_watched()
+            self._beat = now
+
+    def _close(self) -> None:
+        if self._beat:
+            self.index.mark_watched(False)  # polling (or nothing) no longer keeps it live
+            self._beat = 0.0
+        if self._ino is not None:
+            self._ino.close()
+            self._ino = None
+        self._wds.clear()
+        self._paths.clear()
+
+    def _rescan(self) -> None:
+        self.index.refresh(LocalWalkProvider(), self.root, backend="watch")
+        self.stats.rescans += 1
+
+    def _watch_tree(self, top: str) -> None:
+        assert self._ino is not None
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            try:
+                wd = self._ino.add_watch(path)
+            except WatchLimitError:
+                raise
+            except OSError:
+                continue  # vanished or unreadable
+            self._wds[wd] = path  # an existing watch (moved directory) gets its new path
+            self._paths[path] = wd
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.name != META_DIRNAME and entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+            except OSError:
+                continue
+
+    def _unwatch_tree(self, top: str) -> None:
+        assert self._ino is not None
+        prefix = top + os.sep
+        for path in [p for p in self._paths if p == top or p.startswith(prefix)]:
+            wd = self._paths.pop(path)
+            if self._wds.get(wd) == path:
+                del self._wds[wd]
+                self._ino.rm_watch(wd)
+
+    def _run_inotify(self, stop: threading.Event) -> None:
+        assert self._ino is not None
+        files: set[str] = set()
+        new_dirs: set[str] = set()
+        gone_dirs: set[str] = set()
+        overflow = False
+        first = 0.0
+        while not stop.is_set():
+            self._heartbeat()
+            events = self._ino.read(0.1 if files or new_dirs or gone_dirs else 0.5)
+            now = time.monotonic()
+            for wd, mask, name in events:
+                self.stats.events += 1
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                if mask & IN_IGNORED:
+                    path = self._wds.pop(wd, None)
+                    if path is not None and self._paths.get(path) == wd:
+                        del self._paths[path]
+                    continue
+                parent = self._wds.get(wd)
+                if parent is None or not name:
+                    continue
+                if name == META_DIRNAME:
+                    continue  # pruned by name at any depth, as in the walk
+                path = os.path.join(parent, name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        new_dirs.add(path)
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        gone_dirs.add(path)
+                else:
+                    files.add(path)
+            if not (files or new_dirs or gone_dirs or overflow):
+                continue
+            if not first:
+                first = now
+            if events and now - first < self.debounce:
+                continue  # still busy: batch a little more
+            try:
+                if overflow:
+                    # Events were lost: watch any new directories first, then resync, so
+                    # nothing created during the rescan goes unseen.
+                    self._watch_tree(str(self.root))
+                    self._rescan()
+                else:
+                    self._apply(files, new_dirs, gone_dirs)
+            except WatchLimitError:
+                self._close()
+                self.stats.mode = "poll"
+                self._rescan()
+                return
+            files, new_dirs, gone_dirs = set(), set(), set()
+            overflow, first = False, 0.0
+
+    def _apply(self, files: set[str], new_dirs: set[str], gone_dirs: set[str]) -> None:
+        """Reconcile touched paths with the disk (events only say where to look)."""
+        for d in gone_dirs:
+            if not os.path.isdir(d):
+                self.index.delete_tree(Path(d))
+                self._unwatch_tree(d)
+                self.stats.deletes += 1
+        upserts: list[FileRecord] = []
+        deletes: list[Path] = []
+        for path in sorted(files):
+            try:
+                st = os.stat(path, follow_symlinks=False)
+            except OSError:
+                deletes.append(Path(path))
+                continue
+            if stat.S_ISREG(st.st_mode):
+                upserts.append(FileRecord(Path(path), st.st_size, st.st_mtime_ns))
+            else:
+                deletes.append(Path(path))  # replaced by a directory, fifo, ...
+        for d in sorted(new_dirs):
+            if os.path.isdir(d):
+                self._watch_tree(d)
+                upserts.extend(LocalWalkProvider().iter_files(Path(d)))
+        if deletes:
+            self.index.delete(deletes)
+            self.stats.deletes += len(deletes)
+        if upserts:
+            self.index.upsert(upserts)
+            self.stats.upserts += len(upserts)
+
+
+def watch(
+    root: Path,
+    *,
+    stop: threading.Event | None = None,
+    use_inotify: bool = True,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+) -> WatchStats:
+    """Keep root's index current until stop is set (or KeyboardInterrupt)."""
+    stop = stop or threading.Event()
+    with InventoryIndex.for_root(root) as index:
+        use_inotify = use_inotify and inotify_available()
+        watcher = Watcher(root, index, use_inotify=use_inotify, poll_interval=poll_interval)
+        try:
+            return watcher.run(stop)
+        except KeyboardInterrupt:
+            return watcher.stats
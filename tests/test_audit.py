@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from inventory_master.audit import AuditLog, AuditWriter, append_audit
+
+
+def test_plan_index_and_rotation(tmp_path: Path):
+    log_path = tmp_path / "audit" / "audit.jsonl"
+    log = AuditLog(log_path, max_segment_bytes=200)
+    for i in range(10):
+        log.append({"event": "action_committed", "plan_id": "P1", "action_id": f"A-{i}"})
+    log.append({"event": "dry_run", "plan_id": "P2"})
+    log.append({"event": "note"})
+
+    assert list(tmp_path.glob("audit/audit-*.jsonl.gz"))
+    reopened = AuditLog(log_path, max_segment_bytes=200)
+    assert reopened.has_event("P2", "dry_run")
+    assert not reopened.has_event("P1", "dry_run")
+    assert reopened.plan_event_counts("P1") == {"action_committed": 10}
+    ids = [e["action_id"] for e in reopened.iter_plan_events("P1", "action_committed")]
+    assert ids == [f"A-{i}" for i in range(10)]
+    assert len(list(reopened.iter_events())) == 12
+
+
+def test_interrupted_rotation_is_finished_on_reopen(tmp_path: Path):
+    log_path = tmp_path / "audit.jsonl"
+    log = AuditLog(log_path)
+    log.append({"event": "dry_run", "plan_id": "P"})
+    log_path.replace(tmp_path / "audit-000001.jsonl")  # crash right after the rename
+
+    reopened = AuditLog(log_path)
+    reopened.append({"event": "apply_start", "plan_id": "P"})
+    assert [e["event"] for e in reopened.iter_plan_events("P")] == ["dry_run", "apply_start"]
+    assert (tmp_path / "audit-000001.jsonl.gz").exists()
+    assert not (tmp_path / "audit-000001.jsonl").exists()
+    index = (tmp_path / "audit.index" / "P.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)[0] for line in index] == ["dry_run", "apply_start"]
+
+
+def test_legacy_log_is_indexed_on_first_open(tmp_path: Path):
+    log_path = tmp_path / "audit.jsonl"
+    log_path.write_text(
+        json.dumps({"event": "dry_run", "plan_id": "OLD"}) + "\n" + "not json\n",
+        encoding="utf-8",
+    )
+    assert AuditLog(log_path).has_event("OLD", "dry_run")
+    append_audit(log_path, {"event": "apply_start", "plan_id": "OLD"})
+    assert AuditLog(log_path).has_event("OLD", "apply_start")
+
+
+def test_audit_writer_group_commit(tmp_path: Path):
+    log = AuditLog(tmp_path / "audit.jsonl")
+    with AuditWriter(log, max_events=4, max_delay_ms=60_000) as writer:
+        writer.barrier({"event": "apply_start", "plan_id": "P"})
+        for i in range(10):
+            writer.write({"event": "action_committed", "plan_id": "P", "action_id": i})
+        assert log.plan_event_counts("P")["action_committed"] == 8
+        flushes = writer.flushes
+    assert writer.flushes == flushes + 1
+    assert log.plan_event_counts("P") == {"apply_start": 1, "action_committed": 10}
+
+
+def test_audit_writer_commit_is_durable_on_return(tmp_path: Path, monkeypatch):
+    import inventory_master.audit as audit
+
+    fsyncs = []
+    real_fsync = audit.os.fsync
+    monkeypatch.setattr(audit.os, "fsync", lambda fd: fsyncs.append(fd) or real_fsync(fd))
+    log = AuditLog(tmp_path / "audit.jsonl")
+    with AuditWriter(log, max_events=1000, max_delay_ms=60_000) as writer:
+        writer.write({"event": "note", "plan_id": "P"})
+        writer.commit({"event": "action_committed", "plan_id": "P", "action_id": 1})
+        assert log.plan_event_counts("P") == {"note": 1, "action_committed": 1}
+        assert len(fsyncs) == 1  # the buffered event rode along in the same fsync
+
+
+def test_audit_writer_flushes_after_delay(tmp_path: Path):
+    import time
+
+    log = AuditLog(tmp_path / "audit.jsonl")
+    with AuditWriter(log, max_events=1000, max_delay_ms=20) as writer:
+        writer.write({"event": "x", "plan_id": "P"})
+        deadline = time.monotonic() + 5
+        while not log.has_event("P", "x") and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert log.has_event("P", "x")
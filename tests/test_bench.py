@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from inventory_master.bench import TreeSpec, compare, generate_tree, run_benchmarks
+from inventory_master.dupes import find_duplicates
+from inventory_master.providers.local_walk import LocalWalkProvider
+
+SPEC = TreeSpec(files=60, depth=2, fanout=3, size_median=2048, dup_ratio=0.2, tmp_ratio=0.2)
+
+
+def _listing(root: Path) -> list[tuple[str, int, bytes]]:
+    return [
+        (str(r.path.relative_to(root)), r.size_bytes, r.path.read_bytes()[:64])
+        for r in LocalWalkProvider().iter_files(root)
+    ]
+
+
+def test_generate_tree_is_reproducible(tmp_path: Path):
+    stats = generate_tree(tmp_path / "a", SPEC)
+    generate_tree(tmp_path / "b", SPEC)
+
+    assert _listing(tmp_path / "a") == _listing(tmp_path / "b")
+    assert stats.files == 60 and stats.dirs == 3 + 9 and stats.duplicates > 0
+    groups, _ = find_duplicates(LocalWalkProvider().iter_files(tmp_path / "a"), min_size=0)
+    assert sum(len(g.redundant) for g in groups) >= stats.duplicates
+
+
+def test_run_benchmarks_in_process_and_compare(tmp_path: Path):
+    root = tmp_path / "tree"
+    generate_tree(root, SPEC)
+    names = ["walk_local", "everything_http_trust", "plan", "snapshot", "apply"]
+
+    doc = run_benchmarks(root, tmp_path / "work", workloads=names, isolate=False, spec=SPEC)
+
+    results = doc["results"]
+    assert list(results) == names
+    assert results["walk_local"]["files"] == 60
+    assert results["everything_http_trust"]["bytes"] == results["walk_local"]["bytes"]
+    assert results["snapshot"]["files"] == 60
+    assert 0 < results["apply"]["files"] < 60
+    assert not (root / "_meta").exists()  # workloads leave the tree as generated
+    assert compare(doc, doc) == []
+
+    slower = {"results": {"walk_local": dict(results["walk_local"])}}
+    slower["results"]["walk_local"]["files_per_s"] = results["walk_local"]["files_per_s"] / 2
+    assert [r.split(":")[0] for r in compare(doc, slower)] == ["walk_local"]
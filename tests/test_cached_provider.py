@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from inventory_master.providers.cached import CachedProvider, fresh_backends
+from inventory_master.providers.local_walk import LocalWalkProvider
+from inventory_master.providers.query import Query
+from inventory_master.snapshot import create_snapshot
+from inventory_master.snapshot_format import iter_snapshot
+
+
+class _Counting(LocalWalkProvider):
+    def __init__(self) -> None:
+        super().__init__(record_dirs=True)
+        self.scans = 0
+
+    def iter_files(self, root: Path):
+        self.scans += 1
+        return super().iter_files(root)
+
+
+class _IndexLike(LocalWalkProvider):
+    """Reports files like an index backend: no directory listing mtimes."""
+
+
+def _tree(tmp_path: Path) -> Path:
+    root = tmp_path / "ROOT"
+    (root / "a" / "b").mkdir(parents=True)
+    (root / "a" / "b" / "x.txt").write_text("xx")
+    (root / "a" / "y.tmp").write_text("y")
+    (root / "empty").mkdir()
+    return root
+
+
+def _listing(provider: CachedProvider, root: Path) -> list[tuple[str, int]]:
+    return [(r.path.name, r.size_bytes) for r in provider.iter_files(root)]
+
+
+def test_second_run_served_from_cache_until_a_directory_changes(tmp_path: Path):
+    root = _tree(tmp_path)
+    inner = _Counting()
+    provider = CachedProvider(inner)
+
+    first = _listing(provider, root)
+    assert not provider.from_cache and inner.scans == 1
+    assert _listing(provider, root) == first
+    assert provider.from_cache and inner.scans == 1
+    assert set(provider.dirs) == {".", "a", os.path.join("a", "b"), "empty"}
+
+    (root / "empty" / "new.txt").write_text("n")
+    assert ("new.txt", 1) in _listing(provider, root)
+    assert not provider.from_cache and inner.scans == 2
+
+
+def test_max_age_and_stat_files(tmp_path: Path):
+    root = _tree(tmp_path)
+    list(CachedProvider(LocalWalkProvider(record_dirs=True)).iter_files(root))
+
+    (root / "a" / "y.tmp").write_text("yyyy")  # in-place edit: directory mtime unchanged
+    cached = CachedProvider(LocalWalkProvider())
+    assert dict(_listing(cached, root))["y.tmp"] == 1
+    stat = CachedProvider(LocalWalkProvider(), stat_files=True)
+    assert dict(_listing(stat, root))["y.tmp"] == 4
+    expired = CachedProvider(_Counting(), max_age_sec=-1)
+    _listing(expired, root)
+    assert not expired.from_cache
+
+
+def test_listings_without_a_directory_list_are_not_cached(tmp_path: Path):
+    root = _tree(tmp_path)
+    provider = CachedProvider(_IndexLike(), backend="fake_index")
+    list(provider.iter_files(root))
+    assert fresh_backends(root) == []
+
+    (root / "empty" / "new.txt").write_text("n")  # only a full directory list sees this
+    assert ("new.txt", 1) in _listing(provider, root)
+    query = Query(extensions=frozenset({".tmp"}))
+    assert [r.path.name for r in provider.iter_query(root, query)] == ["y.tmp"]
+
+
+def test_directory_changed_during_scan_is_not_cached(tmp_path: Path, monkeypatch):
+    root = _tree(tmp_path)
+    monkeypatch.setattr("inventory_master.providers.cached.time.time_ns", lambda: 0)
+    list(CachedProvider(LocalWalkProvider(record_dirs=True)).iter_files(root))
+    assert fresh_backends(root) == []
+
+
+def test_snapshot_reuses_fresh_listing(tmp_path: Path):
+    root = _tree(tmp_path)
+    walked = tmp_path / "walked.jsonl"
+    create_snapshot(root, walked)  # walks and saves the local listing
+    assert fresh_backends(root, ordered=True) == ["local"]
+
+    (root / "a" / "b" / "x.txt").write_text("changed")
+    cached = tmp_path / "cached.jsonl"
+    create_snapshot(root, cached)
+    rows = {r["path"]: r["size_bytes"] for r in iter_snapshot(cached)}
+    assert rows[os.path.join("a", "b", "x.txt")] == 7
+    assert cached.with_name(cached.name + ".dirs.json").exists()
+
+
+def test_partial_iteration_is_not_saved(tmp_path: Path):
+    root = _tree(tmp_path)
+    it = CachedProvider(LocalWalkProvider(record_dirs=True)).iter_files(root)
+    next(it)
+    it.close()
+    assert fresh_backends(root) == []
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="needs arbitrary bytes in file names")
+def test_non_utf8_directory_name_is_cached(tmp_path: Path):
+    root = tmp_path / "ROOT"
+    name = os.fsdecode(b"bad\xff")
+    (root / name).mkdir(parents=True)
+    (root / name / "f.txt").write_text("f")
+    provider = CachedProvider(_Counting())
+
+    first = _listing(provider, root)
+    assert _listing(provider, root) == first == [("f.txt", 1)]
+    assert provider.from_cache and name in provider.dirs
+
+
+def test_report_plan_snapshot_share_one_listing(tmp_path: Path, monkeypatch):
+    from inventory_master.planner import generate_plan
+    from inventory_master.providers import local_walk
+    from inventory_master.reporting import generate_report
+
+    root = _tree(tmp_path)
+    listed = []
+    scan_dir = local_walk.scan_dir
+    monkeypatch.setattr(local_walk, "scan_dir", lambda p: listed.append(p) or scan_dir(p))
+    root_listings = lambda: listed.count(str(root.resolve()))  # noqa: E731
+
+    generate_report(root, columnar=False)
+    assert root_listings() == 1
+    generate_plan(root)  # served from the report's listing; then creates 99_QUARANTINE
+    assert root_listings() == 1
+    generate_plan(root)  # the mkdir changed root: one whole walk, saved again
+    create_snapshot(root, tmp_path / "s.jsonl", use_hash_cache=False)
+    assert root_listings() == 2
@@ -13,3 +13,13 @@ def test_cli_report_smoke(tmp_path: Path):
     rc = main(["report", "--root", str(root)])
     assert rc == 0
     assert (root / "_meta" / "reports").exists()
+
+
+def test_cli_snapshot_smoke(tmp_path: Path):
+    root = tmp_path / "ROOT"
+    root.mkdir()
+    (root / "a.txt").write_text("x")
+
+    rc = main(["snapshot", "--root", str(root), "--jobs", "2"])
+    assert rc == 0
+    assert list((root / "_meta" / "snapshots").glob("snapshot_*.jsonl"))
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+import pytest
+
+from inventory_master.inventory_index import InventoryIndex
+from inventory_master.models import FileRecord
+from inventory_master.report_stats import ReportStats
+
+pytest.importorskip("numpy")
+
+from inventory_master.columnar import ColumnarInventory  # noqa: E402
+
+NOW = 5_000 * 86_400 * 10**9
+
+
+def _records(n: int = 500) -> list[FileRecord]:
+    rnd = random.Random(7)
+    exts = ["", ".txt", ".JPG", ".log", ".tar.gz"]
+    return [
+        FileRecord(
+            path=Path(f"/r/d{rnd.randrange(12)}/f{i}{rnd.choice(exts)}"),
+            size_bytes=rnd.choice([0, rnd.randrange(1 << 12), rnd.randrange(1 << 30)]),
+            mtime_ns=NOW - rnd.randrange(4_000) * 86_400 * 10**9,
+        )
+        for i in range(n)
+    ]
+
+
+def test_columnar_stats_match_streaming():
+    recs = _records()
+    expected = ReportStats(now_ns=NOW).update(recs)
+    got = ColumnarInventory.from_records(recs).stats(now_ns=NOW)
+
+    for attr in ("files", "bytes", "empty", "ext_count", "ext_bytes", "size_hist", "age_hist"):
+        assert getattr(got, attr) == getattr(expected, attr), attr
+    assert got.largest == expected.largest
+    assert got.size_percentiles["p50"] <= got.size_percentiles["p99"]
+    top_dir, files, total = got.top_dirs[0]
+    assert total == sum(r.size_bytes for r in recs if str(r.path.parent) == top_dir)
+
+
+def test_columnar_from_index(tmp_path: Path):
+    recs = _records(50)
+    with InventoryIndex(tmp_path / "index.sqlite3") as index:
+        index.upsert(recs)
+        got = ColumnarInventory.from_index(index).stats(now_ns=NOW)
+    expected = ReportStats(now_ns=NOW).update(recs)
+    assert (got.files, got.bytes, got.ext_count) == (50, expected.bytes, expected.ext_count)
+    assert got.largest == expected.largest
+
+
+def test_columnar_empty():
+    stats = ColumnarInventory.from_records([]).stats()
+    assert stats.files == 0 and stats.largest == [] and stats.top_dirs is None
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from inventory_master.providers import discovery
+from inventory_master.providers.local_walk import LocalWalkProvider
+
+
+class _Fake(LocalWalkProvider):
+    def __init__(self, name: str) -> None:
+        super().__init__(hash_files=False)
+        self.name = name
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    """Probe results/delays per backend; counts probe calls."""
+    state = {"ok": {}, "delay": {}, "calls": []}
+
+    def probe(name):
+        def run():
+            state["calls"].append(name)
+            time.sleep(state["delay"].get(name, 0))
+            return state["ok"].get(name, False)
+
+        return run
+
+    monkeypatch.setattr(discovery, "PROBES", {n: probe(n) for n in discovery.BACKENDS})
+    factories = {n: (lambda trust, n=n: _Fake(n)) for n in discovery.BACKENDS}
+    factories["local"] = discovery.FACTORIES["local"]
+    monkeypatch.setattr(discovery, "FACTORIES", factories)
+    return state
+
+
+def test_probes_run_concurrently_under_one_deadline(tmp_path: Path, backends):
+    backends["delay"] = {"everything_es": 5, "everything_http": 5}
+    backends["ok"] = {"everything_sdk": True}
+
+    start = time.monotonic()
+    provider, backend = discovery.discover(tmp_path, deadline_sec=0.5)
+
+    assert time.monotonic() - start < 2
+    assert backend == "everything_sdk"
+    health = json.loads(discovery.cache_path(tmp_path).read_text())["health"]
+    assert health["everything_es"] == {"ok": None, "ms": None}
+
+
+def test_preferred_backend_wins_and_cache_skips_probing(tmp_path: Path, backends):
+    backends["delay"] = {"everything_es": 0.2}
+    backends["ok"] = {"everything_es": True, "everything_http": True}
+
+    assert discovery.discover(tmp_path)[1] == "everything_es"
+    backends["calls"].clear()
+    assert discovery.discover(tmp_path)[1] == "everything_es"
+    assert backends["calls"] == []
+
+
+def test_demote_and_ttl(tmp_path: Path, backends):
+    backends["delay"] = {"everything_es": 0.2}  # let the http probe report first
+    backends["ok"] = {"everything_es": True, "everything_http": True}
+    discovery.discover(tmp_path)
+
+    discovery.demote(tmp_path, "everything_es")
+    assert discovery.discover(tmp_path)[1] == "everything_http"
+    discovery.demote(tmp_path, "everything_http")
+    provider, backend = discovery.discover(tmp_path)
+    assert backend == "local" and not isinstance(provider, _Fake)
+
+    backends["calls"].clear()
+    assert discovery.discover(tmp_path, ttl_sec=0)[1] == "everything_es"
+    assert sorted(backends["calls"]) == sorted(discovery.BACKENDS)
+
+
+def test_trust_options_reach_the_backend(tmp_path: Path, backends):
+    from inventory_master.providers.index_trust import TrustOptions
+
+    backends["ok"] = {"everything_es": True}
+    seen = []
+    discovery.FACTORIES["everything_es"] = lambda trust: seen.append(trust) or _Fake("es")
+    trust = TrustOptions(trust_index=True, verify_fraction=0.1)
+
+    assert discovery.discover(tmp_path, trust=trust)[1] == "everything_es"
+    assert discovery.discover(tmp_path)[1] == "everything_es"  # cached winner
+    assert seen == [trust, TrustOptions()]
+
+
+def test_winner_behind_an_undecided_probe_is_kept_briefly(tmp_path: Path, backends):
+    backends["delay"] = {"everything_es": 5}
+    assert discovery.discover(tmp_path, deadline_sec=0.3)[1] == "local"
+    data = json.loads(discovery.cache_path(tmp_path).read_text())
+    assert data["ttl_sec"] == discovery.UNDECIDED_TTL_SEC
+
+    data["checked_at"] -= discovery.UNDECIDED_TTL_SEC + 1
+    discovery.cache_path(tmp_path).write_text(json.dumps(data))
+    backends["delay"], backends["ok"] = {}, {"everything_es": True}
+    assert discovery.discover(tmp_path)[1] == "everything_es"
+    assert "ttl_sec" not in json.loads(discovery.cache_path(tmp_path).read_text())
+
+
+def test_sampled_drift_is_reported(tmp_path: Path, backends, capsys):
+    from inventory_master.cli import main
+    from inventory_master.providers.index_trust import DriftReport
+
+    class _Drifting(_Fake):
+        drift = DriftReport(seen=3, sampled=2, size_mismatch=1, examples=["drift: x"])
+
+    (tmp_path / "a.tmp").write_text("a")
+    backends["ok"] = {"everything_es": True}
+    discovery.FACTORIES["everything_es"] = lambda trust: _Drifting("es")
+    trust_args = ["--root", str(tmp_path), "--trust-index", "--verify-fraction", "1"]
+
+    assert main(["report", *trust_args]) == 0
+    report, *summary = capsys.readouterr().out.splitlines()
+    assert summary == [
+        "index drift: 1 of 2 sampled files differ from disk (missing=0 size=1 mtime=0)",
+        "  drift: x",
+    ]
+    sidecar = json.loads(Path(report).with_suffix(".json").read_text(encoding="utf-8"))
+    assert sidecar["drift"]["size_mismatch"] == 1
+
+    assert main(["plan", *trust_args]) == 0
+    plan_path = capsys.readouterr().out.splitlines()[0]
+    assert json.loads(Path(plan_path).read_text(encoding="utf-8"))["drift"]["sampled"] == 2
+
+    with pytest.raises(SystemExit):
+        main(["report", "--root", str(tmp_path), "--verify-fraction", "0.5"])
+
+
+def test_plan_use_index_refreshes_with_the_discovered_backend(tmp_path: Path, backends):
+    from inventory_master.inventory_index import InventoryIndex
+    from inventory_master.planner import generate_plan
+
+    (tmp_path / "a.tmp").write_text("a")
+    backends["ok"] = {"everything_es": True}
+
+    generate_plan(tmp_path, use_index=True)
+
+    with InventoryIndex.for_root(tmp_path) as index:
+        assert index.get_meta("backend") == "everything_es"
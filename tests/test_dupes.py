@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from inventory_master.cli import main
+from inventory_master.dupes import PARTIAL_BLOCK, find_duplicates
+from inventory_master.providers.local_walk import LocalWalkProvider
+
+
+def _tree(root: Path) -> None:
+    big = b"x" * (3 * PARTIAL_BLOCK)
+    files = {
+        "a/small.txt": b"same",
+        "b/small.txt": b"same",
+        "c/other.txt": b"diff",  # same size, different content
+        "a/big.bin": big,
+        "b/big.bin": big,
+        "c/big_mid.bin": big[:PARTIAL_BLOCK] + b"y" * PARTIAL_BLOCK + big[-PARTIAL_BLOCK:],
+        "unique.bin": b"u" * 7,
+        "e1": b"",
+        "e2": b"",
+    }
+    for rel, data in files.items():
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_bytes(data)
+
+
+def test_staged_duplicate_detection(tmp_path: Path):
+    root = tmp_path / "ROOT"
+    _tree(root)
+
+    groups, stats = find_duplicates(LocalWalkProvider().iter_files(root), jobs=2)
+
+    names = [[str(p.relative_to(root.resolve())) for p in g.paths] for g in groups]
+    assert names == [["a/big.bin", "b/big.bin"], ["a/small.txt", "b/small.txt"]]
+    assert stats.files == 9
+    assert stats.partial_hashed == 6  # unique size and empty files never read
+    assert stats.full_hashed == 3  # only the large files that share head and tail
+    assert groups[0].wasted_bytes == 3 * PARTIAL_BLOCK
+
+
+def test_dupes_cli_report_and_plan(tmp_path: Path, capsys):
+    root = tmp_path / "ROOT"
+    _tree(root)
+
+    assert main(["dupes", "--root", str(root), "--plan"]) == 0
+    report, plan_path = capsys.readouterr().out.split()
+    assert "- duplicate groups: 2" in Path(report).read_text(encoding="utf-8")
+
+    actions = json.loads(Path(plan_path).read_text(encoding="utf-8"))["actions"]
+    assert sorted(Path(a["src"]).relative_to(root.resolve()).as_posix() for a in actions) == [
+        "b/big.bin",
+        "b/small.txt",
+    ]
+    assert {a["rule"] for a in actions} == {"duplicate"}
+
+
+def test_quarantined_copy_is_never_kept(tmp_path: Path, capsys):
+    root = tmp_path / "ROOT"
+    for rel in ("99_QUARANTINE/a.txt", "docs/a.txt"):  # as left by an applied dupes plan
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_bytes(b"same")
+
+    assert main(["dupes", "--root", str(root), "--plan"]) == 0
+    plan_path = capsys.readouterr().out.split()[1]
+    assert json.loads(Path(plan_path).read_text(encoding="utf-8"))["actions"] == []
+
+    groups, _ = find_duplicates(
+        LocalWalkProvider().iter_files(root), keep_outside=[root.resolve() / "99_QUARANTINE"]
+    )
+    assert groups[0].paths[0] == root.resolve() / "docs" / "a.txt"
@@ -0,0 +1,108 @@
+"""EverythingESProvider against a fake `es` executable that emits es-style CSV."""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from inventory_master.providers.everything_es import EverythingESProvider
+from inventory_master.providers.query import Query
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="fake es is a POSIX script")
+
+_FAKE_ES = r"""#!{python}
+import csv, os, sys, time
+args = sys.argv[1:]
+with open(os.environ["FAKE_ES_LOG"], "a") as log:
+    log.write(" ".join(args) + "\n")
+opt = lambda name, default: args[args.index(name) + 1] if name in args else default
+root, offset, count = opt("-path", "."), int(opt("-offset", 0)), int(opt("-n", 10**9))
+terms = [a for a in args if a.startswith("ext:")]
+exts = {"." + e for t in terms for e in t[4:].split(";")}
+paths = sorted(
+    os.path.join(d, f) for d, _, files in os.walk(root) for f in files
+    if not exts or os.path.splitext(f)[1] in exts
+)
+out = csv.writer(sys.stdout)
+out.writerow(["Filename", "Size", "Date Modified"])
+for p in paths[offset:offset + count]:
+    st = os.stat(p)
+    out.writerow([p, st.st_size, st.st_mtime_ns // 100 + 116444736000000000])
+    sys.stdout.flush()
+    time.sleep(float(os.environ.get("FAKE_ES_DELAY", "0")))
+"""
+
+
+@pytest.fixture
+def fake_es(tmp_path: Path, monkeypatch) -> tuple[str, Path, Path]:
+    exe = tmp_path / "es"
+    exe.write_text(_FAKE_ES.replace("{python}", sys.executable))
+    exe.chmod(0o755)
+    log = tmp_path / "es.log"
+    monkeypatch.setenv("FAKE_ES_LOG", str(log))
+    root = tmp_path / "ROOT"
+    (root / "sub").mkdir(parents=True)
+    (root / "_meta").mkdir()
+    (root / "_meta" / "skip.txt").write_text("m")
+    for i in range(7):
+        (root / "sub" / f"f{i}.{'tmp' if i % 2 else 'txt'}").write_text("x" * i)
+    return str(exe), root, log
+
+
+def test_streams_csv_columns_in_windows(fake_es):
+    exe, root, log = fake_es
+    provider = EverythingESProvider(es_exe=exe, window_size=3, trust_index=True)
+    records = list(provider.iter_files(root))
+
+    assert [r.path.name for r in records] == [f"f{i}.{'tmp' if i % 2 else 'txt'}" for i in range(7)]
+    assert [r.size_bytes for r in records] == list(range(7))
+    st = (root / "sub" / "f3.tmp").stat()
+    assert records[3].mtime_ns == st.st_mtime_ns // 100 * 100
+    calls = log.read_text().splitlines()
+    assert [c.split("-offset ")[1].split()[0] for c in calls] == ["0", "3", "6"]
+    assert all("-csv -size -dm" in c for c in calls)
+
+
+def test_query_terms_and_max_results(fake_es):
+    exe, root, log = fake_es
+    q = Query(extensions=frozenset({".tmp"}))
+    records = list(EverythingESProvider(es_exe=exe, max_results=2).iter_query(root, q))
+
+    assert [r.path.name for r in records] == ["f1.tmp", "f3.tmp"]
+    assert "ext:tmp" in log.read_text()
+
+
+def test_window_timeout_kills_es(fake_es, monkeypatch):
+    exe, root, _ = fake_es
+    monkeypatch.setenv("FAKE_ES_DELAY", "5")
+    provider = EverythingESProvider(es_exe=exe, timeout_ms=1000)
+    with pytest.raises(RuntimeError, match="timed out"):
+        list(provider.iter_files(root))
+    assert os.path.exists(exe)
+
+
+def test_stats_each_row_unless_trusted(fake_es):
+    exe, root, _ = fake_es
+    st = (root / "sub" / "f3.tmp").stat()
+    records = list(EverythingESProvider(es_exe=exe).iter_files(root))
+    assert records[3].mtime_ns == st.st_mtime_ns
+
+    (root / "sub" / "f3.tmp").write_text("grown")
+    provider = EverythingESProvider(es_exe=exe, trust_index=True, verify_fraction=1.0)
+    records = list(provider.iter_files(root))
+    assert records[3].size_bytes == 5
+    assert provider.drift is not None and provider.drift.sampled == 7
+
+
+def test_slow_consumer_does_not_time_out(fake_es):
+    exe, root, _ = fake_es
+    provider = EverythingESProvider(es_exe=exe, timeout_ms=1000)
+    records = []
+    for rec in provider.iter_files(root):
+        records.append(rec)
+        time.sleep(0.3)  # 7 rows: the consumer takes ~2s, es itself well under 1s
+    assert len(records) == 7
@@ -0,0 +1,144 @@
+"""EverythingHTTPProvider against a local stand-in for the Everything HTTP server."""
+
+from __future__ import annotations
+
+import io
+import json
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from inventory_master.providers.everything_http import (
+    EverythingHTTPProvider,
+    iter_json_rows,
+)
+from inventory_master.providers.query import Query
+
+
+class _FakeEverything(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, rows: list[dict]) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.rows = rows
+        self.requests: list[dict[str, str]] = []
+        self.clients: set[int] = set()
+        self.fail_next = 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    server: _FakeEverything
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        params = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+        self.server.requests.append(params)
+        self.server.clients.add(self.client_address[1])
+        if self.server.fail_next:
+            self.server.fail_next -= 1
+            self._send(503, b"busy")
+            return
+        o, c = int(params.get("o", 0)), int(params.get("c", 100))
+        page = self.server.rows[o : o + c]
+        self._send(200, json.dumps({"totalResults": len(self.server.rows), "results": page}))
+
+    def _send(self, status: int, body: str | bytes) -> None:
+        data = body.encode() if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def everything(tmp_path: Path) -> Iterator[tuple[_FakeEverything, Path]]:
+    root = tmp_path / "ROOT"
+    root.mkdir()
+    rows = []
+    for i in range(25):
+        f = root / f"f{i:02d}.txt"
+        f.write_text("x" * i)
+        rows.append({"type": "file", "name": f.name, "path": str(root.resolve())})
+    server = _FakeEverything(rows)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, root
+    server.shutdown()
+    server.server_close()
+
+
+def _provider(server: _FakeEverything, **kw) -> EverythingHTTPProvider:
+    return EverythingHTTPProvider(port=server.server_address[1], **kw)
+
+
+def test_paginated_fetch_over_pooled_connections(everything):
+    server, root = everything
+    records = list(_provider(server, page_size=10, in_flight=3).iter_files(root))
+
+    assert [r.path.name for r in records] == [f"f{i:02d}.txt" for i in range(25)]
+    assert records[3].size_bytes == 3
+    first = server.requests[0]
+    assert (first["j"], first["path_column"], first["sort"]) == ("1", "1", "path")
+    assert sorted(int(r["o"]) for r in server.requests)[:3] == [0, 10, 20]
+    assert len(server.clients) <= 3  # keep-alive: at most one connection per page in flight
+
+
+def test_max_results_and_query_pushdown(everything):
+    server, root = everything
+    q = Query(extensions=frozenset({".txt"}), max_size=10)
+    records = list(_provider(server, page_size=4, max_results=6).iter_query(root, q))
+
+    assert [r.path.name for r in records] == [f"f{i:02d}.txt" for i in range(6)]
+    assert {r["c"] for r in server.requests} == {"4", "2"}
+    assert server.requests[0]["s"] == f'"{root.resolve()}\\" ext:txt size:<=10'
+
+
+def test_retry_with_backoff(everything):
+    server, root = everything
+    server.fail_next = 2
+    assert len(list(_provider(server, page_size=100, backoff=0.01).iter_files(root))) == 25
+
+    server.fail_next = 10
+    with pytest.raises(RuntimeError, match="after 2 attempts"):
+        list(_provider(server, retries=1, backoff=0.01).iter_files(root))
+
+
+def test_iter_json_rows_incremental():
+    body = json.dumps({"totalResults": 3, "results": [{"a": "x" * 50}, "p", {"b": [1, 2]}]})
+    rows = list(iter_json_rows(io.BytesIO(body.encode()), chunk_size=7))
+    assert rows == [{"a": "x" * 50}, "p", {"b": [1, 2]}]
+    assert list(iter_json_rows(io.BytesIO(b' [1, 23 ,"z"] '), chunk_size=1)) == [1, 23, "z"]
+    with pytest.raises(ValueError):
+        list(iter_json_rows(io.BytesIO(b'{"results": [{"a": 1}, {"b"'), chunk_size=4))
+
+
+def test_trust_index_uses_row_metadata_and_samples_drift(everything):
+    from inventory_master.providers.index_trust import WIN_FILETIME_EPOCH_OFFSET
+
+    server, root = everything
+    for i, row in enumerate(server.rows):
+        st = (root / row["name"]).stat()
+        row["size"] = str(st.st_size)
+        row["date_modified"] = str(st.st_mtime_ns // 100 + WIN_FILETIME_EPOCH_OFFSET)
+    server.rows[1]["size"] = "999"  # stale index entry
+    (root / server.rows[2]["name"]).unlink()  # deleted since indexing
+
+    trusted = list(_provider(server, trust_index=True).iter_files(root))
+    assert len(trusted) == 25  # the disk was not consulted
+    assert trusted[1].size_bytes == 999
+    assert trusted[5].mtime_ns // 100 == (root / "f05.txt").stat().st_mtime_ns // 100
+
+    provider = _provider(server, trust_index=True, verify_fraction=1.0)
+    verified = list(provider.iter_files(root))
+    assert len(verified) == 24 and verified[1].size_bytes == 1
+    drift = provider.drift
+    assert (drift.sampled, drift.missing, drift.size_mismatch) == (25, 1, 1)
+    assert drift.drift_rate == pytest.approx(2 / 25)
@@ -39,3 +39,200 @@ def test_dry_run_required(tmp_path: Path):
 
     assert not (root / "x.tmp").exists()
     assert (root / "99_QUARANTINE" / "x.tmp").exists()
+
+
+def _approved_plan(root: Path, policy: dict | None = None) -> Path:
+    plan_path = generate_plan(root)
+    if policy:
+        plan = json.loads(plan_path.read_text(encoding="utf-8"))
+        plan["policy"].update(policy)
+        plan_path.write_text(json.dumps(plan), encoding="utf-8")
+    approve_plan(plan_path)
+    apply_plan(plan_path, dry_run=True)
+    return plan_path
+
+
+def _committed(root: Path) -> list[dict]:
+    from inventory_master.audit import AuditLog
+
+    log = AuditLog(root / "_meta" / "audit" / "audit.jsonl")
+    return [e for e in log.iter_events() if e["event"] == "action_committed"]
+
+
+@pytest.mark.parametrize("strategy", ["auto", "identity", "hash"])
+def test_verify_strategy_recorded(tmp_path: Path, strategy: str):
+    root = tmp_path / "ROOT"
+    root.mkdir()
+    (root / "x.tmp").write_text("tmp")
+    apply_plan(_approved_plan(root, {"verify_strategy": strategy}), dry_run=False)
+
+    expected = "hash" if strategy == "hash" else "identity"
+    assert [e["verify"] for e in _committed(root)] == [expected]
+    assert (root / "99_QUARANTINE" / "x.tmp").read_text() == "tmp"
+
+
+def test_verify_strategy_snapshot_reuses_recorded_hash(tmp_path: Path):
+    from inventory_master.snapshot import create_snapshot
+
+    root = tmp_path / "ROOT"
+    root.mkdir()
+    (root / "x.tmp").write_text("tmp")
+    create_snapshot(root, root / "_meta" / "snapshots" / "before.jsonl")
+    apply_plan(_approved_plan(root, {"verify_strategy": "snapshot"}), dry_run=False)
+    assert [e["verify"] for e in _committed(root)] == ["snapshot"]
+
+
+def test_cross_device_move_copies_then_verifies_hash(tmp_path: Path, monkeypatch):
+    import errno
+    import os
+
+    from inventory_master import executor
+
+    root = tmp_path / "ROOT"
+    root.mkdir()
+    (root / "x.tmp").write_text("tmp")
+    plan_path = _approved_plan(root)
+
+    def exdev(src, dst):
+        raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+
+    monkeypatch.setattr(executor.os, "rename", exdev)  # EXDEV on one st_dev (e.g. bind mounts)
+    apply_plan(plan_path, dry_run=False)
+
+    assert not (root / "x.tmp").exists()
+    assert (root / "99_QUARANTINE" / "x.tmp").read_text() == "tmp"
+    [event] = _committed(root)
+    assert event["verify"] == "hash" and event["cross_device"] is True
+
+
+def test_failed_cross_device_copy_leaves_no_partial_dst(tmp_path: Path, monkeypatch):
+    import errno
+    import os
+
+    from inventory_master import executor
+
+    root = tmp_path / "ROOT"
+    root.mkdir()
+    (root / "x.tmp").write_text("tmp")
+    plan_path = _approved_plan(root)
+
+    def exdev(src, dst):
+        raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+
+    def disk_full(fsrc, fdst, length=0):
+        fdst.write(b"t")
+        raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+
+    monkeypatch.setattr(executor.os, "rename", exdev)
+    monkeypatch.setattr(executor.shutil, "copyfileobj", disk_full)
+    with pytest.raises(OSError):
+        apply_plan(plan_path, dry_run=False)
+
+    assert (root / "x.tmp").read_text() == "tmp"
+    assert not (root / "99_QUARANTINE" / "x.tmp").exists()
+
+
+def test_partition_keeps_conflicting_actions_together():
+    from inventory_master.executor import _partition
+
+    actions = [
+        {"id": "A-1", "src": "/r/a", "dst": "/r/q/a"},
+        {"id": "A-2", "src": "/r/b", "dst": "/r/q/b"},
+        {"id": "A-3", "src": "/r/c", "dst": "/r/q/a"},  # same dst as A-1
+        {"id": "A-4", "src": "/r/q/b", "dst": "/r/z/b"},  # src is A-2's dst
+    ]
+    groups = [[a["id"] for a in g] for g in _partition(actions)]
+    assert groups == [["A-1", "A-3"], ["A-2", "A-4"]]
+
+
+def test_parallel_apply(tmp_path: Path):
+    root = tmp_path / "ROOT"
+    (root / "d").mkdir(parents=True)
+    for i in range(30):
+        (root / "d" / f"f{i:02d}.tmp").write_text(str(i))
+    apply_plan(_approved_plan(root), dry_run=False, jobs=4)
+
+    assert not list((root / "d").iterdir())
+    assert len(list((root / "99_QUARANTINE").iterdir())) == 30
+    assert len(_committed(root)) == 30
+
+
+def test_parallel_apply_failure_stops_and_leaves_files_whole(tmp_path: Path):
+    root = tmp_path / "ROOT"
+    (root / "d").mkdir(parents=True)
+    for i in range(30):
+        (root / "d" / f"f{i:02d}.tmp").write_text(str(i))
+    plan_path = _approved_plan(root)
+    (root / "99_QUARANTINE" / "f05.tmp").write_text("blocker")
+
+    with pytest.raises(ApplyError, match="already exists"):
+        apply_plan(plan_path, dry_run=False, jobs=4)
+
+    moved = {e["src"] for e in _committed(root)}
+    for i in range(30):
+        name = f"f{i:02d}.tmp"
+        if i == 5:
+            continue
+        in_src = (root / "d" / name).exists()
+        in_dst = (root / "99_QUARANTINE" / name).exists()
+        assert in_src != in_dst
+        assert in_dst == (str((root / "d" / name).resolve()) in moved)
+
+
+def test_resume_after_crash(tmp_path: Path, monkeypatch):
+    import inventory_master.executor as executor
+
+    root = tmp_path / "ROOT"
+    (root / "d").mkdir(parents=True)
+    for i in range(5):
+        (root / "d" / f"f{i}.tmp").write_text(str(i))
+    plan_path = _approved_plan(root)
+
+    real_check = executor.check
+    calls = []
+
+    def crash_on_third(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 3:
+            raise SystemExit("power loss")  # after the rename, before the journal "done"
+        return real_check(*args, **kwargs)
+
+    monkeypatch.setattr(executor, "check", crash_on_third)
+    with pytest.raises(SystemExit):
+        apply_plan(plan_path, dry_run=False)
+    monkeypatch.setattr(executor, "check", real_check)
+
+    with pytest.raises(ApplyError, match="--resume"):
+        apply_plan(plan_path, dry_run=False)
+    apply_plan(plan_path, dry_run=False, resume=True)
+
+    assert not list((root / "d").iterdir())
+    assert len(list((root / "99_QUARANTINE").iterdir())) == 5
+    committed = _committed(root)
+    assert sorted(e["action_id"] for e in committed) == [f"A-00{i}" for i in range(1, 6)]
+    assert [e["verify"] for e in committed if e.get("recovered")] == ["journal"]
+
+    with pytest.raises(ApplyError, match="already applied"):
+        apply_plan(plan_path, dry_run=False)
+
+
+def test_apply_batches_audit_fsyncs(tmp_path: Path, monkeypatch):
+    from inventory_master.audit import AuditLog
+
+    root = tmp_path / "ROOT"
+    (root / "d").mkdir(parents=True)
+    for i in range(30):
+        (root / "d" / f"f{i:02d}.tmp").write_text(str(i))
+    plan_path = _approved_plan(root)
+    fsyncs = []
+    append_many = AuditLog.append_many
+
+    def counting(self, events, *, fsync=False):
+        fsyncs.append(fsync)
+        return append_many(self, events, fsync=fsync)
+
+    monkeypatch.setattr(AuditLog, "append_many", counting)
+    apply_plan(plan_path, dry_run=False)
+
+    assert len(_committed(root)) == 30
+    assert fsyncs.count(True) <= 3  # apply_start, apply_done, close: not one per action
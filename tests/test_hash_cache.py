@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from inventory_master.hash_cache import HashCache
+from inventory_master.hashing import hash_records, sha256_file
+from inventory_master.providers.local_walk import LocalWalkProvider
+
+
+def _age(p: Path, seconds: int = 60) -> None:
+    st = p.stat()
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns - seconds * 1_000_000_000))
+
+
+def test_cache_hit_persists_and_stale_entry_is_dropped(tmp_path: Path):
+    root = tmp_path / "ROOT"
+    root.mkdir()
+    f = root / "a.txt"
+    f.write_text("one")
+    _age(f)
+
+    with HashCache.for_root(root) as cache:
+        assert cache.sha256(f) == sha256_file(f)
+        assert cache.misses == 1
+
+    cache = HashCache.for_root(root)
+    assert (root / "_meta" / "inventory" / "hash_cache.jsonl").exists()
+    assert cache.sha256(f) == sha256_file(f)
+    assert cache.hits == 1
+
+    f.write_text("two")
+    _age(f, 30)
+    assert cache.lookup(f, f.stat()) is None
+    assert len(cache) == 0
+
+
+def test_recently_modified_files_are_not_cached(tmp_path: Path):
+    f = tmp_path / "fresh.txt"
+    f.write_text("x")
+    cache = HashCache(tmp_path / "cache.jsonl")
+    cache.sha256(f)
+    assert len(cache) == 0
+
+
+def test_lru_eviction(tmp_path: Path):
+    cache = HashCache(tmp_path / "cache.jsonl", max_entries=2)
+    files = []
+    for i in range(3):
+        f = tmp_path / f"f{i}.txt"
+        f.write_text(str(i))
+        _age(f)
+        files.append(f)
+    for f in files:
+        cache.sha256(f)
+    assert len(cache) == 2
+    assert cache.lookup(files[0], files[0].stat()) is None
+
+
+def test_hash_records_uses_cache_with_pool(tmp_path: Path):
+    root = tmp_path / "ROOT"
+    root.mkdir()
+    for i in range(10):
+        f = root / f"f{i}.bin"
+        f.write_bytes(bytes([i]) * 10)
+        _age(f)
+    cache = HashCache(tmp_path / "cache.jsonl")
+    provider = LocalWalkProvider(hash_files=False)
+
+    first = list(hash_records(provider.iter_files(root), jobs=3, cache=cache))
+    second = list(hash_records(provider.iter_files(root), jobs=3, cache=cache))
+    assert first == second
+    assert cache.hits == 10
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="needs arbitrary bytes in file names")
+def test_non_utf8_file_name_is_saved(tmp_path: Path):
+    f = tmp_path / os.fsdecode(b"bad\xff.txt")
+    f.write_text("x")
+    _age(f)
+    with HashCache(tmp_path / "cache.jsonl") as cache:
+        cache.sha256(f)
+    assert HashCache(tmp_path / "cache.jsonl").lookup(f, f.stat()) == sha256_file(f)
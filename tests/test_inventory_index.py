@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+
+from inventory_master.inventory_index import InventoryIndex
+from inventory_master.models import FileRecord
+from inventory_master.planner import generate_plan
+from inventory_master.providers.local_walk import LocalWalkProvider
+from inventory_master.reporting import generate_report
+
+
+def _tree(tmp_path: Path) -> Path:
+    root = tmp_path / "ROOT"
+    (root / "sub").mkdir(parents=True)
+    (root / "a.txt").write_text("a")
+    (root / "sub" / "b.TXT").write_text("bb")
+    (root / "sub" / "c.tmp").write_text("c")
+    (root / "README").write_text("r")
+    return root
+
+
+def test_refresh_upsert_and_delete(tmp_path: Path):
+    root = _tree(tmp_path)
+    with InventoryIndex.for_root(root) as index:
+        assert not index.is_populated()
+        assert index.refresh(LocalWalkProvider(), root, batch_size=2) == 4
+        files, ext = index.extension_counts()
+        assert files == 4
+        assert ext[".txt"] == 2 and ext["<noext>"] == 1
+
+        (root / "a.txt").unlink()
+        assert index.refresh(LocalWalkProvider(), root) == 3
+        assert len(index) == 3
+
+        new = root.resolve() / "sub" / "d.tmp"
+        index.upsert([FileRecord(path=new, size_bytes=9, mtime_ns=1)])
+        tmps = list(index.iter_records(extensions={".TMP"}))
+        assert [r.path.name for r in tmps] == ["c.tmp", "d.tmp"]
+        assert len(list(index.iter_records(parent=root.resolve() / "sub"))) == 3
+
+        index.delete_tree(root.resolve() / "sub")
+        assert len(index) == 1
+
+
+def test_report_and_plan_from_index(tmp_path: Path):
+    root = _tree(tmp_path)
+    report = generate_report(root, use_index=True)
+    assert "- files: 4" in report.read_text(encoding="utf-8")
+    assert (root / "_meta" / "inventory" / "index.sqlite3").exists()
+
+    plan = json.loads(generate_plan(root, use_index=True).read_text(encoding="utf-8"))
+    assert [Path(a["src"]).name for a in plan["actions"]] == ["c.tmp"]
+
+    (root / "sub" / "new.tmp").write_text("n")  # index is revalidated, not trusted blindly
+    plan = json.loads(generate_plan(root, use_index=True).read_text(encoding="utf-8"))
+    assert sorted(Path(a["src"]).name for a in plan["actions"]) == ["c.tmp", "new.tmp"]
+
+
+def test_is_current(tmp_path: Path):
+    root = _tree(tmp_path)
+    with InventoryIndex.for_root(root) as index:
+        assert not index.is_current(root)
+        index.refresh(LocalWalkProvider(), root)
+        assert not index.is_current(root)  # directories changed just before the scan
+        old = time.time() - 60
+        for d in (root, root / "sub"):
+            os.utime(d, (old, old))
+        index.refresh(LocalWalkProvider(), root)
+        assert index.is_current(root)
+        assert not index.is_current(root, max_age_sec=-1)
+
+        (root / "sub" / "x.bin").write_text("x")
+        assert not index.is_current(root)
+        index.mark_watched()
+        assert index.is_current(root)
+        index.mark_watched(False)
+        assert not index.is_current(root)
@@ -16,3 +16,18 @@ def test_generate_plan_json(tmp_path: Path):
     assert plan["policy"]["allow_delete"] is False
     assert plan_path.exists()
     assert len(plan["actions"]) == 1
+
+
+def test_generate_plan_duplicate_rule_and_unique_destinations(tmp_path: Path):
+    from inventory_master.rules import Rule, RuleSet
+
+    root = tmp_path / "ROOT"
+    for d in ("a", "b", "c"):
+        (root / d).mkdir(parents=True)
+        (root / d / "same.txt").write_text("same")
+    rules = RuleSet([Rule(name="duplicate", duplicate=True)])
+
+    plan = json.loads(generate_plan(root, rules=rules).read_text(encoding="utf-8"))
+
+    assert [Path(a["src"]).parent.name for a in plan["actions"]] == ["b", "c"]
+    assert [Path(a["dst"]).name for a in plan["actions"]] == ["same.txt", "same~2.txt"]
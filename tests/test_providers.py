@@ -2,9 +2,7 @@
 
 from __future__ import annotations
 
-import json
 from pathlib import Path
-from unittest.mock import MagicMock, patch
 
 import pytest
 
@@ -14,7 +12,7 @@ from inventory_master.providers.everything_es import (
     is_available,
 )
 from inventory_master.providers.local_walk import LocalWalkProvider
-from inventory_master.reporting import _get_report_provider, generate_report
+from inventory_master.reporting import generate_report, get_report_provider
 
 
 def test_find_es_exe_returns_str_or_none() -> None:
@@ -30,16 +28,17 @@ def test_is_available_returns_bool() -> None:
     assert isinstance(is_available(), bool)
 
 
-def test_get_report_provider_returns_provider_and_backend() -> None:
-    """_get_report_provider returns a provider and backend name."""
+def test_get_report_provider_returns_provider_and_backend(tmp_path: Path) -> None:
+    """get_report_provider returns a (cached) provider and backend name."""
+    from inventory_master.providers.cached import CachedProvider
     from inventory_master.providers.everything_http import EverythingHTTPProvider
     from inventory_master.providers.everything_sdk import EverythingSDKProvider
 
-    provider, backend = _get_report_provider(Path("."))
+    provider, backend = get_report_provider(tmp_path)
     assert backend in ("everything_es", "everything_http", "everything_sdk", "local")
-    assert provider is not None
+    assert isinstance(provider, CachedProvider)
     assert isinstance(
-        provider,
+        provider.inner,
         (LocalWalkProvider, EverythingESProvider, EverythingHTTPProvider, EverythingSDKProvider),
     )
 
@@ -78,49 +77,56 @@ def test_local_walk_provider_skips_meta(tmp_path: Path) -> None:
     assert not any("_meta" in str(p) for p in paths)
 
 
-def test_everything_http_provider_mock_urlopen_request_and_parsing(tmp_path: Path) -> None:
-    """Mock urllib.request.urlopen: assert request URL params and JSON parsed into FileRecord list."""
-    from inventory_master.providers.everything_http import EverythingHTTPProvider
-    from inventory_master.models import FileRecord
+def test_local_walk_provider_streams_and_batches(tmp_path: Path) -> None:
+    """iter_files is a lazy iterator; iter_batches chunks the same stream."""
+    from collections.abc import Iterator
 
     root = tmp_path / "ROOT"
-    root.mkdir()
-    f = root / "f.txt"
-    f.write_text("x")
-    path_str = str(f.resolve())
-
-    # Minimal Everything HTTP JSON: list of rows with path (and optional size/date_modified)
-    mock_json = [{"path": path_str, "size": 1, "date_modified": None}]
-    mock_body = json.dumps(mock_json).encode("utf-8")
-
-    captured_url: list[str] = []
-
-    def fake_urlopen(req, timeout=None):
-        # Capture URL from the Request (full_url in 3.9+)
-        url = getattr(req, "full_url", None)
-        if url is None and callable(getattr(req, "get_full_url", None)):
-            url = req.get_full_url()
-        if url is None:
-            url = str(req)
-        captured_url.append(url if isinstance(url, str) else str(url))
-        resp = MagicMock()
-        resp.read.return_value = mock_body
-        resp.__enter__ = MagicMock(return_value=resp)
-        resp.__exit__ = MagicMock(return_value=False)
-        return resp
-
-    with patch("inventory_master.providers.everything_http.urllib.request.urlopen", side_effect=fake_urlopen):
-        provider = EverythingHTTPProvider(host="127.0.0.1", port=8080, hash_files=False)
-        records = provider.iter_files(root)
-
-    assert len(captured_url) == 1
-    url = captured_url[0]
-    assert "s=" in url or "search=" in url
-    assert "j=1" in url or "json=1" in url
-    assert "path_column=1" in url
-
-    assert len(records) == 1
-    assert isinstance(records[0], FileRecord)
-    assert records[0].path == f.resolve() or str(records[0].path) == path_str
-    assert records[0].size_bytes >= 0
-    assert records[0].sha256 is None
+    (root / "sub").mkdir(parents=True)
+    for i in range(5):
+        (root / f"f{i}.txt").write_text("x")
+    (root / "sub" / "g.txt").write_text("y")
+    provider = LocalWalkProvider(hash_files=False)
+
+    it = provider.iter_files(root)
+    assert isinstance(it, Iterator)
+    assert next(it).path.parent == root.resolve()
+
+    batches = list(provider.iter_batches(root, batch_size=4))
+    assert [len(b) for b in batches] == [4, 2]
+    with pytest.raises(ValueError):
+        next(provider.iter_batches(root, batch_size=0))
+
+
+def test_local_walk_provider_parallel_matches_serial(tmp_path: Path) -> None:
+    """Parallel scandir traversal yields the same records in the same order."""
+    root = tmp_path / "ROOT"
+    for d in ("b/y", "a/x", "a/_meta", "c"):
+        (root / d).mkdir(parents=True)
+    for rel in ("z.txt", "a/1.txt", "a/x/2.txt", "a/_meta/skip.txt", "b/y/3.txt", "c/4.txt"):
+        (root / rel).write_text(rel)
+
+    serial = list(LocalWalkProvider().iter_files(root))
+    parallel = list(LocalWalkProvider(workers=4, prefetch_limit=2).iter_files(root))
+
+    rel = [r.path.relative_to(root.resolve()).as_posix() for r in serial]
+    assert rel == ["a/1.txt", "a/x/2.txt", "b/y/3.txt", "c/4.txt", "z.txt"]
+    assert parallel == serial
+
+
+def test_query_pushdown_terms_and_local_filter(tmp_path: Path) -> None:
+    """Query translates to Everything syntax; LocalWalkProvider filters the prefix subtree."""
+    from inventory_master.providers.query import Query, everything_terms
+
+    q = Query(extensions=frozenset({".tmp", ".bak"}), min_size=2, path_prefix="a/b")
+    assert everything_terms(q) == ["ext:bak;tmp", "size:>=2"]
+
+    root = tmp_path / "ROOT"
+    (root / "a" / "b").mkdir(parents=True)
+    (root / "a" / "b" / "big.tmp").write_text("xyz")
+    (root / "a" / "b" / "small.tmp").write_text("x")
+    (root / "a" / "b" / "big.txt").write_text("xyz")
+    (root / "a" / "out.tmp").write_text("xyz")
+    records = list(LocalWalkProvider().iter_query(root, q))
+    assert [r.path.name for r in records] == ["big.tmp"]
+    assert list(LocalWalkProvider().iter_query(root, Query(path_prefix="missing"))) == []
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from inventory_master.models import FileRecord
+from inventory_master.report_stats import ReportStats
+from inventory_master.reporting import generate_report
+
+DAY = 86_400 * 10**9
+
+
+def test_report_stats_single_pass():
+    now = 1_000 * DAY
+    recs = [
+        FileRecord(path=Path("/r/a.txt"), size_bytes=0, mtime_ns=now),
+        FileRecord(path=Path("/r/b.TXT"), size_bytes=2048, mtime_ns=now - 10 * DAY),
+        FileRecord(path=Path("/r/c"), size_bytes=5 << 20, mtime_ns=now - 400 * DAY),
+    ]
+    stats = ReportStats(now_ns=now, largest_n=2).update(iter(recs))
+
+    assert (stats.files, stats.bytes, stats.empty) == (3, 2048 + (5 << 20), 1)
+    assert stats.ext_count == {".txt": 2, "<noext>": 1}
+    assert stats.ext_bytes[".txt"] == 2048
+    assert stats.size_hist == [1, 0, 1, 0, 1, 0, 0, 0]
+    assert stats.age_hist == [1, 0, 1, 0, 0, 1, 0]
+    assert stats.largest == [(5 << 20, "/r/c"), (2048, "/r/b.TXT")]
+
+
+@pytest.mark.parametrize("columnar", [False, None])
+def test_generate_report_writes_json_sidecar(tmp_path: Path, columnar: bool | None):
+    root = tmp_path / "ROOT"
+    root.mkdir()
+    (root / "a.log").write_bytes(b"x" * 10)
+    (root / "empty.log").write_bytes(b"")
+    os.utime(root / "a.log", ns=(0, 0))
+
+    report = generate_report(root, columnar=columnar)
+
+    assert "- files: 2" in report.read_text(encoding="utf-8")
+    data = json.loads(report.with_suffix(".json").read_text(encoding="utf-8"))
+    assert data["extensions"] == [{"ext": ".log", "count": 2, "bytes": 10}]
+    assert data["empty"] == 1
+    assert data["age_histogram"][-1] == {"bucket": ">= 3 years", "count": 1}
+    assert data["largest"][0]["bytes"] == 10
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="needs arbitrary bytes in file names")
+@pytest.mark.parametrize("columnar", [False, None])
+def test_generate_report_with_non_utf8_file_name(tmp_path: Path, columnar: bool | None):
+    root = tmp_path / "ROOT"
+    name = os.fsdecode(b"bad\xff")
+    (root / name).mkdir(parents=True)
+    (root / name / "f.txt").write_text("f")
+
+    report = generate_report(root, columnar=columnar)
+
+    assert "f.txt" in report.read_text(encoding="utf-8")  # name escaped, not a crash
+    data = json.loads(report.with_suffix(".json").read_text(encoding="utf-8"))
+    assert data["largest"][0]["path"] == str(root / name / "f.txt")
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from inventory_master.models import FileRecord
+from inventory_master.planner import generate_plan
+from inventory_master.rules import Rule, RuleSet, load_rules
+
+NOW = 1_700_000_000 * 10**9
+DAY = 86_400 * 10**9
+
+
+def _rec(rel: str, size: int = 10, age_days: float = 0) -> FileRecord:
+    return FileRecord(path=Path("/r") / rel, size_bytes=size, mtime_ns=NOW - int(age_days * DAY))
+
+
+def _rules(*dicts: dict) -> RuleSet:
+    return RuleSet([Rule.from_dict(d) for d in dicts], now_ns=NOW)
+
+
+def _name(rules: RuleSet, rel: str, **kw) -> str | None:
+    rule = rules.match(_rec(rel, **kw), rel)
+    return rule.name if rule else None
+
+
+def test_conditions_and_first_match_wins():
+    rules = _rules(
+        {"name": "big-logs", "extensions": ["log"], "min_size": 1000},
+        {"name": "cache", "path_prefix": "build/cache"},
+        {"name": "old", "glob": "*.dat", "older_than_days": 30},
+        {"name": "draft", "regex": r"(^|/)drafts?/"},
+        {"name": "any-log", "extensions": [".LOG"]},
+    )
+    assert _name(rules, "a/x.log", size=5000) == "big-logs"
+    assert _name(rules, "a/x.log", size=5) == "any-log"
+    assert _name(rules, "build/cache/x.log", size=5) == "cache"
+    assert _name(rules, "build/cachex/y.bin") is None
+    assert _name(rules, "d/x.dat", age_days=31) == "old"
+    assert _name(rules, "d/x.dat", age_days=1) is None
+    assert _name(rules, "p/drafts/x.txt") == "draft"
+    assert _name(rules, "p/xdrafts/x.txt") is None
+    assert rules.extensions is None
+
+
+def test_glob_with_slash_matches_relative_path():
+    rules = _rules({"name": "g", "glob": "*/tmp/*.txt"}, {"name": "n", "glob": "a*.md"})
+    assert _name(rules, "x/tmp/y.txt") == "g"
+    assert _name(rules, "x/y.txt") is None
+    assert _name(rules, "dir/abc.md") == "n"
+    assert _name(rules, "dir/xabc.md") is None
+
+
+def test_files_under_a_rules_own_dst_do_not_match_it():
+    rules = _rules({"name": "q", "extensions": [".tmp"]}, {"name": "old", "dst": "archive/old"})
+    assert _name(rules, "a/x.tmp") == "q"
+    assert _name(rules, "99_QUARANTINE/x.tmp") == "old"
+    assert _name(rules, "archive/old/sub/x.tmp") == "q"
+    assert _name(rules, "archive/old/x.bin") is None
+    assert _name(rules, "archive/x.bin") == "old"
+
+
+def test_backreferences_survive_the_merged_prefilter():
+    rules = _rules({"name": "x", "regex": r"(x)\1y"}, {"name": "a", "regex": r"(a)\1b"})
+    assert _name(rules, "d/aab") == "a"
+    assert _name(rules, "d/xxy") == "x"
+
+
+def test_rule_validation():
+    with pytest.raises(ValueError, match="Unknown rule keys"):
+        Rule.from_dict({"name": "x", "extension": [".tmp"]})
+    with pytest.raises(ValueError, match="action"):
+        Rule.from_dict({"name": "x", "action": "delete"})
+
+
+def test_generate_plan_with_rules_file(tmp_path: Path):
+    root = tmp_path / "ROOT"
+    (root / "cache").mkdir(parents=True)
+    (root / "cache" / "a.bin").write_text("a")
+    (root / "keep.txt").write_text("k")
+    (root / "x.tmp").write_text("t")
+    rules_path = tmp_path / "rules.json"
+    rules_path.write_text(
+        json.dumps({"planner_rules": [{"name": "cache", "path_prefix": "cache", "dst": "OLD"}]}),
+        encoding="utf-8",
+    )
+
+    plan_path = generate_plan(root, rules=RuleSet(load_rules(rules_path)))
+
+    actions = json.loads(plan_path.read_text(encoding="utf-8"))["actions"]
+    assert [(a["rule"], Path(a["dst"])) for a in actions] == [("cache", root / "OLD" / "a.bin")]
+
+
+def test_project_profile_rules_load():
+    pytest.importorskip("yaml")
+    profile = Path(__file__).resolve().parents[1] / "config" / "project_profile.yaml"
+    assert [r.name for r in load_rules(profile)] == ["tmp-bak"]
+
+
+def test_plan_uses_the_project_profile_by_default(tmp_path: Path, monkeypatch, capsys):
+    from inventory_master.cli import main
+
+    root = tmp_path / "ROOT"
+    root.mkdir()
+    (root / "x.tmp").write_text("t")
+    (root / "y.log").write_text("l")
+    (tmp_path / "config").mkdir()
+    profile = {"project": {"name": "t"}, "planner_rules": [{"name": "logs", "extensions": ["log"]}]}
+    (tmp_path / "config" / "project_profile.json").write_text(json.dumps(profile))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("inventory_master.cli.DEFAULT_PROFILE", Path("config/project_profile.json"))
+    monkeypatch.setattr("inventory_master.cli.server_request", lambda root, req: None)
+
+    assert main(["plan", "--root", str(root)]) == 0
+    plan = json.loads(Path(capsys.readouterr().out.strip()).read_text(encoding="utf-8"))
+    assert [(a["rule"], Path(a["src"]).name) for a in plan["actions"]] == [("logs", "y.log")]
+
+
+def test_ruleset_query_is_a_superset_of_all_rules():
+    rules = _rules(
+        {"name": "a", "extensions": [".tmp"], "path_prefix": "cache/a", "min_size": 10},
+        {"name": "b", "extensions": [".bak"], "path_prefix": "cache/b", "min_size": 5},
+    )
+    q = rules.query()
+    assert q.extensions == {".tmp", ".bak"}
+    assert (q.path_prefix, q.min_size, q.max_size) == ("cache", 5, None)
+    assert _rules({"name": "x", "glob": "*.log"}).query().is_empty
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from inventory_master import server
+from inventory_master.cli import main
+
+pytestmark = pytest.mark.skipif(not server.HAVE_UNIX_SOCKETS, reason="needs AF_UNIX")
+
+
+@pytest.fixture
+def served(tmp_path: Path):
+    root = tmp_path / "R"
+    (root / "a").mkdir(parents=True)
+    (root / "a" / "big.bin").write_bytes(b"x" * 100)
+    (root / "a" / "x.tmp").write_text("t")
+    (root / "small.txt").write_text("s")
+    ready = threading.Event()
+    thread = threading.Thread(
+        target=server.serve, args=(root,), kwargs={"ready": ready, "check_interval": 0}
+    )
+    thread.start()
+    assert ready.wait(10)
+    yield root
+    server.request(root, {"op": "shutdown"})
+    thread.join(10)
+    assert not thread.is_alive()
+    assert not server.socket_path(root).exists()
+
+
+def test_query_ops(served: Path):
+    root = served
+    assert server.request(root, {"op": "ping"})["files"] == 3
+
+    resp = server.request(root, {"op": "query", "largest": 1})
+    assert [Path(r["path"]).name for r in resp["records"]] == ["big.bin"]
+    resp = server.request(root, {"op": "query", "extensions": [".TMP"], "path_prefix": "a"})
+    assert [Path(r["path"]).name for r in resp["records"]] == ["x.tmp"]
+    resp = server.request(root, {"op": "query", "min_size": 2, "max_size": 100})
+    assert [r["size_bytes"] for r in resp["records"]] == [100]
+
+    (root / "a" / "new.tmp").write_text("n")  # directory mtime changes: inventory reloads
+    resp = server.request(root, {"op": "query", "extensions": [".tmp"]})
+    assert sorted(Path(r["path"]).name for r in resp["records"]) == ["new.tmp", "x.tmp"]
+
+    assert server.request(root, {"op": "nope"}) is None  # errors fall back to in-process
+
+
+def test_cli_report_and_plan_use_server(served: Path, capsys, monkeypatch):
+    root = served
+
+    def in_process(*args, **kwargs):
+        raise AssertionError("ran in-process")
+
+    monkeypatch.setattr("inventory_master.cli.generate_report", in_process)
+    monkeypatch.setattr("inventory_master.cli.generate_plan", in_process)
+    assert main(["report", "--root", str(root)]) == 0
+    report = Path(capsys.readouterr().out.strip())
+    assert json.loads(report.with_suffix(".json").read_text())["files"] == 3
+
+    assert main(["plan", "--root", str(root)]) == 0
+    plan = json.loads(Path(capsys.readouterr().out.strip()).read_text())
+    assert [Path(a["src"]).name for a in plan["actions"]] == ["x.tmp"]
+
+
+def test_second_server_refused(served: Path):
+    with pytest.raises(RuntimeError, match="already running"):
+        server.serve(served)
+
+
+def test_service_compares_against_its_own_load(tmp_path: Path):
+    from inventory_master.snapshot import create_snapshot
+
+    root = tmp_path / "R"
+    root.mkdir()
+    (root / "a.tmp").write_text("a")
+    svc = server.InventoryService(root, check_interval=0)
+    assert [r.path.name for r in svc.records()] == ["a.tmp"]
+
+    (root / "a.tmp").rename(root / "b.txt")
+    create_snapshot(root, root / "_meta" / "snapshots" / "s.jsonl")  # refreshes the shared cache
+    assert [r.path.name for r in svc.records()] == ["b.txt"]
+
+
+def test_service_checks_on_an_interval(tmp_path: Path):
+    root = tmp_path / "R"
+    root.mkdir()
+    (root / "a.tmp").write_text("a")
+    svc = server.InventoryService(root, check_interval=3600)
+    assert len(svc.records()) == 1
+    (root / "b.tmp").write_text("b")
+    assert len(svc.records()) == 1  # not re-checked yet
+    svc.check_interval = 0
+    assert len(svc.records()) == 2
+
+
+def test_service_reloads_after_max_age(tmp_path: Path):
+    root = tmp_path / "R"
+    root.mkdir()
+    (root / "a.tmp").write_text("a")
+    svc = server.InventoryService(root, check_interval=3600, max_age_sec=3600)
+    assert [r.size_bytes for r in svc.records()] == [1]
+    (root / "a.tmp").write_text("edited in place")
+    assert [r.size_bytes for r in svc.records()] == [1]  # directory mtimes unchanged
+    svc.max_age_sec = 0
+    assert [r.size_bytes for r in svc.records()] == [15]
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+import os
+import time
 from pathlib import Path
 
-from inventory_master.snapshot import create_snapshot
+from inventory_master.snapshot import (
+    create_incremental_snapshot,
+    create_snapshot,
+    load_snapshot,
+)
 
 
 def test_hash_verify_mismatch(tmp_path: Path):
@@ -21,3 +27,83 @@ def test_hash_verify_mismatch(tmp_path: Path):
     create_snapshot(root, snap2, hash_files=True)
 
     assert snap1.read_text() != snap2.read_text()
+
+
+def test_parallel_hashing_matches_serial(tmp_path: Path):
+    root = tmp_path / "ROOT"
+    (root / "d").mkdir(parents=True)
+    for i in range(20):
+        (root / "d" / f"f{i:02d}.bin").write_bytes(bytes([i]) * (i * 100))
+
+    serial = root / "_meta" / "snapshots" / "serial.json"
+    threaded = root / "_meta" / "snapshots" / "threaded.json"
+    assert create_snapshot(root, serial, hash_files=True, jobs=1) == 20
+    assert create_snapshot(root, threaded, hash_files=True, jobs=4) == 20
+
+    assert load_snapshot(serial) == load_snapshot(threaded)
+    assert all(item["sha256"] for item in load_snapshot(threaded))
+
+
+def test_incremental_snapshot_rehashes_only_churn(tmp_path: Path):
+    root = tmp_path / "ROOT"
+    (root / "static").mkdir(parents=True)
+    (root / "live").mkdir()
+    for i in range(5):
+        (root / "static" / f"s{i}.txt").write_text(f"static {i}")
+    (root / "live" / "edit.txt").write_text("v1")
+    (root / "live" / "gone.txt").write_text("bye")
+    old = time.time() - 60
+    os.utime(root / "static", (old, old))  # outside the racy window: listing reusable
+
+    snaps = root / "_meta" / "snapshots"
+    first = create_incremental_snapshot(root, snaps / "s1.json")
+    assert first.previous is None
+    assert len(first.added) == 7
+
+    (root / "live" / "edit.txt").write_text("version 2")
+    (root / "live" / "gone.txt").unlink()
+    (root / "live" / "new.txt").write_text("new")
+
+    second = create_incremental_snapshot(root, snaps / "s2.json")
+    assert second.previous == snaps / "s1.json"
+    assert second.added == [str(Path("live") / "new.txt")]
+    assert second.modified == [str(Path("live") / "edit.txt")]
+    assert second.removed == [str(Path("live") / "gone.txt")]
+    assert second.unchanged == 5
+    assert second.rehashed == 2
+    assert second.dirs_reused >= 1  # "static" listing came from s1
+
+    full = snaps / "full.json"
+    create_snapshot(root, full, use_hash_cache=False)
+    assert load_snapshot(snaps / "s2.json") == load_snapshot(full)
+    assert (snaps / "s2.json.changes.json").exists()
+
+
+def test_recently_modified_directory_is_not_trusted(tmp_path: Path):
+    root = tmp_path / "ROOT"
+    (root / "d").mkdir(parents=True)
+    (root / "d" / "a.txt").write_text("a")
+    snaps = root / "_meta" / "snapshots"
+    create_incremental_snapshot(root, snaps / "s1.json")
+    mtime = (root / "d").stat().st_mtime_ns
+
+    (root / "d" / "b.txt").write_text("b")
+    os.utime(root / "d", ns=(mtime, mtime))  # as if within the same coarse mtime tick
+    second = create_incremental_snapshot(root, snaps / "s2.json")
+    assert second.added == [str(Path("d") / "b.txt")]
+    assert second.dirs_reused == 0
+
+
+def test_racy_subdirectory_of_reused_listing_is_rescanned(tmp_path: Path):
+    root = tmp_path / "ROOT"
+    (root / "a").mkdir(parents=True)
+    (root / "a" / "f.txt").write_text("f")
+    snaps = root / "_meta" / "snapshots"
+    snaps.mkdir(parents=True)
+    old = time.time() - 60
+    os.utime(root, (old, old))  # root listing reusable; "a" was just touched (racy)
+    create_incremental_snapshot(root, snaps / "s1.json")
+
+    second = create_incremental_snapshot(root, snaps / "s2.json")
+    assert second.removed == [] and second.unchanged == 1
+    assert second.dirs_reused >= 1
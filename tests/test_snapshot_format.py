@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from inventory_master.snapshot import create_snapshot
+from inventory_master.snapshot_format import (
+    SnapshotWriter,
+    export_snapshot_json,
+    iter_snapshot,
+    lookup_snapshot,
+)
+
+
+def _tree(tmp_path: Path) -> Path:
+    root = tmp_path / "ROOT"
+    for d in ("a/b", "a-c", "z"):
+        (root / d).mkdir(parents=True)
+    for rel in ("a/b/1.txt", "a/2.txt", "a-c/3.txt", "z/4.txt", "5.txt"):
+        (root / rel).write_text(rel)
+    return root
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".jsonl.gz", ".jsonl.xz", ".json"])
+def test_formats_roundtrip_and_lookup(tmp_path: Path, suffix: str):
+    root = _tree(tmp_path)
+    snap = root / "_meta" / "snapshots" / f"s{suffix}"
+    assert create_snapshot(root, snap, use_hash_cache=False) == 5
+
+    records = list(iter_snapshot(snap))
+    assert len(records) == 5
+    for r in records:
+        assert lookup_snapshot(snap, r["path"]) == r
+    assert lookup_snapshot(snap, "missing.txt") is None
+    assert lookup_snapshot(snap, str(Path("a") / "0.txt")) is None
+
+
+def test_export_json_matches_compact(tmp_path: Path):
+    root = _tree(tmp_path)
+    compact = root / "_meta" / "snapshots" / "s.jsonl.gz"
+    create_snapshot(root, compact, hash_files=False)
+    exported = tmp_path / "export.json"
+    assert export_snapshot_json(compact, exported) == 5
+    assert list(iter_snapshot(exported)) == list(iter_snapshot(compact))
+
+
+def test_writer_rejects_unsorted_records(tmp_path: Path):
+    with pytest.raises(ValueError):
+        with SnapshotWriter(tmp_path / "bad.jsonl", root=tmp_path) as w:
+            w.write("b.txt", 1, 1, None)
+            w.write("a.txt", 1, 1, None)
+    assert not (tmp_path / "bad.jsonl").exists()
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="needs arbitrary bytes in file names")
+def test_non_utf8_file_name_roundtrips(tmp_path: Path):
+    root = tmp_path / "ROOT"
+    (root / "d").mkdir(parents=True)
+    name = os.fsdecode(b"bad\xff.txt")  # surrogate escape
+    (root / "d" / name).write_text("x")
+    snap = root / "_meta" / "snapshots" / "s.jsonl"
+
+    assert create_snapshot(root, snap, use_hash_cache=False) == 1
+    assert [r["path"] for r in iter_snapshot(snap)] == [os.path.join("d", name)]
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from inventory_master.inventory_index import InventoryIndex
+from inventory_master.watch import Watcher, inotify_available
+
+
+def _indexed(index: InventoryIndex, root: Path) -> dict[str, int]:
+    return {
+        str(r.path.relative_to(root)).replace("\\", "/"): r.size_bytes for r in index.iter_records()
+    }
+
+
+def _wait_for(index: InventoryIndex, root: Path, expected: dict[str, int]) -> None:
+    deadline = time.monotonic() + 10
+    while _indexed(index, root) != expected:
+        if time.monotonic() > deadline:
+            assert _indexed(index, root) == expected
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def watched(tmp_path: Path, request):
+    root = (tmp_path / "ROOT").resolve()
+    (root / "a").mkdir(parents=True)
+    (root / "a" / "old.txt").write_text("old")
+    index = InventoryIndex(tmp_path / "index.sqlite3")
+    watcher = Watcher(root, index, use_inotify=request.param, poll_interval=0.1, debounce=0.05)
+    stop = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(stop,))
+    thread.start()
+    assert watcher.ready.wait(10)
+    yield root, index, watcher
+    stop.set()
+    thread.join(10)
+    index.close()
+
+
+@pytest.mark.parametrize(
+    "watched",
+    [
+        pytest.param(
+            True,
+            marks=pytest.mark.skipif(not inotify_available(), reason="needs inotify"),
+            id="inotify",
+        ),
+        pytest.param(False, id="poll"),
+    ],
+    indirect=True,
+)
+def test_watch_applies_deltas(watched):
+    root, index, watcher = watched
+    _wait_for(index, root, {"a/old.txt": 3})
+
+    (root / "new.txt").write_text("12345")
+    (root / "a" / "old.txt").write_text("longer")
+    _wait_for(index, root, {"a/old.txt": 6, "new.txt": 5})
+
+    (root / "new.txt").rename(root / "a" / "moved.txt")
+    (root / "b" / "c").mkdir(parents=True)
+    (root / "b" / "c" / "deep.txt").write_text("d")
+    _wait_for(index, root, {"a/old.txt": 6, "a/moved.txt": 5, "b/c/deep.txt": 1})
+
+    (root / "b").rename(root / "renamed")
+    (root / "a" / "old.txt").unlink()
+    _wait_for(index, root, {"a/moved.txt": 5, "renamed/c/deep.txt": 1})
+
+    (root / "renamed" / "c" / "later.txt").write_text("ll")  # watch followed the move
+    _wait_for(index, root, {"a/moved.txt": 5, "renamed/c/deep.txt": 1, "renamed/c/later.txt": 2})
+    if watcher.stats.mode == "inotify":
+        assert watcher.stats.rescans == 1 and watcher.stats.events > 0
+        assert index.is_current(root)  # heartbeat: readers need not revalidate
+
+
+def test_overflow_rewatches_before_rescanning(tmp_path: Path):
+    from inventory_master.watch import IN_Q_OVERFLOW
+
+    stop = threading.Event()
+    calls = []
+
+    class _FakeInotify:
+        def read(self, timeout):
+            if calls:
+                stop.set()
+                return []
+            return [(-1, IN_Q_OVERFLOW, "")]
+
+    with InventoryIndex(tmp_path / "index.sqlite3") as index:
+        watcher = Watcher(tmp_path, index, debounce=0)
+        watcher._ino = _FakeInotify()  # type: ignore[assignment]
+        watcher._watch_tree = lambda top: calls.append("watch")  # type: ignore[method-assign]
+        watcher._rescan = lambda: calls.append("rescan")  # type: ignore[method-assign]
+        watcher._run_inotify(stop)
+    assert calls == ["watch", "rescan"]